@@ -0,0 +1,337 @@
+"""
+Motores de almacenamiento para GestionInventario
+Cada backend sabe abrir conexiones (sueltas o en pool), crear cursores que
+devuelven filas como diccionarios y resolver las pocas diferencias de SQL
+entre motores. Las consultas de GestionInventario se escriben con %s como
+marcador; el backend de SQLite las traduce.
+
+- BackendMySQL: servidor MySQL central con mysql-connector-python
+- BackendSQLite: base embebida en un archivo, para una sola tienda o para
+  cajas sin red. No necesita servidor ni dependencias externas.
+"""
+
+import queue
+import re
+import sqlite3
+import threading
+from decimal import Decimal
+from functools import lru_cache
+
+from dinero import Dinero
+
+# Error es siempre una tupla de clases. Para atraparlo junto con otras
+# excepciones hay que desempacarla: except (*Error, ErrorPool). Una tupla
+# dentro de otra no vale y cualquier otra excepción se vuelve TypeError
+try:
+    import mysql.connector
+    from mysql.connector import errorcode, pooling
+    Error = (mysql.connector.Error, sqlite3.Error)
+except ImportError:
+    mysql = None
+    Error = (sqlite3.Error,)
+
+
+class ErrorPool(RuntimeError):
+    """
+    No se obtuvo una conexión libre del pool a tiempo
+    """
+
+
+# ========== MYSQL ==========
+
+class PoolMySQL:
+    """
+    Adapta MySQLConnectionPool a la interfaz obtener/devolver/cerrar
+    """
+    def __init__(self, pool):
+        self._pool = pool
+
+    def obtener(self):
+        # get_connection() hace ping y reconecta si la conexión se cayó
+        return self._pool.get_connection()
+
+    def devolver(self, conexion):
+        conexion.close()  # en una conexión del pool la regresa al pool
+
+    def cerrar(self):
+        self._pool._remove_connections()
+
+
+class BackendMySQL:
+    nombre = "MySQL"
+
+    def __init__(self, host='localhost', database='gestion_inventario', user='root', password=''):
+        self.host = host
+        self.database = database
+        self.user = user
+        self.password = password
+
+    def _configuracion(self):
+        if mysql is None:
+            raise ImportError("mysql-connector-python no está instalado "
+                              "(pip install mysql-connector-python)")
+        return dict(host=self.host, database=self.database,
+                    user=self.user, password=self.password)
+
+    def descripcion(self):
+        return f"MySQL {self.user}@{self.host}/{self.database}"
+
+    def conectar(self):
+        return mysql.connector.connect(**self._configuracion())
+
+    def crear_pool(self, tamano, nombre):
+        return PoolMySQL(pooling.MySQLConnectionPool(
+            pool_name=nombre, pool_size=tamano, **self._configuracion()))
+
+    def cursor(self, conexion):
+        return conexion.cursor(dictionary=True)
+
+    def esta_conectada(self, conexion):
+        return conexion.is_connected()
+
+    def verificar(self, conexion, reintentos):
+        """
+        Hace ping y reconecta si la conexión se cayó
+        """
+        conexion.ping(reconnect=True, attempts=reintentos, delay=1)
+
+    def es_reintentable(self, error):
+        """
+        Errores por concurrencia que se resuelven repitiendo la transacción
+        """
+        return getattr(error, 'errno', None) in (errorcode.ER_LOCK_DEADLOCK,
+                                                 errorcode.ER_LOCK_WAIT_TIMEOUT)
+
+    def es_indice_repetido(self, error):
+        return getattr(error, 'errno', None) == errorcode.ER_DUP_KEYNAME
+
+    def upsert(self, clave, columnas):
+        """
+        Cláusula que convierte un INSERT en "insertar o actualizar"
+        """
+        asignaciones = ", ".join(f"{c} = VALUES({c})" for c in columnas)
+        return f" ON DUPLICATE KEY UPDATE {asignaciones}"
+
+    def binario(self, expresion):
+        """
+        Expresión de texto comparada por código de carácter (como Python)
+        y no con la collation de la tabla, que ignora mayúsculas y acentos
+        """
+        return f"{expresion} COLLATE utf8mb4_bin"
+
+    def explicar(self, conexion, query, params=None):
+        """
+        Plan de ejecución como lista de {'tabla', 'completo', 'detalle'};
+        completo indica que la tabla se recorre entera
+        """
+        cursor = conexion.cursor(dictionary=True, buffered=True)
+        try:
+            cursor.execute("EXPLAIN " + query, params)
+            return [{'tabla': fila['table'],
+                     'completo': fila['type'] == 'ALL',
+                     'detalle': f"{fila['type']}/{fila['key'] or '-'}"}
+                    for fila in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+
+# ========== SQLITE ==========
+
+# Columnas (y alias) con importes: en SQLite son centavos INTEGER
+IMPORTES = frozenset({'precio', 'precio_unitario', 'total', 'valor'})
+
+@lru_cache(maxsize=512)
+def _traducir(query):
+    """
+    Pasa los marcadores de mysql-connector (%s, %%) a los de sqlite3 (?, %)
+    """
+    return query.replace('%%', '\0').replace('%s', '?').replace('\0', '%')
+
+
+def _fila_diccionario(cursor, fila):
+    return {columna[0]: Decimal(valor).scaleb(-2)
+            if type(valor) is int and columna[0] in IMPORTES else valor
+            for columna, valor in zip(cursor.description, fila)}
+
+
+def _parametros(params):
+    """
+    Los Decimal (importes en pesos, Dinero.pesos) se guardan como centavos
+    """
+    if not params or not any(isinstance(valor, Decimal) for valor in params):
+        return params or ()
+    return tuple(Dinero.de(valor).centavos if isinstance(valor, Decimal) else valor
+                 for valor in params)
+
+
+class CursorSQLite:
+    """
+    Cursor de sqlite3 con la interfaz que usa GestionInventario: marcadores
+    %s y filas como diccionarios. sqlite3 guarda compiladas las últimas
+    sentencias usadas, así que las consultas repetidas no se vuelven a preparar.
+    Los importes se escriben como centavos enteros y se leen como Decimal en
+    pesos (columnas de IMPORTES), igual que los DECIMAL de MySQL
+    """
+    def __init__(self, conexion):
+        self._cursor = conexion.cursor()
+        self._cursor.row_factory = _fila_diccionario
+
+    def execute(self, query, params=None):
+        self._cursor.execute(_traducir(query), _parametros(params))
+
+    def executemany(self, query, secuencia):
+        self._cursor.executemany(_traducir(query), map(_parametros, secuencia))
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, tamano):
+        return self._cursor.fetchmany(tamano)
+
+    def close(self):
+        self._cursor.close()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class PoolSQLite:
+    """
+    Conexiones de SQLite reutilizables. Abrir una es barato, así que se
+    crean a demanda; GestionInventario limita cuántas se usan a la vez.
+    maximo: conexiones que se llegan a abrir; con todas en uso, obtener()
+    espera a que se devuelva una
+    """
+    def __init__(self, backend, maximo=None):
+        self._backend = backend
+        self._maximo = maximo
+        self._libres = queue.LifoQueue()
+        self._todas = []
+        self._lock = threading.Lock()
+
+    def obtener(self):
+        try:
+            return self._libres.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            nueva = self._maximo is None or len(self._todas) < self._maximo
+            if nueva:
+                conexion = self._backend.conectar()
+                self._todas.append(conexion)
+        return conexion if nueva else self._libres.get()
+
+    def devolver(self, conexion):
+        conexion.rollback()
+        self._libres.put(conexion)
+
+    def cerrar(self):
+        with self._lock:
+            for conexion in self._todas:
+                conexion.close()
+            self._todas = []
+
+
+class BackendSQLite:
+    nombre = "SQLite"
+    _contador_memoria = 0
+
+    def __init__(self, ruta='gestion_inventario.db', espera=30):
+        """
+        ruta: archivo de la base (':memory:' para una base temporal
+        compartida por todas las conexiones de este backend). La base en
+        memoria usa caché compartida, donde dos conexiones que escriben a la
+        vez fallan con "database table is locked" sin esperar: su pool
+        abre una sola conexión y las sesiones se turnan
+        espera: segundos que una escritura espera si otra tiene el candado
+        """
+        self.ruta = ruta
+        self.espera = espera
+        self.database = ruta
+        if ruta == ':memory:':
+            BackendSQLite._contador_memoria += 1
+            self._uri = f"file:inventario_{id(self)}_{self._contador_memoria}?mode=memory&cache=shared"
+            # Mantiene viva la base en memoria aunque no haya otras conexiones
+            self._ancla = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        else:
+            self._uri = None
+
+    def descripcion(self):
+        return f"SQLite {self.ruta}"
+
+    def conectar(self):
+        if self._uri:
+            conexion = sqlite3.connect(self._uri, uri=True, timeout=self.espera,
+                                       check_same_thread=False, cached_statements=512)
+        else:
+            conexion = sqlite3.connect(self.ruta, timeout=self.espera,
+                                       check_same_thread=False, cached_statements=512)
+            # WAL: las lecturas no esperan a las escrituras y cada commit
+            # agrega al registro en lugar de reescribir páginas
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+        conexion.execute("PRAGMA foreign_keys=ON")
+        return conexion
+
+    def crear_pool(self, tamano, nombre):
+        return PoolSQLite(self, 1 if self._uri else None)
+
+    def cursor(self, conexion):
+        return CursorSQLite(conexion)
+
+    def esta_conectada(self, conexion):
+        try:
+            conexion.total_changes
+            return True
+        except sqlite3.ProgrammingError:
+            return False
+
+    def verificar(self, conexion, reintentos):
+        # Un archivo local no se "cae"; no hay nada que reconectar
+        pass
+
+    def es_reintentable(self, error):
+        return isinstance(error, sqlite3.OperationalError) and 'locked' in str(error)
+
+    def es_indice_repetido(self, error):
+        return False
+
+    def upsert(self, clave, columnas):
+        asignaciones = ", ".join(f"{c} = excluded.{c}" for c in columnas)
+        return f" ON CONFLICT ({clave}) DO UPDATE SET {asignaciones}"
+
+    def binario(self, expresion):
+        # BINARY es la collation por omisión de SQLite
+        return expresion
+
+    def explicar(self, conexion, query, params=None):
+        cursor = self.cursor(conexion)
+        try:
+            cursor.execute("EXPLAIN QUERY PLAN " + query, params)
+            plan = []
+            for fila in cursor.fetchall():
+                detalle = fila['detail']
+                coincidencia = re.match(r'(SCAN|SEARCH) (\w+)(.*)', detalle)
+                if coincidencia:
+                    plan.append({'tabla': coincidencia.group(2),
+                                 'completo': (coincidencia.group(1) == 'SCAN'
+                                              and 'INDEX' not in coincidencia.group(3)),
+                                 'detalle': detalle})
+            return plan
+        finally:
+            cursor.close()
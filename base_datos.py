@@ -1,53 +1,285 @@
-import mysql.connector
-from mysql.connector import Error
-import sys
+import csv
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
+from functools import wraps
+from operator import itemgetter
+
+from backends import BackendMySQL, BackendSQLite, Error, ErrorPool
+from cache_productos import CacheLRU
+from cache_reportes import DESCONOCIDA, CacheReportes
+from dinero import Dinero
+from indice_busqueda import IndiceNombres
+from libro_ventas import LibroVentas, categorias_de_productos, pedir_rango
+from monitor_inventario import MonitorInventario
+from registro_categorias import RegistroCategorias
+
+
+def _afecta_inventario_bajo(parametros, productos, cambios):
+    """
+    El reporte de inventario bajo solo cambia si el producto ya aparecía
+    en él o si su nueva cantidad queda bajo el límite (o no se conoce)
+    """
+    limite, = parametros
+    presentes = {producto['codigo_barras'] for producto in productos}
+    return any(codigo in presentes or cantidad is DESCONOCIDA
+               or (cantidad is not None and cantidad < limite)
+               for codigo, cantidad in cambios.items())
+
+
+def _operacion(metodo):
+    """
+    Ejecuta el método dentro de una sesión: en modo pool toma una
+    conexión para la operación y la devuelve al terminar
+    """
+    @wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        with self.sesion():
+            return metodo(self, *args, **kwargs)
+    return envoltura
+
 
 class GestionInventario:
     def __init__(self, host='localhost', database='gestion_inventario', 
-                 user='root', password=''):
+                 user='root', password='', pool_size=0,
+                 pool_name='pool_inventario', espera_pool=30,
+                 intervalo_ping=60, reintentos=3, cache_tamano=10000,
+                 cache_ttl=300, backend=None, mostrar_mensajes=True,
+                 cache_reportes_ttl=60):
         """
         Inicializa la conexión a la base de datos
+        pool_size: 0 usa una sola conexión; mayor a 0 activa el modo pool
+        para que varias cajas compartan la misma instancia
+        cache_tamano / cache_ttl: caché de productos por código de barras
+        (cache_tamano=0 la desactiva)
+        backend: motor de almacenamiento (por defecto MySQL con los datos de
+        conexión dados; BackendSQLite('archivo.db') para una base embebida)
+        mostrar_mensajes: si es False los métodos no imprimen nada y solo
+        devuelven datos (para servicios y otras interfaces)
+        cache_reportes_ttl: segundos que un reporte guardado se da por
+        fresco sin cambios avisados (los de otros procesos no se avisan)
         """
+        self.backend = backend or BackendMySQL(host, database, user, password)
         self.host = host
-        self.database = database
+        self.database = getattr(self.backend, 'database', database)
         self.user = user
         self.password = password
-        self.connection = None
-        self.cursor = None
+        self.pool_size = pool_size
+        self.pool_name = pool_name
+        self.espera_pool = espera_pool
+        self.intervalo_ping = intervalo_ping
+        self.reintentos = reintentos
+        self.pool = None
+        self._cupos_pool = None
+        self._local = threading.local()
+        self._connection = None
+        self._cursor = None
+        self._ultimo_uso = 0.0
+        self.cache_productos = CacheLRU(cache_tamano, cache_ttl)
+        self.registro_categorias = RegistroCategorias()
+        self.cache_reportes = CacheReportes(cache_reportes_ttl, segundo_plano=pool_size > 0)
+        self.cache_reportes.registrar('inventario_bajo', ('cantidad', 'precio', 'producto', 'categorias'),
+                                      _afecta_inventario_bajo)
+        self.cache_reportes.registrar('valor_total', ('cantidad', 'precio', 'resumen'))
+        self.cache_reportes.registrar('valor_por_categoria',
+                                      ('cantidad', 'precio', 'producto', 'categorias', 'resumen'))
+        self.cache_reportes.registrar('conteos', ('altas', 'categorias'))
+        self.indice_nombres = None
+        self.observadores = []
+        self.mostrar_mensajes = mostrar_mensajes
+        self.instrumentacion = None
+    
+    def _mensaje(self, *args, **kwargs):
+        if self.mostrar_mensajes:
+            print(*args, **kwargs)
+    
+    @property
+    def connection(self):
+        """
+        Conexión activa: la compartida o, en modo pool, la del hilo actual
+        """
+        if self.pool is None:
+            return self._connection
+        if getattr(self._local, 'connection', None) is None:
+            self._tomar_conexion()
+        return self._local.connection
+    
+    @property
+    def cursor(self):
+        """
+        Cursor de diccionario de la conexión activa
+        """
+        if self.pool is None:
+            return self._cursor
+        if getattr(self._local, 'connection', None) is None:
+            self._tomar_conexion()
+        return self._local.cursor
         
     def conectar(self):
         """
-        Establece conexión con la base de datos
+        Establece conexión con la base de datos (o crea el pool)
         """
         try:
-            self.connection = mysql.connector.connect(
-                host=self.host,
-                database=self.database,
-                user=self.user,
-                password=self.password
-            )
-            
-            if self.connection.is_connected():
-                self.cursor = self.connection.cursor(dictionary=True)
-                print("✅ Conexión exitosa a la base de datos")
+            if self.pool_size > 0:
+                self.pool = self.backend.crear_pool(self.pool_size, self.pool_name)
+                self._cupos_pool = threading.BoundedSemaphore(self.pool_size)
+                self._mensaje(f"✅ Pool de {self.pool_size} conexiones listo")
+                return True
+            
+            self._connection = self.backend.conectar()
+            
+            if self.backend.esta_conectada(self._connection):
+                self._cursor = self._crear_cursor(self._connection)
+                self._ultimo_uso = time.monotonic()
+                self._mensaje("✅ Conexión exitosa a la base de datos")
                 return True
                 
         except Error as e:
-            print(f"❌ Error al conectar a MySQL: {e}")
+            self._mensaje(f"❌ Error al conectar a {self.backend.nombre}: {e}")
             return False
     
     def desconectar(self):
         """
         Cierra la conexión a la base de datos
         """
-        if self.connection.is_connected():
-            self.cursor.close()
-            self.connection.close()
-            print("🔌 Conexión cerrada")
+        if self.pool is not None:
+            self.liberar_conexion()
+            self.pool.cerrar()
+            self.pool = None
+            self._mensaje("🔌 Pool de conexiones cerrado")
+        elif self._connection and self.backend.esta_conectada(self._connection):
+            self._cursor.close()
+            self._connection.close()
+            self._mensaje("🔌 Conexión cerrada")
+    
+    def esta_conectado(self):
+        """
+        Indica si hay conexión (o pool) abierta
+        """
+        if self.pool is not None:
+            return True
+        return self._connection is not None and self.backend.esta_conectada(self._connection)
+    
+    def reconectar(self):
+        """
+        Vuelve a abrir la conexión si se perdió. En modo pool no hace falta:
+        cada conexión se revisa al tomarla
+        """
+        if self.pool is not None:
+            return True
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Error:
+                pass
+            self._connection = None
+        return self.conectar()
+    
+    def conexion_aparte(self):
+        """
+        Otro GestionInventario sobre la misma base y con su propia conexión,
+        para usarlo desde otro hilo. Comparte las cachés, el registro de
+        categorías y los observadores: lo que escriba invalida y avisa
+        igual que si lo escribiera este. Hay que conectarlo
+        """
+        otro = GestionInventario(host=self.host, database=self.database, user=self.user,
+                                 password=self.password, reintentos=self.reintentos,
+                                 backend=self.backend, mostrar_mensajes=False)
+        otro.cache_productos = self.cache_productos
+        otro.cache_reportes = self.cache_reportes
+        otro.registro_categorias = self.registro_categorias
+        otro.observadores = self.observadores
+        return otro
+    
+    # ========== MANEJO DE CONEXIONES ==========
+    
+    @contextmanager
+    def sesion(self):
+        """
+        Reserva una conexión para el hilo actual mientras dure el bloque.
+        Las sesiones anidadas reutilizan la misma conexión; usarla alrededor
+        del ciclo de una caja deja la conexión fija a ese hilo
+        """
+        if self.pool is None:
+            self._verificar_conexion()
+            yield self._cursor
+            self._ultimo_uso = time.monotonic()
+            return
+        
+        propia = getattr(self._local, 'connection', None) is None
+        if propia:
+            self._tomar_conexion()
+        else:
+            self._verificar_conexion()
+        try:
+            yield self._local.cursor
+        finally:
+            self._local.ultimo_uso = time.monotonic()
+            if propia:
+                self.liberar_conexion()
+    
+    def liberar_conexion(self):
+        """
+        Devuelve al pool la conexión tomada por el hilo actual
+        """
+        conexion = getattr(self._local, 'connection', None)
+        if conexion is None:
+            return
+        try:
+            self._local.cursor.close()
+            self.pool.devolver(conexion)
+        except Error:
+            pass
+        finally:
+            self._local.connection = None
+            self._local.cursor = None
+            self._cupos_pool.release()
+    
+    def _tomar_conexion(self):
+        """
+        Toma una conexión del pool, esperando hasta espera_pool segundos si
+        todas están ocupadas. El pool ya reconecta las conexiones caídas
+        """
+        if not self._cupos_pool.acquire(timeout=self.espera_pool):
+            raise ErrorPool("Tiempo de espera agotado: pool sin conexiones libres")
+        try:
+            conexion = self.pool.obtener()
+            self._local.connection = conexion
+            self._local.cursor = self._crear_cursor(conexion)
+            self._local.ultimo_uso = time.monotonic()
+        except Exception:
+            self._cupos_pool.release()
+            raise
+    
+    def _crear_cursor(self, conexion):
+        cursor = self.backend.cursor(conexion)
+        if self.instrumentacion is not None:
+            cursor = self.instrumentacion.envolver_cursor(cursor)
+        return cursor
+    
+    def _verificar_conexion(self):
+        """
+        Hace ping y reconecta si la conexión lleva más de intervalo_ping
+        segundos sin usarse
+        """
+        if self.pool is None:
+            conexion, ultimo_uso = self._connection, self._ultimo_uso
+        else:
+            conexion, ultimo_uso = self._local.connection, self._local.ultimo_uso
+        
+        if conexion is None or time.monotonic() - ultimo_uso < self.intervalo_ping:
+            return
+        
+        self.backend.verificar(conexion, self.reintentos)
+        if self.pool is None:
+            self._cursor = self._crear_cursor(conexion)
+        else:
+            self._local.cursor = self._crear_cursor(conexion)
     
     # ========== OPERACIONES CRUD PARA CATEGORÍAS ==========
     
+    @_operacion
     def crear_categoria(self, nombre, descripcion=""):
         """
         Crea una nueva categoría
@@ -61,13 +293,17 @@ class GestionInventario:
             
             self.cursor.execute(query, valores)
             self.connection.commit()
-            print(f"✅ Categoría '{nombre}' creada exitosamente")
-            return self.cursor.lastrowid
+            id_categoria = self.cursor.lastrowid
+            self.registro_categorias.agregar(id_categoria, nombre)
+            self.cache_reportes.cambio('categorias')
+            self._mensaje(f"✅ Categoría '{nombre}' creada exitosamente")
+            return id_categoria
             
         except Error as e:
-            print(f"❌ Error al crear categoría: {e}")
+            self._mensaje(f"❌ Error al crear categoría: {e}")
             return None
     
+    @_operacion
     def listar_categorias(self):
         """
         Lista todas las categorías
@@ -76,129 +312,412 @@ class GestionInventario:
             query = "SELECT * FROM categorias ORDER BY nombre_categoria"
             self.cursor.execute(query)
             categorias = self.cursor.fetchall()
+            self.registro_categorias.cargar(categorias)
             
             if categorias:
-                print("\n" + "="*60)
-                print("📂 LISTA DE CATEGORÍAS")
-                print("="*60)
+                self._mensaje("\n" + "="*60)
+                self._mensaje("📂 LISTA DE CATEGORÍAS")
+                self._mensaje("="*60)
                 for cat in categorias:
-                    print(f"ID: {cat['id_categoria']}")
-                    print(f"Nombre: {cat['nombre_categoria']}")
-                    print(f"Descripción: {cat['descripcion'][:50] if cat['descripcion'] else 'Sin descripción'}")
-                    print(f"Creada: {cat['fecha_creacion']}")
-                    print("-"*40)
+                    self._mensaje(f"ID: {cat['id_categoria']}")
+                    self._mensaje(f"Nombre: {cat['nombre_categoria']}")
+                    self._mensaje(f"Descripción: {cat['descripcion'][:50] if cat['descripcion'] else 'Sin descripción'}")
+                    self._mensaje(f"Creada: {cat['fecha_creacion']}")
+                    self._mensaje("-"*40)
             else:
-                print("ℹ️ No hay categorías registradas")
+                self._mensaje("ℹ️ No hay categorías registradas")
                 
             return categorias
             
         except Error as e:
-            print(f"❌ Error al listar categorías: {e}")
+            self._mensaje(f"❌ Error al listar categorías: {e}")
             return []
     
+    def _cargar_categorias(self):
+        """
+        Lee todas las categorías al registro en memoria
+        """
+        with self.sesion() as cursor:
+            cursor.execute("SELECT id_categoria, nombre_categoria FROM categorias")
+            self.registro_categorias.cargar(cursor.fetchall())
+    
+    def completar_categorias(self, productos):
+        """
+        Pone nombre_categoria en filas de productos leídas sin JOIN. Si
+        alguna categoría no está en el registro (la creó otro proceso) se
+        recarga una vez
+        """
+        registro = self.registro_categorias
+        if not registro.cargado or not registro.completar(productos):
+            self._cargar_categorias()
+            registro.completar(productos)
+        return productos
+    
+    def _id_categoria(self, nombre_categoria):
+        """
+        id de la categoría desde el registro (recargándolo si no está), o None
+        """
+        id_categoria = self.registro_categorias.id(nombre_categoria)
+        if id_categoria is None:
+            self._cargar_categorias()
+            id_categoria = self.registro_categorias.id(nombre_categoria)
+        return id_categoria
+    
     # ========== OPERACIONES CRUD PARA PRODUCTOS ==========
     
+    @_operacion
     def crear_producto(self, codigo_barras, nombre, id_categoria, precio, cantidad=0):
         """
-        Crea un nuevo producto
+        Crea un nuevo producto. precio en pesos o Dinero; se guarda
+        redondeado al centavo
         """
         try:
             query = """
             INSERT INTO productos (codigo_barras, nombre_producto, id_categoria, precio, cantidad)
             VALUES (%s, %s, %s, %s, %s)
             """
-            valores = (codigo_barras, nombre, id_categoria, precio, cantidad)
+            valores = (codigo_barras, nombre, id_categoria, Dinero.de(precio).pesos, cantidad)
             
             self.cursor.execute(query, valores)
             self.connection.commit()
-            print(f"✅ Producto '{nombre}' creado exitosamente")
-            return self.cursor.lastrowid
+            id_producto = self.cursor.lastrowid
+            self._indexar_nombre(codigo_barras, nombre)
+            self.cache_reportes.cambio('altas')
+            self._avisar({codigo_barras: cantidad})
+            self._mensaje(f"✅ Producto '{nombre}' creado exitosamente")
+            return id_producto
             
         except Error as e:
-            print(f"❌ Error al crear producto: {e}")
+            self._mensaje(f"❌ Error al crear producto: {e}")
             return None
     
+    def obtener_producto(self, codigo_barras):
+        """
+        Devuelve el producto (con su categoría) por código de barras, o None.
+        Es la consulta del escaneo en caja: pasa primero por la caché y solo
+        va a la base de datos si el código no está
+        """
+        producto = self.cache_productos.obtener(codigo_barras)
+        if producto is not None:
+            return producto
+        
+        query = "SELECT p.* FROM productos p WHERE p.codigo_barras = %s"
+        version = self.cache_productos.version()
+        with self.sesion() as cursor:
+            cursor.execute(query, (codigo_barras,))
+            producto = cursor.fetchone()
+        
+        if producto is not None:
+            self.completar_categorias([producto])
+            self.cache_productos.guardar(codigo_barras, producto, version)
+        return producto
+
+    def obtener_productos(self, codigos):
+        """
+        Versión por lotes de obtener_producto: devuelve {codigo_barras:
+        producto} de los que existen. Los que no están en la caché se leen
+        con una sola consulta
+        """
+        productos = {}
+        faltantes = []
+        for codigo in dict.fromkeys(codigos):
+            producto = self.cache_productos.obtener(codigo)
+            if producto is not None:
+                productos[codigo] = producto
+            else:
+                faltantes.append(codigo)
+        if not faltantes:
+            return productos
+
+        marcadores = ", ".join(["%s"] * len(faltantes))
+        query = f"SELECT p.* FROM productos p WHERE p.codigo_barras IN ({marcadores})"
+        version = self.cache_productos.version()
+        with self.sesion() as cursor:
+            cursor.execute(query, faltantes)
+            filas = cursor.fetchall()
+        self.completar_categorias(filas)
+
+        for producto in filas:
+            self.cache_productos.guardar(producto['codigo_barras'], producto, version)
+            productos[producto['codigo_barras']] = producto
+        return productos
+
     def buscar_producto(self, criterio, valor):
         """
         Busca productos por diferentes criterios
         """
         try:
             if criterio == "codigo":
-                query = """
-                SELECT p.*, c.nombre_categoria 
-                FROM productos p 
-                JOIN categorias c ON p.id_categoria = c.id_categoria 
-                WHERE p.codigo_barras = %s
-                """
-            elif criterio == "nombre":
-                query = """
-                SELECT p.*, c.nombre_categoria 
-                FROM productos p 
-                JOIN categorias c ON p.id_categoria = c.id_categoria 
-                WHERE p.nombre_producto LIKE %s
-                """
-                valor = f"%{valor}%"
-            elif criterio == "categoria":
-                query = """
-                SELECT p.*, c.nombre_categoria 
-                FROM productos p 
-                JOIN categorias c ON p.id_categoria = c.id_categoria 
-                WHERE c.nombre_categoria = %s
-                """
+                producto = self.obtener_producto(valor)
+                productos = [producto] if producto else []
+            elif criterio == "nombre" and self.indice_nombres is not None:
+                productos = [producto for producto in
+                             (self.obtener_producto(codigo) for codigo, _, _ in
+                              self.indice_nombres.buscar(valor, limite=50))
+                             if producto is not None]
             else:
-                print("❌ Criterio de búsqueda no válido")
-                return []
-            
-            self.cursor.execute(query, (valor,))
-            productos = self.cursor.fetchall()
+                if criterio == "nombre":
+                    query = "SELECT p.* FROM productos p WHERE p.nombre_producto LIKE %s"
+                    valor = f"%{valor}%"
+                elif criterio == "categoria":
+                    # El nombre se resuelve en el registro y se filtra por
+                    # id_categoria con su índice
+                    query = "SELECT p.* FROM productos p WHERE p.id_categoria = %s"
+                    valor = self._id_categoria(valor)
+                else:
+                    self._mensaje("❌ Criterio de búsqueda no válido")
+                    return []
+                
+                if valor is None:
+                    productos = []
+                else:
+                    with self.sesion() as cursor:
+                        cursor.execute(query, (valor,))
+                        productos = self.completar_categorias(cursor.fetchall())
             
             if productos:
-                print(f"\n🔍 Resultados de búsqueda ({len(productos)} encontrados):")
+                self._mensaje(f"\n🔍 Resultados de búsqueda ({len(productos)} encontrados):")
                 self._mostrar_productos(productos)
             else:
-                print("ℹ️ No se encontraron productos con ese criterio")
+                self._mensaje("ℹ️ No se encontraron productos con ese criterio")
                 
             return productos
             
         except Error as e:
-            print(f"❌ Error en búsqueda: {e}")
+            self._mensaje(f"❌ Error en búsqueda: {e}")
             return []
     
+    @_operacion
     def listar_productos(self, ordenar_por="nombre"):
         """
         Lista todos los productos con opción de ordenamiento
         """
         try:
+            # Por categoría se ordena por id en la base y por nombre aquí
+            # (sort estable, cada categoría conserva el orden por código)
             orden = {
                 "nombre": "p.nombre_producto",
-                "categoria": "c.nombre_categoria",
+                "categoria": "p.id_categoria, p.codigo_barras",
                 "precio": "p.precio DESC",
                 "cantidad": "p.cantidad DESC"
             }.get(ordenar_por, "p.nombre_producto")
             
-            query = f"""
-            SELECT p.*, c.nombre_categoria 
-            FROM productos p 
-            JOIN categorias c ON p.id_categoria = c.id_categoria 
-            ORDER BY {orden}
-            """
+            query = f"SELECT p.* FROM productos p ORDER BY {orden}"
             
             self.cursor.execute(query)
-            productos = self.cursor.fetchall()
+            productos = self.completar_categorias(self.cursor.fetchall())
+            if ordenar_por == "categoria":
+                productos.sort(key=itemgetter('nombre_categoria'))
             
             if productos:
-                print(f"\n📦 LISTA DE PRODUCTOS (Ordenados por: {ordenar_por})")
-                print("="*80)
+                self._mensaje(f"\n📦 LISTA DE PRODUCTOS (Ordenados por: {ordenar_por})")
+                self._mensaje("="*80)
                 self._mostrar_productos(productos)
             else:
-                print("ℹ️ No hay productos registrados")
+                self._mensaje("ℹ️ No hay productos registrados")
                 
             return productos
             
         except Error as e:
-            print(f"❌ Error al listar productos: {e}")
+            self._mensaje(f"❌ Error al listar productos: {e}")
+            return []
+    
+    # ========== BÚSQUEDA POR NOMBRE ==========
+    
+    @_operacion
+    def construir_indice_nombres(self):
+        """
+        Carga los nombres de todos los productos en el índice de trigramas.
+        Desde ese momento buscar_producto("nombre", ...) y sugerir_productos
+        usan el índice en lugar de LIKE '%...%', y las altas, cambios y bajas
+        lo mantienen al día
+        """
+        try:
+            indice = IndiceNombres()
+            self.cursor.execute("SELECT codigo_barras, nombre_producto FROM productos")
+            for fila in self.cursor:
+                indice.agregar(fila['codigo_barras'], fila['nombre_producto'])
+            self.indice_nombres = indice
+            self._mensaje(f"✅ Índice de búsqueda listo ({len(indice)} productos)")
+            return True
+            
+        except Error as e:
+            self._mensaje(f"❌ Error al construir índice de búsqueda: {e}")
+            return False
+    
+    def sugerir_productos(self, texto, limite=10):
+        """
+        Búsqueda mientras se escribe: devuelve (codigo_barras, nombre, puntaje)
+        ordenados por parecido, tolerando errores de dedo. Construye el índice
+        la primera vez que se usa
+        """
+        if self.indice_nombres is None and not self.construir_indice_nombres():
             return []
+        return self.indice_nombres.buscar(texto, limite)
+    
+    def _indexar_nombre(self, codigo_barras, nombre):
+        if self.indice_nombres is not None:
+            self.indice_nombres.agregar(codigo_barras, nombre)
+    
+    # ========== OBSERVADORES DE INVENTARIO ==========
+    
+    def agregar_observador(self, observador):
+        """
+        Registra un objeto con el método cantidades_actualizadas(cantidades),
+        que recibe {codigo_barras: cantidad} (None si el producto se
+        eliminó) después de cada cambio de inventario confirmado
+        """
+        self.observadores.append(observador)
+    
+    def quitar_observador(self, observador):
+        self.observadores.remove(observador)
+    
+    def notificar_cambios(self, codigos):
+        """
+        Avisa un cambio relativo de cantidad (sumar o restar) de los
+        códigos dados. Solo consulta la cantidad actual si hay observadores;
+        a la caché de reportes le basta saber qué productos cambiaron
+        """
+        codigos = list(codigos)
+        if not codigos:
+            return
+        if not self.observadores:
+            if self.cache_reportes:
+                self.cache_reportes.cantidades_actualizadas(dict.fromkeys(codigos, DESCONOCIDA))
+            return
+        marcadores = ", ".join(["%s"] * len(codigos))
+        with self.sesion() as cursor:
+            cursor.execute(f"SELECT codigo_barras, cantidad FROM productos "
+                           f"WHERE codigo_barras IN ({marcadores})", codigos)
+            cantidades = dict.fromkeys(codigos)
+            cantidades.update((fila['codigo_barras'], fila['cantidad']) for fila in cursor.fetchall())
+        self._avisar(cantidades)
+    
+    def _avisar(self, cantidades):
+        self.cache_reportes.cantidades_actualizadas(cantidades)
+        for observador in self.observadores:
+            observador.cantidades_actualizadas(cantidades)
+    
+    # Columna de orden, clave en la fila y dirección para la paginación por clave
+    _ORDEN_PAGINADO = {
+        "nombre": ("p.nombre_producto", "nombre_producto", "ASC"),
+        "categoria": (None, "nombre_categoria", "ASC"),
+        "precio": ("p.precio", "precio", "DESC"),
+        "cantidad": ("p.cantidad", "cantidad", "DESC"),
+    }
+    
+    def iterar_paginas(self, ordenar_por="nombre", tamano_pagina=500, binario=False):
+        """
+        Generador que recorre los productos en páginas (listas) de hasta
+        tamano_pagina filas, con paginación por clave (keyset): cada página
+        continúa después de la última fila de la anterior en vez de usar
+        OFFSET, así que cada consulta cuesta lo mismo sin importar el tamaño
+        de la tabla. El código de barras desempata valores repetidos.
+        La conexión se toma solo mientras se lee cada página y el cursor no
+        guarda resultados en el cliente, así la memoria queda acotada a una
+        página aunque el consumidor tarde o abandone el recorrido.
+        binario: los textos se ordenan por código de carácter, igual que en
+        Python, para mezclar tiendas de motores distintos (federacion.py);
+        en MySQL ese orden no puede usar el índice del nombre
+        """
+        codigo = self.backend.binario("p.codigo_barras") if binario else "p.codigo_barras"
+        if ordenar_por == "categoria":
+            yield from self._paginas_por_categoria(tamano_pagina, codigo)
+            return
+        columna, clave, direccion = self._ORDEN_PAGINADO.get(
+            ordenar_por, self._ORDEN_PAGINADO["nombre"])
+        if binario and clave == "nombre_producto":
+            columna = self.backend.binario(columna)
+        operador = ">" if direccion == "ASC" else "<"
+        
+        consulta = """
+        SELECT p.* 
+        FROM productos p 
+        {condicion}
+        ORDER BY {columna} {direccion}, {codigo} {direccion}
+        LIMIT %s
+        """
+        # La primera parte de la condición es un rango simple sobre la
+        # columna de orden para que el motor pueda usar su índice
+        siguiente = (f"WHERE {columna} {operador}= %s "
+                     f"AND ({columna} {operador} %s OR {codigo} {operador} %s)")
+        
+        ultima = None
+        try:
+            while True:
+                if ultima is None:
+                    query = consulta.format(condicion="", columna=columna, direccion=direccion,
+                                            codigo=codigo)
+                    valores = (tamano_pagina,)
+                else:
+                    query = consulta.format(condicion=siguiente, columna=columna,
+                                            direccion=direccion, codigo=codigo)
+                    valores = (ultima[clave], ultima[clave], ultima['codigo_barras'],
+                               tamano_pagina)
+                
+                with self.sesion() as cursor:
+                    cursor.execute(query, valores)
+                    pagina = self.completar_categorias(cursor.fetchall())
+                
+                if not pagina:
+                    return
+                yield pagina
+                if len(pagina) < tamano_pagina:
+                    return
+                ultima = pagina[-1]
+                
+        except Error as e:
+            self._mensaje(f"❌ Error al listar productos: {e}")
+    
+    def _paginas_por_categoria(self, tamano_pagina, codigo="p.codigo_barras"):
+        """
+        iterar_paginas por categoría sin JOIN: recorre las categorías del
+        registro en orden de nombre y dentro de cada una pagina por código
+        de barras sobre el índice (id_categoria, codigo_barras). El registro
+        se recarga al empezar para incluir las categorías de otros procesos.
+        Las páginas salen llenas aunque crucen de una categoría a otra.
+        codigo: expresión con la que se compara el código de barras
+        """
+        query = """
+        SELECT p.* 
+        FROM productos p 
+        WHERE p.id_categoria = %s AND {codigo} > %s
+        ORDER BY {codigo}
+        LIMIT %s
+        """.format(codigo=codigo)
+        try:
+            self._cargar_categorias()
+            pagina = []
+            for nombre, id_categoria in self.registro_categorias.nombres():
+                ultimo = ""
+                while True:
+                    faltan = tamano_pagina - len(pagina)
+                    with self.sesion() as cursor:
+                        cursor.execute(query, (id_categoria, ultimo, faltan))
+                        filas = cursor.fetchall()
+                    for fila in filas:
+                        fila['nombre_categoria'] = nombre
+                    pagina.extend(filas)
+                    if len(pagina) == tamano_pagina:
+                        yield pagina
+                        pagina = []
+                    if len(filas) < faltan:
+                        break
+                    ultimo = filas[-1]['codigo_barras']
+            if pagina:
+                yield pagina
+                
+        except Error as e:
+            self._mensaje(f"❌ Error al listar productos: {e}")
     
+    def iterar_productos(self, ordenar_por="nombre", tamano_pagina=500):
+        """
+        Generador de productos fila por fila, paginado con iterar_paginas
+        """
+        for pagina in self.iterar_paginas(ordenar_por, tamano_pagina):
+            yield from pagina
+    
+    @_operacion
     def actualizar_producto(self, codigo_barras, campo, nuevo_valor):
         """
         Actualiza información de un producto
@@ -207,29 +726,41 @@ class GestionInventario:
             campos_permitidos = ['nombre_producto', 'id_categoria', 'precio', 'cantidad']
             
             if campo not in campos_permitidos:
-                print(f"❌ Campo '{campo}' no es válido para actualizar")
+                self._mensaje(f"❌ Campo '{campo}' no es válido para actualizar")
                 return False
             
+            if campo == 'precio':
+                nuevo_valor = Dinero.de(nuevo_valor).pesos
             query = f"UPDATE productos SET {campo} = %s WHERE codigo_barras = %s"
             valores = (nuevo_valor, codigo_barras)
             
             self.cursor.execute(query, valores)
             self.connection.commit()
+            self.cache_productos.invalidar(codigo_barras)
             
             if self.cursor.rowcount > 0:
-                print(f"✅ Producto actualizado exitosamente")
+                if campo == 'nombre_producto':
+                    self._indexar_nombre(codigo_barras, nuevo_valor)
+                if campo == 'cantidad':
+                    self._avisar({codigo_barras: int(nuevo_valor)})
+                else:
+                    self.cache_reportes.cambio('precio' if campo == 'precio' else 'producto',
+                                               {codigo_barras: None})
+                self._mensaje(f"✅ Producto actualizado exitosamente")
                 return True
             else:
-                print("ℹ️ No se encontró el producto con ese código de barras")
+                self._mensaje("ℹ️ No se encontró el producto con ese código de barras")
                 return False
                 
         except Error as e:
-            print(f"❌ Error al actualizar producto: {e}")
+            self._mensaje(f"❌ Error al actualizar producto: {e}")
             return False
     
-    def eliminar_producto(self, codigo_barras):
+    @_operacion
+    def eliminar_producto(self, codigo_barras, confirmar=True):
         """
         Elimina un producto por código de barras
+        confirmar: pregunta al usuario antes de borrar; False borra directo
         """
         try:
             # Primero verificar si existe
@@ -237,30 +768,39 @@ class GestionInventario:
             producto = self.cursor.fetchone()
             
             if not producto:
-                print("❌ No se encontró el producto")
+                self._mensaje("❌ No se encontró el producto")
                 return False
             
-            confirmacion = input(f"¿Estás seguro de eliminar '{producto['nombre_producto']}'? (s/n): ")
+            if confirmar:
+                confirmacion = input(f"¿Estás seguro de eliminar '{producto['nombre_producto']}'? (s/n): ")
+            else:
+                confirmacion = 's'
             
             if confirmacion.lower() == 's':
                 query = "DELETE FROM productos WHERE codigo_barras = %s"
                 self.cursor.execute(query, (codigo_barras,))
                 self.connection.commit()
+                self.cache_productos.invalidar(codigo_barras)
+                if self.indice_nombres is not None:
+                    self.indice_nombres.quitar(codigo_barras)
                 
                 if self.cursor.rowcount > 0:
-                    print("✅ Producto eliminado exitosamente")
+                    self.cache_reportes.cambio('altas')
+                    self._avisar({codigo_barras: None})
+                    self._mensaje("✅ Producto eliminado exitosamente")
                     return True
                 else:
-                    print("❌ Error al eliminar el producto")
+                    self._mensaje("❌ Error al eliminar el producto")
                     return False
             else:
-                print("❌ Eliminación cancelada")
+                self._mensaje("❌ Eliminación cancelada")
                 return False
                 
         except Error as e:
-            print(f"❌ Error al eliminar producto: {e}")
+            self._mensaje(f"❌ Error al eliminar producto: {e}")
             return False
     
+    @_operacion
     def actualizar_inventario(self, codigo_barras, cantidad, operacion='agregar'):
         """
         Actualiza la cantidad en inventario
@@ -270,86 +810,427 @@ class GestionInventario:
             if operacion == 'agregar':
                 query = "UPDATE productos SET cantidad = cantidad + %s WHERE codigo_barras = %s"
             elif operacion == 'restar':
-                query = "UPDATE productos SET cantidad = cantidad - %s WHERE codigo_barras = %s"
+                # Solo descuenta si alcanza; nunca deja el inventario negativo
+                query = ("UPDATE productos SET cantidad = cantidad - %s "
+                         "WHERE codigo_barras = %s AND cantidad >= %s")
             elif operacion == 'establecer':
                 query = "UPDATE productos SET cantidad = %s WHERE codigo_barras = %s"
             else:
-                print("❌ Operación no válida")
+                self._mensaje("❌ Operación no válida")
                 return False
             
-            self.cursor.execute(query, (cantidad, codigo_barras))
+            valores = (cantidad, codigo_barras)
+            if operacion == 'restar':
+                valores += (cantidad,)
+            
+            self.cursor.execute(query, valores)
             self.connection.commit()
+            self.cache_productos.invalidar(codigo_barras)
             
             if self.cursor.rowcount > 0:
-                print(f"✅ Inventario actualizado exitosamente")
+                if operacion == 'establecer':
+                    self._avisar({codigo_barras: cantidad})
+                else:
+                    self.notificar_cambios([codigo_barras])
+                self._mensaje(f"✅ Inventario actualizado exitosamente")
                 return True
+            elif operacion == 'restar':
+                self._mensaje("❌ No se encontró el producto o no hay unidades suficientes")
+                return False
             else:
-                print("❌ No se encontró el producto")
+                self._mensaje("❌ No se encontró el producto")
                 return False
                 
         except Error as e:
-            print(f"❌ Error al actualizar inventario: {e}")
+            self._mensaje(f"❌ Error al actualizar inventario: {e}")
             return False
     
+    # ========== VENTAS ==========
+    
+    @_operacion
+    def registrar_venta(self, lineas, caja=None):
+        """
+        Registra una venta de varias líneas en una sola transacción
+        lineas: iterable de (codigo_barras, cantidad)
+        caja: identificador de la caja que vende
+        Cada línea descuenta el inventario con un UPDATE condicional
+        (cantidad >= lo vendido), que bloquea solo esa fila hasta el commit.
+        Si alguna línea no alcanza se revierte toda la venta.
+        Devuelve el id de la venta o None si fue rechazada
+        """
+        cantidades = {}
+        for codigo_barras, cantidad in lineas:
+            if cantidad <= 0:
+                self._mensaje(f"❌ Cantidad no válida para '{codigo_barras}'")
+                return None
+            cantidades[codigo_barras] = cantidades.get(codigo_barras, 0) + cantidad
+        
+        if not cantidades:
+            self._mensaje("❌ La venta no tiene productos")
+            return None
+        
+        # Las filas se bloquean siempre en el mismo orden para que dos cajas
+        # que venden los mismos productos no lleguen a un interbloqueo
+        codigos = sorted(cantidades)
+        
+        # Con reintentos=0 igual se hace el primer intento
+        intentos = max(1, self.reintentos)
+        for intento in range(intentos):
+            try:
+                for codigo_barras in codigos:
+                    self.cursor.execute(
+                        "UPDATE productos SET cantidad = cantidad - %s "
+                        "WHERE codigo_barras = %s AND cantidad >= %s",
+                        (cantidades[codigo_barras], codigo_barras, cantidades[codigo_barras]))
+                    if self.cursor.rowcount == 0:
+                        self.connection.rollback()
+                        self._mensaje(f"❌ Venta rechazada: '{codigo_barras}' no existe o no hay "
+                              f"{cantidades[codigo_barras]} unidades")
+                        return None
+                
+                marcadores = ", ".join(["%s"] * len(codigos))
+                self.cursor.execute(
+                    f"SELECT codigo_barras, precio, cantidad FROM productos "
+                    f"WHERE codigo_barras IN ({marcadores})",
+                    codigos)
+                filas = self.cursor.fetchall()
+                precios = {fila['codigo_barras']: Dinero.de(fila['precio']) for fila in filas}
+                # Cantidades ya descontadas, para avisar sin volver a consultar
+                restantes = {fila['codigo_barras']: fila['cantidad'] for fila in filas}
+                total = sum(precios[codigo] * cantidad for codigo, cantidad in cantidades.items())
+                
+                self.cursor.execute("INSERT INTO ventas (caja, total) VALUES (%s, %s)",
+                                    (caja, total.pesos))
+                id_venta = self.cursor.lastrowid
+                self.cursor.executemany(
+                    """
+                    INSERT INTO detalle_ventas (id_venta, linea, codigo_barras, cantidad, precio_unitario)
+                    VALUES (%s, %s, %s, %s, %s)
+                    """,
+                    [(id_venta, linea, codigo, cantidad, precios[codigo].pesos)
+                     for linea, (codigo, cantidad) in enumerate(cantidades.items(), start=1)])
+                self.connection.commit()
+                break
+                
+            except Error as e:
+                self.connection.rollback()
+                if self.backend.es_reintentable(e) and intento + 1 < intentos:
+                    # Reintentar enseguida choca con la misma transacción
+                    # que tiene el candado: se espera cada vez un poco más
+                    time.sleep(0.01 * 2 ** intento)
+                    continue
+                self._mensaje(f"❌ Error al registrar venta: {e}")
+                return None
+        
+        for codigo_barras in codigos:
+            self.cache_productos.invalidar(codigo_barras)
+        self._avisar(restantes)
+        self._mensaje(f"✅ Venta {id_venta} registrada por ${total:,.2f}")
+        return id_venta
+    
+    # ========== IMPORTACIÓN MASIVA ==========
+    
+    @_operacion
+    def importar_productos(self, filas, tamano_lote=1000, actualizar_existentes=False):
+        """
+        Importa productos en lotes con executemany y un commit por lote
+        filas: iterable de diccionarios con codigo_barras, nombre_producto,
+        id_categoria (o nombre_categoria), precio y cantidad
+        actualizar_existentes: si es True, un código de barras repetido
+        actualiza el producto en lugar de reportarse como fallido; una fila
+        sin cantidad no toca las existencias del producto que ya existe
+        Devuelve un resumen con los procesados, los lotes y las filas fallidas
+        """
+        query = """
+        INSERT INTO productos (codigo_barras, nombre_producto, id_categoria, precio, cantidad)
+        VALUES (%s, %s, %s, %s, %s)
+        """
+        sin_cantidad = query
+        if actualizar_existentes:
+            query += self.backend.upsert(
+                'codigo_barras', ['nombre_producto', 'id_categoria', 'precio', 'cantidad'])
+            sin_cantidad += self.backend.upsert(
+                'codigo_barras', ['nombre_producto', 'id_categoria', 'precio'])
+        
+        resumen = {'procesados': 0, 'lotes': 0, 'fallidos': []}
+        recargado = False
+        # Un lote por consulta (son la misma si no se actualiza)
+        lotes = {query: [], sin_cantidad: []}
+        
+        try:
+            for numero, fila in enumerate(filas, start=1):
+                id_categoria = fila.get('id_categoria')
+                if not id_categoria and fila.get('nombre_categoria'):
+                    # El registro se recarga una sola vez por importación
+                    if not recargado:
+                        self._cargar_categorias()
+                        recargado = True
+                    id_categoria = self.registro_categorias.id(fila['nombre_categoria'])
+                    if id_categoria is None:
+                        resumen['fallidos'].append(
+                            (numero, fila.get('codigo_barras'),
+                             f"Categoría '{fila['nombre_categoria']}' no encontrada"))
+                        continue
+                
+                try:
+                    valores = (str(fila['codigo_barras']).strip(),
+                               fila['nombre_producto'],
+                               int(id_categoria),
+                               Dinero.de(fila['precio']).pesos,
+                               int(fila.get('cantidad') or 0))
+                except (KeyError, ValueError, TypeError) as e:
+                    resumen['fallidos'].append((numero, fila.get('codigo_barras'),
+                                                f"Fila inválida: {e!r}"))
+                    continue
+                
+                destino = query if fila.get('cantidad') not in (None, '') else sin_cantidad
+                lote = lotes[destino]
+                lote.append((numero, valores))
+                if len(lote) >= tamano_lote:
+                    self._insertar_lote(destino, lote, resumen, destino == query)
+                    lotes[destino] = []
+            
+            for destino, lote in lotes.items():
+                if lote:
+                    self._insertar_lote(destino, lote, resumen, destino == query)
+                
+        except Error as e:
+            self._mensaje(f"❌ Error en la importación: {e}")
+        
+        self._mensaje(f"✅ Importación terminada: {resumen['procesados']} productos en "
+              f"{resumen['lotes']} lotes, {len(resumen['fallidos'])} filas fallidas")
+        return resumen
+    
+    def importar_productos_csv(self, ruta, tamano_lote=1000, actualizar_existentes=False,
+                               delimitador=','):
+        """
+        Importa productos desde un archivo CSV con encabezados
+        (codigo_barras, nombre_producto, id_categoria o nombre_categoria,
+        precio, cantidad). El archivo se lee fila por fila, sin cargarlo
+        completo en memoria
+        """
+        with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+            lector = csv.DictReader(archivo, delimiter=delimitador)
+            return self.importar_productos(lector, tamano_lote, actualizar_existentes)
+    
+    def _insertar_lote(self, query, lote, resumen, con_cantidad=True):
+        """
+        Inserta un lote con executemany. Si el lote falla (por ejemplo por un
+        código de barras duplicado) se reintenta fila por fila para aislar las
+        filas con error sin perder el resto. con_cantidad=False: la consulta
+        no cambia la cantidad de los productos existentes
+        """
+        try:
+            self.cursor.executemany(query, [valores for _, valores in lote])
+            self.connection.commit()
+            resumen['procesados'] += len(lote)
+        except Error:
+            self.connection.rollback()
+            correctas = []
+            for numero, valores in lote:
+                try:
+                    self.cursor.execute(query, valores)
+                    resumen['procesados'] += 1
+                    correctas.append((numero, valores))
+                except Error as e:
+                    resumen['fallidos'].append((numero, valores[0], str(e)))
+            self.connection.commit()
+            lote = correctas
+        for _, valores in lote:
+            self.cache_productos.invalidar(valores[0])
+            self._indexar_nombre(valores[0], valores[1])
+        if lote:
+            # Con actualizar_existentes cambian también precio, nombre y categoría
+            cambios = dict.fromkeys(valores[0] for _, valores in lote)
+            self.cache_reportes.cambio('altas')
+            self.cache_reportes.cambio('precio', cambios)
+            self.cache_reportes.cambio('producto', cambios)
+            if con_cantidad:
+                self._avisar({valores[0]: valores[4] for _, valores in lote})
+            else:
+                self.notificar_cambios(cambios)
+        resumen['lotes'] += 1
+    
     # ========== REPORTES Y CONSULTAS ESPECIALES ==========
     
+    @_operacion
+    def _consultar_inventario_bajo(self, limite):
+        query = """
+        SELECT p.* 
+        FROM productos p 
+        WHERE p.cantidad < %s 
+        ORDER BY p.cantidad ASC
+        """
+        self.cursor.execute(query, (limite,))
+        return self.completar_categorias(self.cursor.fetchall())
+    
     def reporte_inventario_bajo(self, limite=10):
         """
-        Muestra productos con inventario bajo
+        Muestra productos con inventario bajo (guardado en cache_reportes)
         """
         try:
-            query = """
-            SELECT p.*, c.nombre_categoria 
-            FROM productos p 
-            JOIN categorias c ON p.id_categoria = c.id_categoria 
-            WHERE p.cantidad < %s 
-            ORDER BY p.cantidad ASC
-            """
-            
-            self.cursor.execute(query, (limite,))
-            productos = self.cursor.fetchall()
+            productos = self.cache_reportes.obtener('inventario_bajo', (limite,),
+                                                    self._consultar_inventario_bajo)
             
             if productos:
-                print(f"\n⚠️ PRODUCTOS CON INVENTARIO BAJO (menos de {limite} unidades)")
-                print("="*80)
+                self._mensaje(f"\n⚠️ PRODUCTOS CON INVENTARIO BAJO (menos de {limite} unidades)")
+                self._mensaje("="*80)
                 self._mostrar_productos(productos)
             else:
-                print(f"✅ Todos los productos tienen más de {limite} unidades")
+                self._mensaje(f"✅ Todos los productos tienen más de {limite} unidades")
                 
             return productos
             
         except Error as e:
-            print(f"❌ Error al generar reporte: {e}")
+            self._mensaje(f"❌ Error al generar reporte: {e}")
             return []
     
+    @_operacion
+    def _consultar_valor_total(self):
+        self.cursor.execute("SELECT SUM(valor) AS valor FROM resumen_inventario")
+        resultado = self.cursor.fetchone()
+        return Dinero.de(resultado['valor'] or 0)
+    
     def valor_total_inventario(self):
         """
-        Calcula el valor total del inventario
+        Calcula el valor total del inventario (Dinero). Lee los totales que
+        mantienen los disparadores en resumen_inventario (unas filas por
+        categoría), no recorre productos
         """
         try:
-            query = "SELECT SUM(precio * cantidad) as total FROM productos"
-            self.cursor.execute(query)
-            resultado = self.cursor.fetchone()
-            
-            total = resultado['total'] if resultado['total'] else 0
-            print(f"\n💰 VALOR TOTAL DEL INVENTARIO: ${total:,.2f}")
+            total = self.cache_reportes.obtener('valor_total', (), self._consultar_valor_total)
+            self._mensaje(f"\n💰 VALOR TOTAL DEL INVENTARIO: ${total:,.2f}")
             return total
             
         except Error as e:
-            print(f"❌ Error al calcular valor total: {e}")
-            return 0
+            self._mensaje(f"❌ Error al calcular valor total: {e}")
+            return Dinero()
+    
+    @_operacion
+    def _consultar_valor_por_categoria(self):
+        query = """
+        SELECT id_categoria, SUM(productos) AS productos,
+               SUM(unidades) AS unidades, SUM(valor) AS valor
+        FROM resumen_inventario
+        GROUP BY id_categoria
+        HAVING SUM(productos) > 0
+        ORDER BY valor DESC
+        """
+        self.cursor.execute(query)
+        filas = self.completar_categorias(self.cursor.fetchall())
+        return [{'nombre_categoria': fila['nombre_categoria'], 'productos': fila['productos'],
+                 'unidades': fila['unidades'], 'valor': Dinero.de(fila['valor'] or 0)}
+                for fila in filas]
+    
+    def valor_por_categoria(self):
+        """
+        Muestra productos, unidades y valor de cada categoría
+        """
+        try:
+            categorias = self.cache_reportes.obtener('valor_por_categoria', (),
+                                                     self._consultar_valor_por_categoria)
+            
+            self._mensaje("\n" + "="*70)
+            self._mensaje(f"{'Categoría':<30} {'Productos':>10} {'Unidades':>12} {'Valor':>15}")
+            self._mensaje("="*70)
+            for cat in categorias:
+                self._mensaje(f"{cat['nombre_categoria']:<30} {cat['productos']:>10} "
+                      f"{cat['unidades']:>12} ${cat['valor']:>14,.2f}")
+            self._mensaje("="*70)
+            return categorias
+            
+        except Error as e:
+            self._mensaje(f"❌ Error al calcular valor por categoría: {e}")
+            return []
+    
+    @_operacion
+    def conciliar_valor_inventario(self, corregir=True):
+        """
+        Recalcula desde cero los totales de resumen_inventario y los compara
+        con los mantenidos. Devuelve la lista de diferencias por categoría;
+        con corregir=True reemplaza los totales por los recalculados.
+        Recorre toda la tabla productos: es para mantenimiento, no para el
+        tablero
+        """
+        try:
+            self.cursor.execute("""
+            SELECT id_categoria, COUNT(*) AS productos,
+                   SUM(cantidad) AS unidades, SUM(precio * cantidad) AS valor
+            FROM productos GROUP BY id_categoria
+            """)
+            reales = {fila['id_categoria']: fila for fila in self.cursor.fetchall()}
+            self.cursor.execute("""
+            SELECT id_categoria, SUM(productos) AS productos,
+                   SUM(unidades) AS unidades, SUM(valor) AS valor
+            FROM resumen_inventario GROUP BY id_categoria
+            """)
+            mantenidos = {fila['id_categoria']: fila for fila in self.cursor.fetchall()}
+            
+            diferencias = []
+            vacio = {'productos': 0, 'unidades': 0, 'valor': 0}
+            for id_categoria in sorted(reales.keys() | mantenidos.keys()):
+                real = reales.get(id_categoria, vacio)
+                mantenido = mantenidos.get(id_categoria, vacio)
+                diferencia = {
+                    'id_categoria': id_categoria,
+                    'productos': int(mantenido['productos'] or 0) - int(real['productos'] or 0),
+                    'unidades': int(mantenido['unidades'] or 0) - int(real['unidades'] or 0),
+                    'valor': Dinero.de(mantenido['valor'] or 0) - Dinero.de(real['valor'] or 0),
+                }
+                if diferencia['productos'] or diferencia['unidades'] or diferencia['valor']:
+                    diferencias.append(diferencia)
+            
+            if not diferencias:
+                self._mensaje("✅ Los totales mantenidos coinciden con el inventario")
+                return diferencias
+            
+            self._mensaje(f"⚠️ Diferencias en {len(diferencias)} categorías (mantenido - real):")
+            for d in diferencias:
+                self._mensaje(f"  Categoría {d['id_categoria']}: productos {d['productos']:+}, "
+                      f"unidades {d['unidades']:+}, valor {d['valor']:+,.2f}")
+            
+            if corregir:
+                self.cursor.execute("DELETE FROM resumen_inventario")
+                self.cursor.execute("""
+                INSERT INTO resumen_inventario (id_categoria, ranura, productos, unidades, valor)
+                SELECT id_categoria, id_producto % 8, COUNT(*), SUM(cantidad), SUM(precio * cantidad)
+                FROM productos GROUP BY id_categoria, id_producto % 8
+                """)
+                self.connection.commit()
+                self.cache_reportes.cambio('resumen')
+                self._mensaje("✅ Totales recalculados")
+            return diferencias
+            
+        except Error as e:
+            self.connection.rollback()
+            self._mensaje(f"❌ Error al conciliar el valor del inventario: {e}")
+            return None
+    
+    @_operacion
+    def _consultar_conteos(self):
+        self.cursor.execute("SELECT COUNT(*) AS n FROM productos")
+        productos = self.cursor.fetchone()['n']
+        self.cursor.execute("SELECT COUNT(*) AS n FROM categorias")
+        return {'productos': productos, 'categorias': self.cursor.fetchone()['n']}
+    
+    def contar_registros(self):
+        """
+        {'productos': n, 'categorias': n}
+        """
+        return self.cache_reportes.obtener('conteos', (), self._consultar_conteos)
     
     # ========== MÉTODOS AUXILIARES ==========
     
-    def _mostrar_productos(self, productos):
+    def _mostrar_productos(self, productos, encabezado=True):
         """
         Muestra productos en formato tabular
         """
-        print(f"{'Código Barras':<15} {'Nombre':<25} {'Categoría':<15} {'Precio':<10} {'Cantidad':<10}")
-        print("-"*80)
+        if encabezado:
+            self._mensaje(f"{'Código Barras':<15} {'Nombre':<25} {'Categoría':<15} {'Precio':<10} {'Cantidad':<10}")
+            self._mensaje("-"*80)
         
         for prod in productos:
-            print(f"{prod['codigo_barras'][:15]:<15} "
+            self._mensaje(f"{prod['codigo_barras'][:15]:<15} "
                   f"{prod['nombre_producto'][:23]:<25} "
                   f"{prod['nombre_categoria'][:13]:<15} "
                   f"${prod['precio']:<9.2f} "
@@ -357,21 +1238,19 @@ class GestionInventario:
     
     def obtener_categoria_id(self, nombre_categoria):
         """
-        Obtiene el ID de una categoría por nombre
+        Obtiene el ID de una categoría por nombre (del registro en memoria)
         """
         try:
-            query = "SELECT id_categoria FROM categorias WHERE nombre_categoria = %s"
-            self.cursor.execute(query, (nombre_categoria,))
-            resultado = self.cursor.fetchone()
+            id_categoria = self._id_categoria(nombre_categoria)
             
-            if resultado:
-                return resultado['id_categoria']
+            if id_categoria is not None:
+                return id_categoria
             else:
-                print(f"❌ Categoría '{nombre_categoria}' no encontrada")
+                self._mensaje(f"❌ Categoría '{nombre_categoria}' no encontrada")
                 return None
                 
         except Error as e:
-            print(f"❌ Error al buscar categoría: {e}")
+            self._mensaje(f"❌ Error al buscar categoría: {e}")
             return None
 
 
@@ -396,9 +1275,13 @@ def mostrar_menu():
     print("0. 🚪 Salir")
     print("="*50)
 
-def main():
+def main(metricas=None, diario=None):
     """
     Función principal del programa
+    metricas: archivo (.json o .prom) donde volcar cada minuto la
+    instrumentación de las consultas; sin él no se instrumenta
+    diario: archivo del diario de caja; con él las ventas y ajustes de
+    inventario se anotan localmente y se aplican a la base en segundo plano
     """
     # Configuración de conexión (ajusta según tu entorno)
     gestor = GestionInventario(
@@ -409,9 +1292,58 @@ def main():
     )
     
     # Intentar conectar
-    if not gestor.conectar():
-        print("No se pudo conectar a la base de datos. Verifica la configuración.")
-        return
+    try:
+        conectado = gestor.conectar()
+    except ImportError as e:
+        print(f"❌ {e}")
+        conectado = False
+    
+    # Sin servidor (caja sin red o tienda sin MySQL) se trabaja con la base
+    # embebida local
+    if not conectado:
+        print("ℹ️ Se usará la base local gestion_inventario.db")
+        gestor = GestionInventario(backend=BackendSQLite('gestion_inventario.db'))
+        if not gestor.conectar():
+            print("No se pudo conectar a la base de datos. Verifica la configuración.")
+            return
+        
+        from esquema import migrar
+        migrar(gestor)
+    
+    instrumentacion = None
+    if metricas:
+        from instrumentacion import Instrumentacion
+        instrumentacion = Instrumentacion(umbral_lento=0.05)
+        instrumentacion.instalar(gestor)
+        instrumentacion.iniciar_volcado(metricas, intervalo=60)
+    
+    gestor.construir_indice_nombres()
+    
+    def mostrar_alerta(alerta):
+        if alerta.tipo == 'bajo':
+            print(f"⚠️ Inventario bajo: '{alerta.codigo_barras}' quedan {alerta.cantidad} "
+                  f"(punto de reorden {alerta.punto_reorden})")
+        else:
+            print(f"✅ Inventario repuesto: '{alerta.codigo_barras}'")
+    
+    monitor = MonitorInventario(gestor)
+    monitor.suscribir(mostrar_alerta)
+    gestor.agregar_observador(monitor)
+    monitor.cargar(avisar=False)
+    
+    # Copia por columnas de las ventas para los reportes de ventas
+    libro = LibroVentas('libro_ventas')
+    
+    # Con diario la caja no espera a la red: anota y sigue
+    diario_caja = None
+    if diario:
+        from diario_ventas import DiarioVentas
+        # El hilo del diario usa su propia conexión (la del menú no se
+        # comparte entre hilos); las alertas del monitor le llegan igual
+        central = gestor.conexion_aparte()
+        central.conectar()
+        diario_caja = DiarioVentas(diario, central)
+        diario_caja.iniciar()
     
     while True:
         mostrar_menu()
@@ -428,7 +1360,21 @@ def main():
             orden_map = {"1": "nombre", "2": "categoria", "3": "precio", "4": "cantidad"}
             orden = orden_map.get(orden_opcion, "nombre")
             
-            gestor.listar_productos(orden)
+            # Se muestra por páginas para no cargar todo el catálogo de una vez
+            tamano_pagina = 50
+            total = 0
+            for pagina in gestor.iterar_paginas(orden, tamano_pagina):
+                if total == 0:
+                    print(f"\n📦 LISTA DE PRODUCTOS (Ordenados por: {orden})")
+                    print("="*80)
+                gestor._mostrar_productos(pagina, encabezado=total == 0)
+                total += len(pagina)
+                if (len(pagina) == tamano_pagina and
+                        input("Enter para ver más, 'q' para terminar: ").lower() == 'q'):
+                    break
+            
+            if total == 0:
+                print("ℹ️ No hay productos registrados")
             
         elif opcion == "2":  # Buscar producto
             print("\nCriterios de búsqueda:")
@@ -452,7 +1398,7 @@ def main():
             codigo = input("Código de barras: ")
             nombre = input("Nombre del producto: ")
             categoria_nombre = input("Nombre de la categoría: ")
-            precio = float(input("Precio: "))
+            precio = Dinero.de(input("Precio: "))
             cantidad = int(input("Cantidad inicial: "))
             
             # Obtener ID de categoría
@@ -483,7 +1429,7 @@ def main():
                     gestor.listar_categorias()
                     nuevo_valor = int(input("Nuevo ID de categoría: "))
                 elif campo == "precio":
-                    nuevo_valor = float(input("Nuevo precio: "))
+                    nuevo_valor = Dinero.de(input("Nuevo precio: "))
                 elif campo == "cantidad":
                     nuevo_valor = int(input("Nueva cantidad: "))
                 else:
@@ -500,20 +1446,36 @@ def main():
             
         elif opcion == "6":  # Gestión de inventario
             print("\n📊 GESTIÓN DE INVENTARIO")
-            codigo = input("Código de barras del producto: ")
-            
             print("\nOperaciones disponibles:")
             print("1. Agregar unidades")
             print("2. Restar unidades")
             print("3. Establecer cantidad")
+            print("4. Registrar venta")
             
-            operacion_opcion = input("Selecciona operación (1-3): ")
+            operacion_opcion = input("Selecciona operación (1-4): ")
             operacion_map = {"1": "agregar", "2": "restar", "3": "establecer"}
             operacion = operacion_map.get(operacion_opcion)
             
             if operacion:
+                codigo = input("Código de barras del producto: ")
                 cantidad = int(input("Cantidad: "))
-                gestor.actualizar_inventario(codigo, cantidad, operacion)
+                if diario_caja is not None:
+                    diario_caja.actualizar_inventario(codigo, cantidad, operacion)
+                    print("📝 Ajuste anotado en el diario; se aplicará en segundo plano")
+                else:
+                    gestor.actualizar_inventario(codigo, cantidad, operacion)
+            elif operacion_opcion == "4":
+                lineas = []
+                while True:
+                    codigo = input("Código de barras (Enter para terminar): ")
+                    if not codigo:
+                        break
+                    lineas.append((codigo, int(input("Cantidad: "))))
+                if diario_caja is not None and lineas:
+                    diario_caja.registrar_venta(lineas)
+                    print("📝 Venta anotada en el diario; se aplicará en segundo plano")
+                else:
+                    gestor.registrar_venta(lineas)
             else:
                 print("❌ Operación no válida")
             
@@ -535,31 +1497,89 @@ def main():
             print("\n📈 REPORTES")
             print("1. Productos con inventario bajo")
             print("2. Valor total del inventario")
+            print("3. Valor por categoría")
+            print("4. Conciliar valor del inventario")
+            print("5. Productos bajo su punto de reorden")
+            print("6. Definir punto de reorden de un producto")
+            print("7. Ventas por hora")
+            print("8. Ventas por categoría")
+            print("9. Productos más vendidos")
             
-            reporte_opcion = input("Selecciona reporte (1-2): ")
+            reporte_opcion = input("Selecciona reporte (1-9): ")
             
             if reporte_opcion == "1":
                 limite = int(input("Límite de inventario bajo (default=10): ") or "10")
                 gestor.reporte_inventario_bajo(limite)
             elif reporte_opcion == "2":
                 gestor.valor_total_inventario()
+            elif reporte_opcion == "3":
+                gestor.valor_por_categoria()
+            elif reporte_opcion == "4":
+                gestor.conciliar_valor_inventario()
+            elif reporte_opcion == "5":
+                urgentes = monitor.urgentes(50)
+                if urgentes:
+                    print(f"\n{'Código':<15} {'Cantidad':>10} {'Punto de reorden':>18}")
+                    for codigo, cantidad, punto in urgentes:
+                        print(f"{codigo:<15} {cantidad:>10} {punto:>18}")
+                else:
+                    print("✅ Ningún producto está bajo su punto de reorden")
+            elif reporte_opcion == "6":
+                codigo = input("Código de barras: ")
+                punto = input(f"Punto de reorden (vacío = {monitor.umbral_predeterminado}): ")
+                if monitor.establecer_punto_reorden(codigo, int(punto) if punto else None):
+                    print("✅ Punto de reorden guardado")
+            elif reporte_opcion in ("7", "8", "9"):
+                libro.sincronizar(gestor)
+                desde, hasta = pedir_rango()
+                resumen = libro.resumen(desde, hasta)
+                print(f"\n🧾 {resumen['lineas']} líneas, {resumen['unidades']} unidades, "
+                      f"${resumen['ingresos']:,.2f}")
+                if reporte_opcion == "7":
+                    print(f"\n{'Hora':<8} {'Ingresos':>14}")
+                    for numero, ingresos in enumerate(libro.ingresos_por_hora(desde, hasta)):
+                        if ingresos:
+                            print(f"{numero:02d}:00    ${ingresos:>13,.2f}")
+                elif reporte_opcion == "8":
+                    por_categoria = libro.ingresos_por_categoria(
+                        categorias_de_productos(gestor), desde, hasta)
+                    print(f"\n{'Categoría':<25} {'Ingresos':>14}")
+                    for categoria, ingresos in sorted(por_categoria.items(), key=lambda c: -c[1]):
+                        print(f"{categoria[:23]:<25} ${ingresos:>13,.2f}")
+                else:
+                    print(f"\n{'Código':<15} {'Unidades':>10} {'Ingresos':>14}")
+                    for codigo, unidades, ingresos in libro.mas_vendidos(10, desde, hasta):
+                        print(f"{codigo[:15]:<15} {unidades:>10} ${ingresos:>13,.2f}")
             
         elif opcion == "9":  # Información del sistema
             print("\nℹ️ INFORMACIÓN DEL SISTEMA")
+            print(f"Motor: {gestor.backend.descripcion()}")
             print(f"Base de datos: {gestor.database}")
             print(f"Host: {gestor.host}")
             print(f"Usuario: {gestor.user}")
             print(f"Hora actual: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             
             # Contar productos y categorías
-            gestor.cursor.execute("SELECT COUNT(*) as total FROM productos")
-            total_productos = gestor.cursor.fetchone()['total']
-            
-            gestor.cursor.execute("SELECT COUNT(*) as total FROM categorias")
-            total_categorias = gestor.cursor.fetchone()['total']
+            conteos = gestor.contar_registros()
+            print(f"Total productos: {conteos['productos']}")
+            print(f"Total categorías: {conteos['categorias']}")
             
-            print(f"Total productos: {total_productos}")
-            print(f"Total categorías: {total_categorias}")
+            cache = gestor.cache_productos.estadisticas()
+            print(f"Caché de productos: {cache['entradas']} entradas, "
+                  f"{cache['aciertos']} aciertos, {cache['fallos']} fallos, "
+                  f"{cache['desalojos']} desalojos ({cache['tasa_aciertos']:.0%} aciertos)")
+            reportes = gestor.cache_reportes.estadisticas()
+            print(f"Caché de reportes: {reportes['entradas']} entradas, "
+                  f"{reportes['aciertos']} aciertos, {reportes['obsoletos']} servidos mientras "
+                  f"se recalculaban, {reportes['fallos']} fallos, "
+                  f"{reportes['invalidaciones']} invalidaciones ({reportes['tasa_aciertos']:.0%} aciertos)")
+            if diario_caja is not None:
+                print(f"Diario de caja: {diario_caja.aplicados} registros aplicados, "
+                      f"{diario_caja.pendientes()} bytes pendientes")
+                if diario_caja.ultimo_error:
+                    print(f"⚠️ Último error al sincronizar: {diario_caja.ultimo_error}")
+            if instrumentacion is not None:
+                instrumentacion.mostrar()
             
         elif opcion == "0":  # Salir
             print("👋 ¡Hasta luego!")
@@ -571,15 +1591,56 @@ def main():
         input("\nPresiona Enter para continuar...")
     
     # Desconectar al finalizar
+    if diario_caja is not None:
+        diario_caja.detener()
+        diario_caja.gestor.desconectar()
+    libro.cerrar()
+    if instrumentacion is not None:
+        instrumentacion.detener_volcado(metricas)
     gestor.desconectar()
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Sistema de gestión de inventario")
+    parser.add_argument('--metricas', metavar='RUTA',
+                        help="instrumenta las consultas y vuelca las métricas "
+                             "(.json o .prom) cada minuto")
+    parser.add_argument('--perfil', metavar='RUTA',
+                        help="perfila la sesión con cProfile y guarda el resultado")
+    parser.add_argument('--muestreo', metavar='RUTA',
+                        help="perfila por muestreo de pilas (pilas colapsadas)")
+    parser.add_argument('--diario', metavar='RUTA',
+                        help="anota ventas y ajustes en un diario local y los aplica "
+                             "a la base en segundo plano")
+    args = parser.parse_args()
+    
     # Instalación de dependencias necesarias
     try:
         import mysql.connector
     except ImportError:
-        print("❌ mysql-connector-python no está instalado.")
+        print("⚠️ mysql-connector-python no está instalado; solo se puede usar la base local.")
         print("📦 Instálalo con: pip install mysql-connector-python")
-        sys.exit(1)
     
-    main()
\ No newline at end of file
+    if args.perfil:
+        import cProfile
+        import pstats
+        perfil = cProfile.Profile()
+        try:
+            perfil.runcall(main, args.metricas, args.diario)
+        finally:
+            perfil.dump_stats(args.perfil)
+            pstats.Stats(perfil).sort_stats('cumulative').print_stats(20)
+    elif args.muestreo:
+        from instrumentacion import MuestreadorPilas
+        muestreador = MuestreadorPilas()
+        muestreador.iniciar()
+        try:
+            main(args.metricas, args.diario)
+        finally:
+            muestreador.detener()
+            muestreador.guardar(args.muestreo)
+            print(f"\n📊 Funciones con más muestras (guardado en {args.muestreo}):")
+            for funcion, muestras in muestreador.mas_frecuentes():
+                print(f"  {muestras:>6}  {funcion}")
+    else:
+        main(args.metricas, args.diario)
@@ -0,0 +1,129 @@
+"""
+Benchmark del libro del cajero automático
+Muchas sesiones concurrentes (un pool de hilos) hacen depósitos, retiros
+y transferencias sobre un libro con miles de cuentas durante un tiempo
+fijo. Informa transacciones por segundo sostenidas y latencias p50/p99, y
+al final comprueba que el dinero cuadra: la suma de saldos es la inicial
+más depósitos menos retiros, cada saldo coincide con sus movimientos y
+el libro reabierto desde disco da los mismos saldos.
+
+Uso:
+    python benchmark_cajero.py --cuentas 10000 --sesiones 64 --segundos 10
+    python benchmark_cajero.py --sin-fsync          # sin esperar al disco
+    python benchmark_cajero.py --memoria            # sin archivos
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from libro_cajero import LibroCajero
+
+SALDO_INICIAL = 100000
+
+
+def sesion(libro, numero, cuentas, fin):
+    """
+    Una sesión del cajero: operaciones al azar hasta que se acaba el tiempo.
+    Devuelve latencias y el dinero que entró y salió
+    """
+    generador = random.Random(numero)
+    latencias = []
+    depositado = retirado = rechazados = 0
+    while time.monotonic() < fin:
+        cuenta = f"{generador.randrange(cuentas):08d}"
+        importe = generador.randint(1, 50000)
+        tipo = generador.random()
+        inicio = time.perf_counter()
+        if tipo < 0.45:
+            libro.depositar(cuenta, importe)
+            depositado += importe
+        elif tipo < 0.9:
+            if libro.retirar(cuenta, importe) is None:
+                rechazados += 1
+            else:
+                retirado += importe
+        else:
+            destino = f"{generador.randrange(cuentas):08d}"
+            if destino != cuenta and libro.transferir(cuenta, destino, importe) is None:
+                rechazados += 1
+        latencias.append(time.perf_counter() - inicio)
+    return latencias, depositado, retirado, rechazados
+
+
+def percentil(tiempos, porcentaje):
+    if not tiempos:
+        return 0.0
+    return tiempos[min(len(tiempos) - 1, int(len(tiempos) * porcentaje / 100))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del libro del cajero automático")
+    parser.add_argument('--cuentas', type=int, default=10000)
+    parser.add_argument('--sesiones', type=int, default=64)
+    parser.add_argument('--segundos', type=float, default=5)
+    parser.add_argument('--sin-fsync', action='store_true',
+                        help="no esperar a que cada operación esté en disco")
+    parser.add_argument('--memoria', action='store_true', help="libro sin archivos")
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp(prefix='benchmark_cajero_')
+    ruta = None if args.memoria else os.path.join(directorio, 'cajero')
+    try:
+        libro = LibroCajero(ruta, esperar_disco=not args.sin_fsync)
+        inicio = time.perf_counter()
+        for i in range(args.cuentas):
+            libro.abrir_cuenta(f"{i:08d}", SALDO_INICIAL)
+        print(f"🏦 {args.cuentas} cuentas abiertas en {time.perf_counter() - inicio:.2f} s")
+
+        fin = time.monotonic() + args.segundos
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.sesiones) as pool:
+            resultados = list(pool.map(lambda n: sesion(libro, n, args.cuentas, fin),
+                                       range(args.sesiones)))
+        segundos = time.perf_counter() - inicio
+
+        latencias = sorted(t for r in resultados for t in r[0])
+        depositado = sum(r[1] for r in resultados)
+        retirado = sum(r[2] for r in resultados)
+        rechazados = sum(r[3] for r in resultados)
+
+        modo = "memoria" if args.memoria else ("sin fsync" if args.sin_fsync else "fsync agrupado")
+        print("\n" + "="*60)
+        print(f"🧪 CAJERO: {args.sesiones} sesiones, {segundos:.1f} s, {modo}")
+        print("="*60)
+        print(f"Transacciones:   {len(latencias):,}")
+        print(f"Por segundo:     {len(latencias) / segundos:,.0f}")
+        print(f"Latencia p50:    {percentil(latencias, 50):.3f} ms")
+        print(f"Latencia p99:    {percentil(latencias, 99):.3f} ms")
+        print(f"Rechazadas por saldo: {rechazados:,}")
+
+        saldos = {cuenta: libro.saldo(cuenta) for cuenta in libro.cuentas}
+        esperado = args.cuentas * SALDO_INICIAL + depositado - retirado
+        errores = libro.verificar()
+        print("-"*60)
+        print(f"{'✅' if sum(saldos.values()) == esperado else '❌'} Suma de saldos: "
+              f"{sum(saldos.values()):,} (esperado {esperado:,})")
+        print(f"{'✅' if not errores else '❌'} Saldos contra movimientos: "
+              f"{len(errores)} cuentas no cuadran")
+        print(f"{'✅' if min(saldos.values()) >= 0 else '❌'} Ningún saldo negativo")
+        libro.cerrar()
+
+        if ruta is not None:
+            inicio = time.perf_counter()
+            reabierto = LibroCajero(ruta)
+            iguales = all(reabierto.saldo(c) == s for c, s in saldos.items())
+            print(f"{'✅' if iguales else '❌'} Libro reabierto desde disco: "
+                  f"{reabierto.total_movimientos():,} movimientos en "
+                  f"{time.perf_counter() - inicio:.2f} s")
+            reabierto.cerrar()
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark de aritmética de dinero
+Compara float, Decimal y Dinero (centavos enteros, dinero.py) en los
+cálculos por lote de las cajas y los reportes: valor de un inventario
+(precio * cantidad sumado), impuesto por renglón redondeado al centavo y
+redondeo de efectivo. Además de los tiempos muestra cuánto se desvía el
+total con float contra el total exacto.
+
+Uso:
+    python benchmark_dinero.py --renglones 1000000
+    python benchmark_dinero.py --renglones 200000 --tasa 0.16
+"""
+
+import argparse
+import operator
+import random
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+import dinero
+from dinero import Dinero, a_centavos, aplicar_tasa, redondear, sumar, valorar
+
+CENTAVO = Decimal('0.01')
+
+
+def medir(funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de float, Decimal y Dinero")
+    parser.add_argument('--renglones', type=int, default=1_000_000)
+    parser.add_argument('--tasa', default='0.16', help="tasa de impuesto")
+    parser.add_argument('--semilla', type=int, default=7)
+    args = parser.parse_args()
+
+    generador = random.Random(args.semilla)
+    textos = [f"{generador.randint(1, 999999) / 100:.2f}" for _ in range(args.renglones)]
+    cantidades = [generador.randint(1, 50) for _ in range(args.renglones)]
+
+    flotantes = [float(texto) for texto in textos]
+    decimales = [Decimal(texto) for texto in textos]
+    objetos = [Dinero.de(texto) for texto in textos]
+    centavos = a_centavos(textos)
+    tasa_float, tasa_decimal = float(args.tasa), Decimal(args.tasa)
+
+    pruebas = {
+        'Valor (precio * cantidad)': {
+            'float': lambda: sum(map(operator.mul, flotantes, cantidades)),
+            'Decimal': lambda: sum(map(operator.mul, decimales, cantidades)),
+            'Dinero (objetos)': lambda: sum(map(operator.mul, objetos, cantidades), Dinero()),
+            'Dinero (lote)': lambda: valorar(centavos, cantidades),
+        },
+        f'Impuesto {args.tasa} por renglón': {
+            'float': lambda: sum(round(p * tasa_float, 2) for p in flotantes),
+            'Decimal': lambda: sum((p * tasa_decimal).quantize(CENTAVO, ROUND_HALF_UP)
+                                   for p in decimales),
+            'Dinero (objetos)': lambda: sum((p.impuesto(args.tasa) for p in objetos), Dinero()),
+            'Dinero (lote)': lambda: sumar(aplicar_tasa(centavos, args.tasa)),
+        },
+        'Redondeo a 50 centavos': {
+            'float': lambda: sum(round(p * 2) / 2 for p in flotantes),
+            'Decimal': lambda: sum((p * 2).quantize(Decimal(1), ROUND_HALF_UP) / 2 for p in decimales),
+            'Dinero (objetos)': lambda: sum((p.redondear(50) for p in objetos), Dinero()),
+            'Dinero (lote)': lambda: sumar(redondear(centavos, 50)),
+        },
+    }
+
+    motor = "NumPy" if dinero.np is not None else "Python puro"
+    print("\n" + "="*72)
+    print(f"💵 ARITMÉTICA DE DINERO: {args.renglones:,} renglones (lotes con {motor})")
+    print("="*72)
+    for prueba, metodos in pruebas.items():
+        print(f"\n{prueba}")
+        print(f"{'Método':<20} {'Segundos':>10} {'Renglones/s':>14} {'vs Decimal':>11} {'Total':>16}")
+        print("-"*72)
+        resultados = {metodo: medir(funcion) for metodo, funcion in metodos.items()}
+        base = resultados['Decimal'][0]
+        exacto = resultados['Decimal'][1]
+        for metodo, (segundos, total) in resultados.items():
+            print(f"{metodo:<20} {segundos:>10.3f} {args.renglones / segundos:>14,.0f} "
+                  f"{base / segundos:>10.1f}x {total:>16,.2f}")
+        desvio = Decimal(repr(resultados['float'][1])) - exacto
+        coinciden = all(Dinero.de(total) == Dinero.de(exacto)
+                        for metodo, (_, total) in resultados.items() if metodo != 'float')
+        print(f"{'✅' if coinciden else '❌'} Dinero coincide con Decimal; "
+              f"float se desvía {desvio:+.10f}")
+
+
+if __name__ == "__main__":
+    main()
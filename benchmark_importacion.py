@@ -0,0 +1,124 @@
+"""
+Benchmark de importación de productos
+Compara el camino fila por fila (crear_producto, un INSERT y un commit por
+producto) contra importar_productos (executemany con commit por lote).
+Los productos de prueba usan el prefijo BENCH- y se borran al terminar.
+
+Uso:
+    python benchmark_importacion.py --cantidad 20000 --lote 1000
+    python benchmark_importacion.py --sqlite bench.db
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from backends import BackendSQLite
+from base_datos import GestionInventario
+from esquema import migrar
+
+PREFIJO = 'BENCH-'
+
+
+def generar_filas(cantidad, id_categoria, inicio=0):
+    """
+    Genera productos sintéticos sin guardarlos todos en memoria
+    """
+    for i in range(inicio, inicio + cantidad):
+        yield {
+            'codigo_barras': f"{PREFIJO}{i:09d}",
+            'nombre_producto': f"Producto de prueba {i}",
+            'id_categoria': id_categoria,
+            'precio': round(1 + (i % 997) * 0.37, 2),
+            'cantidad': i % 250,
+        }
+
+
+def limpiar(gestor):
+    """
+    Borra los productos creados por el benchmark
+    """
+    with gestor.sesion() as cursor:
+        cursor.execute("DELETE FROM productos WHERE codigo_barras LIKE %s", (f"{PREFIJO}%",))
+        gestor.connection.commit()
+
+
+def obtener_categoria(gestor):
+    """
+    Usa (o crea) la categoría del benchmark
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        id_categoria = gestor.obtener_categoria_id('Benchmark')
+        if id_categoria is None:
+            id_categoria = gestor.crear_categoria('Benchmark', 'Productos de benchmark')
+    return id_categoria
+
+
+def medir_fila_por_fila(gestor, cantidad, id_categoria):
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for fila in generar_filas(cantidad, id_categoria):
+            gestor.crear_producto(fila['codigo_barras'], fila['nombre_producto'],
+                                  fila['id_categoria'], fila['precio'], fila['cantidad'])
+    return time.perf_counter() - inicio
+
+
+def medir_por_lotes(gestor, cantidad, id_categoria, tamano_lote):
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resumen = gestor.importar_productos(generar_filas(cantidad, id_categoria),
+                                            tamano_lote=tamano_lote)
+    return time.perf_counter() - inicio, resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de importación de productos")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--database', default='gestion_inventario')
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--sqlite', metavar='RUTA',
+                        help="usa una base SQLite embebida en lugar de MySQL")
+    parser.add_argument('--cantidad', type=int, default=10000,
+                        help="productos a importar en cada prueba")
+    parser.add_argument('--lote', type=int, default=1000, help="tamaño de lote")
+    args = parser.parse_args()
+
+    gestor = GestionInventario(host=args.host, database=args.database,
+                               user=args.user, password=args.password,
+                               backend=BackendSQLite(args.sqlite) if args.sqlite else None)
+    if not gestor.conectar():
+        return
+    if args.sqlite:
+        with contextlib.redirect_stdout(io.StringIO()):
+            migrar(gestor)
+
+    try:
+        id_categoria = obtener_categoria(gestor)
+        limpiar(gestor)
+
+        segundos_fila = medir_fila_por_fila(gestor, args.cantidad, id_categoria)
+        limpiar(gestor)
+
+        segundos_lote, resumen = medir_por_lotes(gestor, args.cantidad, id_categoria, args.lote)
+        limpiar(gestor)
+
+        print("\n" + "="*60)
+        print(f"📊 IMPORTACIÓN DE {args.cantidad:,} PRODUCTOS")
+        print("="*60)
+        print(f"{'Método':<25} {'Segundos':>10} {'Filas/s':>12}")
+        print("-"*60)
+        print(f"{'crear_producto':<25} {segundos_fila:>10.2f} {args.cantidad / segundos_fila:>12,.0f}")
+        print(f"{f'importar_productos ({args.lote})':<25} {segundos_lote:>10.2f} "
+              f"{args.cantidad / segundos_lote:>12,.0f}")
+        print("-"*60)
+        print(f"Aceleración: x{segundos_fila / segundos_lote:.1f}")
+        if resumen['fallidos']:
+            print(f"⚠️ {len(resumen['fallidos'])} filas fallidas en la importación por lotes")
+    finally:
+        gestor.desconectar()
+
+
+if __name__ == "__main__":
+    main()
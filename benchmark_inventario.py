@@ -0,0 +1,295 @@
+"""
+Benchmark de las operaciones de GestionInventario
+Llena una base local (SQLite por defecto, o MySQL) con un catálogo
+sintético del tamaño indicado y mide cada operación: escaneo por código,
+búsqueda por nombre y categoría, listado paginado, ajustes de inventario,
+ventas y reportes. Informa rendimiento y latencias p50/p90/p99 y guarda los
+resultados en JSON para comparar entre commits.
+
+La base sembrada se reutiliza si ya tiene el catálogo pedido; las
+operaciones que modifican datos solo tocan el inventario (que es enorme)
+así que varias corridas seguidas son comparables.
+
+Uso:
+    python benchmark_inventario.py --productos 100000 --salida resultados.json
+    python benchmark_inventario.py --productos 1000000 --categorias 200
+    python benchmark_inventario.py --comparar base.json --salida nuevo.json
+    python benchmark_inventario.py --mysql --database bench_inventario
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from backends import BackendSQLite
+from base_datos import GestionInventario
+from esquema import migrar
+
+MARCAS = ['Sol', 'Andes', 'Bahía', 'Cóndor', 'Norte', 'Pradera', 'Río', 'Valle',
+          'Aurora', 'Cumbre', 'Delta', 'Faro', 'Golfo', 'Lago', 'Monte', 'Selva']
+TIPOS = ['leche', 'arroz', 'frijol', 'aceite', 'café', 'galletas', 'jabón', 'refresco',
+         'atún', 'pasta', 'azúcar', 'harina', 'cereal', 'yogur', 'queso', 'detergente',
+         'shampoo', 'papel', 'salsa', 'jugo', 'agua', 'chocolate', 'avena', 'mantequilla']
+PRESENTACIONES = ['250 g', '500 g', '1 kg', '2 kg', '355 ml', '600 ml', '1 l', '2 l',
+                  'chico', 'mediano', 'grande', 'familiar', 'light', 'integral']
+
+
+def codigo(i):
+    return f"75{i:011d}"
+
+
+def nombre(i):
+    generador = random.Random(i)
+    return (f"{generador.choice(TIPOS).capitalize()} {generador.choice(MARCAS)} "
+            f"{generador.choice(PRESENTACIONES)} {i % 1000}")
+
+
+def sembrar(gestor, productos, categorias):
+    """
+    Crea las categorías y el catálogo si la base no lo tiene ya
+    """
+    with gestor.sesion() as cursor:
+        cursor.execute("SELECT COUNT(*) AS n FROM productos WHERE codigo_barras LIKE '75%%'")
+        existentes = cursor.fetchone()['n']
+    if existentes == productos:
+        return False
+    if existentes:
+        sys.exit(f"La base tiene {existentes} productos sintéticos y se pidieron {productos}; "
+                 "usa otra --sqlite o --database")
+
+    ids = []
+    for numero in range(categorias):
+        nombre_categoria = f"Categoría {numero:04d}"
+        id_categoria = gestor.obtener_categoria_id(nombre_categoria)
+        if id_categoria is None:
+            id_categoria = gestor.crear_categoria(nombre_categoria, "Benchmark")
+        ids.append(id_categoria)
+
+    filas = ({'codigo_barras': codigo(i), 'nombre_producto': nombre(i),
+              'id_categoria': ids[i % categorias], 'precio': round(5 + (i * 7919 % 50000) / 100, 2),
+              'cantidad': 1_000_000 if i % 20 else i % 15}
+             for i in range(productos))
+    inicio = time.perf_counter()
+    resumen = gestor.importar_productos(filas, tamano_lote=5000)
+    print(f"🌱 Catálogo sembrado: {resumen['procesados']:,} productos en "
+          f"{time.perf_counter() - inicio:.1f} s")
+    return True
+
+
+def medir(nombre_operacion, funcion, repeticiones, generador):
+    """
+    Ejecuta funcion(generador) repeticiones veces (tras un calentamiento
+    corto) y resume las latencias
+    """
+    # Calentamiento: llena cachés del motor y de sentencias preparadas
+    for _ in range(max(1, repeticiones // 10)):
+        funcion(generador)
+
+    tiempos = []
+    inicio_total = time.perf_counter()
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(generador)
+        tiempos.append(time.perf_counter() - inicio)
+    total = time.perf_counter() - inicio_total
+    tiempos.sort()
+
+    def percentil(p):
+        return tiempos[min(len(tiempos) - 1, int(len(tiempos) * p / 100))] * 1000
+
+    resultado = {
+        'repeticiones': repeticiones,
+        'ops_por_segundo': repeticiones / total if total else 0.0,
+        'p50_ms': percentil(50),
+        'p90_ms': percentil(90),
+        'p99_ms': percentil(99),
+        'max_ms': tiempos[-1] * 1000,
+    }
+    print(f"{nombre_operacion:<32} {resultado['ops_por_segundo']:>10,.0f} "
+          f"{resultado['p50_ms']:>9.3f} {resultado['p90_ms']:>9.3f} {resultado['p99_ms']:>9.3f}")
+    return resultado
+
+
+def operaciones(gestor, productos, categorias):
+    """
+    (nombre, función, repeticiones relativas) de cada operación a medir
+    """
+    def codigo_al_azar(generador):
+        return codigo(generador.randrange(productos))
+
+    def escaneo_sin_cache(generador):
+        codigo_barras = codigo_al_azar(generador)
+        gestor.cache_productos.invalidar(codigo_barras)
+        gestor.obtener_producto(codigo_barras)
+
+    def escaneo_con_cache(generador):
+        # Pocos productos concentran la mayoría de los escaneos
+        gestor.obtener_producto(codigo(min(int(generador.paretovariate(1.2)) - 1, productos - 1)))
+
+    def consulta_lote(generador):
+        gestor.obtener_productos([codigo_al_azar(generador) for _ in range(20)])
+
+    def buscar_nombre(generador):
+        gestor.buscar_producto("nombre", f"{generador.choice(TIPOS)} {generador.choice(MARCAS)}")
+
+    def sugerir(generador):
+        texto = generador.choice(TIPOS)
+        gestor.sugerir_productos(texto[:-1] + 'x', 10)  # con un error de dedo
+
+    def buscar_categoria(generador):
+        gestor.buscar_producto("categoria", f"Categoría {generador.randrange(categorias):04d}")
+
+    def paginas(orden):
+        def recorrer(generador):
+            for numero, _ in zip(range(5), gestor.iterar_paginas(orden, 100)):
+                pass
+        return recorrer
+
+    def ajuste_inventario(generador):
+        gestor.actualizar_inventario(codigo_al_azar(generador), 1,
+                                     generador.choice(['agregar', 'restar']))
+
+    def venta(generador):
+        lineas = {codigo_al_azar(generador): generador.randint(1, 3)
+                  for _ in range(generador.randint(1, 5))}
+        gestor.registrar_venta(lineas.items(), caja='benchmark')
+
+    return [
+        ('obtener_producto (sin caché)', escaneo_sin_cache, 1.0),
+        ('obtener_producto (con caché)', escaneo_con_cache, 4.0),
+        ('obtener_productos (20)', consulta_lote, 0.5),
+        ('buscar_producto(nombre)', buscar_nombre, 0.2),
+        ('sugerir_productos', sugerir, 0.2),
+        ('buscar_producto(categoria)', buscar_categoria, 0.05),
+        ('iterar_paginas(nombre) 5x100', paginas('nombre'), 0.1),
+        ('iterar_paginas(precio) 5x100', paginas('precio'), 0.1),
+        ('actualizar_inventario', ajuste_inventario, 0.5),
+        ('registrar_venta', venta, 0.5),
+        ('valor_total_inventario', lambda generador: gestor.valor_total_inventario(), 0.5),
+        ('valor_por_categoria', lambda generador: gestor.valor_por_categoria(), 0.1),
+        ('reporte_inventario_bajo', lambda generador: gestor.reporte_inventario_bajo(10), 0.02),
+    ]
+
+
+def commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(anterior, actual, umbral):
+    """
+    Muestra el cambio de p50 y rendimiento contra una corrida anterior.
+    Devuelve las operaciones cuyo p50 empeoró más que umbral (proporción)
+    """
+    print("\n" + "="*78)
+    print(f"📊 COMPARACIÓN CON {anterior.get('commit') or '?'} ({anterior.get('fecha', '?')})")
+    print("="*78)
+    regresiones = []
+    for nombre_operacion, resultado in actual['operaciones'].items():
+        previo = anterior.get('operaciones', {}).get(nombre_operacion)
+        if not previo or not previo['p50_ms']:
+            continue
+        cambio = resultado['p50_ms'] / previo['p50_ms'] - 1
+        marca = "❌" if cambio > umbral else "✅"
+        print(f"{marca} {nombre_operacion:<32} p50 {previo['p50_ms']:>8.3f} → "
+              f"{resultado['p50_ms']:>8.3f} ms ({cambio:+.0%})")
+        if cambio > umbral:
+            regresiones.append(nombre_operacion)
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de operaciones de inventario")
+    parser.add_argument('--productos', type=int, default=10000,
+                        help="tamaño del catálogo sintético (10k a 1M)")
+    parser.add_argument('--categorias', type=int, default=50)
+    parser.add_argument('--repeticiones', type=int, default=2000,
+                        help="repeticiones base; cada operación usa una fracción")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--sqlite', metavar='RUTA',
+                        help="base SQLite (por defecto benchmark_<productos>.db)")
+    parser.add_argument('--mysql', action='store_true', help="usa MySQL en lugar de SQLite")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--database', default='bench_inventario')
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--salida', metavar='JSON', help="guarda los resultados en este archivo")
+    parser.add_argument('--comparar', metavar='JSON', help="resultados anteriores a comparar")
+    parser.add_argument('--umbral', type=float, default=0.2,
+                        help="empeoramiento de p50 que cuenta como regresión (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    if args.mysql:
+        backend = None
+    else:
+        backend = BackendSQLite(args.sqlite or f"benchmark_{args.productos}.db")
+    gestor = GestionInventario(host=args.host, database=args.database, user=args.user,
+                               password=args.password, backend=backend,
+                               cache_tamano=max(1000, args.productos // 10),
+                               mostrar_mensajes=False)
+    if not gestor.conectar():
+        sys.exit(f"❌ No se pudo conectar a {gestor.backend.descripcion()}")
+
+    try:
+        migrar(gestor)
+        sembrar(gestor, args.productos, args.categorias)
+        inicio = time.perf_counter()
+        gestor.construir_indice_nombres()
+        segundos_indice = time.perf_counter() - inicio
+
+        print("\n" + "="*78)
+        print(f"⏱️ {gestor.backend.descripcion()}: {args.productos:,} productos, "
+              f"{args.categorias} categorías")
+        print("="*78)
+        print(f"{'Operación':<32} {'ops/s':>10} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9}")
+        print("-"*78)
+
+        resultados = {}
+        for nombre_operacion, funcion, fraccion in operaciones(gestor, args.productos,
+                                                                args.categorias):
+            generador = random.Random(f"{args.semilla}-{nombre_operacion}")
+            repeticiones = max(10, int(args.repeticiones * fraccion))
+            resultados[nombre_operacion] = medir(nombre_operacion, funcion, repeticiones, generador)
+
+        actual = {
+            'commit': commit_actual(),
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'motor': gestor.backend.nombre,
+            'productos': args.productos,
+            'categorias': args.categorias,
+            'semilla': args.semilla,
+            'construir_indice_s': segundos_indice,
+            'operaciones': resultados,
+        }
+        print("-"*78)
+        print(f"Índice de nombres construido en {segundos_indice:.2f} s")
+
+        if args.salida:
+            with open(args.salida, 'w', encoding='utf-8') as archivo:
+                json.dump(actual, archivo, indent=2, ensure_ascii=False)
+            print(f"💾 Resultados guardados en {args.salida}")
+
+        if args.comparar:
+            with open(args.comparar, encoding='utf-8') as archivo:
+                regresiones = comparar(json.load(archivo), actual, args.umbral)
+            if regresiones:
+                print(f"\n❌ {len(regresiones)} operaciones empeoraron más de {args.umbral:.0%}")
+                sys.exit(1)
+    finally:
+        gestor.desconectar()
+
+
+if __name__ == "__main__":
+    main()
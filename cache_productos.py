@@ -0,0 +1,134 @@
+"""
+Caché en memoria LRU con caducidad (TTL)
+Se usa delante de las consultas por código de barras para que un producto
+escaneado seguido no vuelva a la base de datos.
+
+Quien lee de la base para llenar la caché toma version() antes de la
+consulta y la pasa a guardar(): si mientras tanto se invalidó esa clave,
+la fila leída puede ser la anterior al cambio y no se guarda.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheLRU:
+    def __init__(self, capacidad=10000, ttl=300):
+        """
+        capacidad: número máximo de entradas; al llenarse se desaloja la
+        usada hace más tiempo
+        ttl: segundos que vive una entrada (None para no caducar). Limita lo
+        desactualizado que puede estar un dato cambiado por otro proceso
+        """
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.expirados = 0
+        self.invalidaciones = 0
+        # Generación de cada invalidación reciente, para descartar lecturas
+        # que empezaron antes; al recortarlas sube el piso y las lecturas
+        # anteriores a él se descartan todas
+        self._generacion = 0
+        self._invalidadas = OrderedDict()
+        self._piso = 0
+        self.descartados = 0
+
+    def obtener(self, clave, defecto=None):
+        """
+        Devuelve el valor guardado o defecto si no está o ya caducó
+        """
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return defecto
+
+            valor, vence = entrada
+            if vence is not None and vence < time.monotonic():
+                del self._datos[clave]
+                self.expirados += 1
+                self.fallos += 1
+                return defecto
+
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def version(self):
+        """
+        Marca a tomar antes de leer de la base un valor que se va a guardar
+        """
+        return self._generacion
+
+    def guardar(self, clave, valor, version=None):
+        """
+        Guarda un valor y desaloja la entrada más antigua si hace falta.
+        Con version (de version()) no guarda si la clave se invalidó
+        después de tomarla; devuelve si se guardó
+        """
+        if self.capacidad <= 0:
+            return False
+        vence = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if version is not None and (version < self._piso or
+                                        self._invalidadas.get(clave, -1) > version):
+                self.descartados += 1
+                return False
+            self._datos[clave] = (valor, vence)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.capacidad:
+                self._datos.popitem(last=False)
+                self.desalojos += 1
+        return True
+
+    def invalidar(self, clave):
+        """
+        Elimina una entrada; no falla si no existe. Las lecturas de esa
+        clave en curso ya no se guardan
+        """
+        with self._lock:
+            self._generacion += 1
+            self._invalidadas[clave] = self._generacion
+            self._invalidadas.move_to_end(clave)
+            if len(self._invalidadas) > max(self.capacidad, 1000):
+                _, generacion = self._invalidadas.popitem(last=False)
+                self._piso = generacion
+            if self._datos.pop(clave, None) is not None:
+                self.invalidaciones += 1
+
+    def limpiar(self):
+        """
+        Vacía la caché sin reiniciar los contadores
+        """
+        with self._lock:
+            self.invalidaciones += len(self._datos)
+            self._datos.clear()
+            self._generacion += 1
+            self._piso = self._generacion
+            self._invalidadas.clear()
+
+    def estadisticas(self):
+        """
+        Contadores de uso de la caché
+        """
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._datos),
+                'capacidad': self.capacidad,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'desalojos': self.desalojos,
+                'expirados': self.expirados,
+                'invalidaciones': self.invalidaciones,
+                'descartados': self.descartados,
+                'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._datos)
@@ -0,0 +1,214 @@
+"""
+Caché de resultados de reportes
+Guarda el resultado de cada reporte por nombre y parámetros. Cada reporte
+declara de qué tipos de cambio depende ('cantidad', 'precio', 'producto',
+'altas', 'categorias') y, si hace falta, una función que decide si un
+cambio concreto lo afecta; los métodos que modifican datos avisan con
+cambio(tipo, {codigo_barras: cantidad}) y solo se invalidan las entradas
+afectadas.
+
+Mientras un hilo recalcula una entrada invalidada, los demás reciben el
+resultado anterior en lugar de esperar o lanzar la misma consulta
+(stale-while-revalidate). Las entradas también caducan a los ttl segundos,
+por los cambios hechos desde otros procesos; con segundo_plano=True esa
+renovación se hace en otro hilo y se sigue sirviendo el resultado anterior.
+"""
+
+import threading
+import time
+
+_SIN_VALOR = object()
+
+# Cantidad de un cambio relativo (sumar o restar) cuando nadie leyó la nueva
+DESCONOCIDA = object()
+
+
+class _Entrada:
+    """
+    generacion sube con cada invalidación; calculando es la generación
+    que está recalculando algún hilo (None si ninguno)
+    """
+    __slots__ = ('valor', 'calculado', 'vigente', 'generacion', 'generacion_valor', 'calculando')
+
+    def __init__(self):
+        self.valor = None
+        self.calculado = None
+        self.vigente = False
+        self.generacion = 0
+        self.generacion_valor = -1
+        self.calculando = None
+
+
+class _Reporte:
+    __slots__ = ('dependencias', 'afectado', 'entradas', 'aciertos', 'obsoletos',
+                 'fallos', 'invalidaciones')
+
+    def __init__(self, dependencias, afectado):
+        self.dependencias = frozenset(dependencias)
+        self.afectado = afectado
+        self.entradas = {}
+        self.aciertos = 0
+        self.obsoletos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+
+
+class CacheReportes:
+    def __init__(self, ttl=60, segundo_plano=False, entradas_por_reporte=32):
+        """
+        ttl: segundos que se considera fresco un resultado (None para no
+        caducar; solo lo invalidan los cambios avisados)
+        segundo_plano: renovar en otro hilo los resultados caducados. Solo
+        con un gestor en modo pool, que da una conexión a cada hilo
+        entradas_por_reporte: combinaciones de parámetros que se guardan
+        de cada reporte; al pasarse se descarta la más antigua
+        """
+        self.ttl = ttl
+        self.segundo_plano = segundo_plano
+        self.entradas_por_reporte = entradas_por_reporte
+        self._reportes = {}
+        self._condicion = threading.Condition()
+        self.ultimo_error = None
+
+    def registrar(self, nombre, dependencias, afectado=None):
+        """
+        dependencias: tipos de cambio que invalidan el reporte
+        afectado(parametros, valor, cambios): opcional; devuelve si los
+        cambios {codigo_barras: cantidad, None o DESCONOCIDA} alteran ese
+        resultado. Sin
+        ella cualquier cambio de un tipo del que depende lo invalida
+        """
+        self._reportes[nombre] = _Reporte(dependencias, afectado)
+
+    def __bool__(self):
+        return any(reporte.entradas for reporte in self._reportes.values())
+
+    # ========== CONSULTA ==========
+
+    def obtener(self, nombre, parametros, calcular):
+        """
+        Resultado de calcular(*parametros), guardado mientras siga vigente.
+        Los errores de calcular se propagan y no se guardan
+        """
+        reporte = self._reportes[nombre]
+        with self._condicion:
+            entrada = reporte.entradas.get(parametros)
+            if entrada is None:
+                entrada = reporte.entradas[parametros] = _Entrada()
+                while len(reporte.entradas) > self.entradas_por_reporte:
+                    del reporte.entradas[next(iter(reporte.entradas))]
+
+            while entrada.calculado is None and entrada.calculando is not None:
+                # Otro hilo calcula el primer resultado: se espera el suyo
+                self._condicion.wait()
+            generacion = entrada.generacion
+            if entrada.calculado is not None:
+                caducado = self.ttl is not None and time.monotonic() - entrada.calculado >= self.ttl
+                if entrada.vigente and not caducado:
+                    reporte.aciertos += 1
+                    return entrada.valor
+                if entrada.calculando == generacion:
+                    # Ya se recalcula con los datos actuales
+                    reporte.obsoletos += 1
+                    return entrada.valor
+                if entrada.vigente and self.segundo_plano:
+                    entrada.calculando = generacion
+                    reporte.obsoletos += 1
+                    threading.Thread(target=self._renovar, daemon=True,
+                                     args=(entrada, generacion, parametros, calcular)).start()
+                    return entrada.valor
+
+            reporte.fallos += 1
+            entrada.calculando = generacion
+
+        try:
+            valor = calcular(*parametros)
+        except BaseException:
+            self._terminar(entrada, generacion)
+            raise
+        self._terminar(entrada, generacion, valor)
+        return valor
+
+    def _terminar(self, entrada, generacion, valor=_SIN_VALOR):
+        with self._condicion:
+            if valor is not _SIN_VALOR and generacion > entrada.generacion_valor:
+                entrada.valor = valor
+                entrada.calculado = time.monotonic()
+                entrada.generacion_valor = generacion
+                # Si hubo un cambio mientras se calculaba, el resultado ya nació viejo
+                entrada.vigente = entrada.generacion == generacion
+            if entrada.calculando == generacion:
+                entrada.calculando = None
+            self._condicion.notify_all()
+
+    def _renovar(self, entrada, generacion, parametros, calcular):
+        try:
+            valor = calcular(*parametros)
+        except Exception as e:
+            self.ultimo_error = e
+            self._terminar(entrada, generacion)
+            return
+        self._terminar(entrada, generacion, valor)
+
+    # ========== INVALIDACIÓN ==========
+
+    def cambio(self, tipo, cambios=None):
+        """
+        Avisa un cambio de datos. cambios: {codigo_barras: cantidad nueva,
+        None si se eliminó o DESCONOCIDA}; sin él se invalida todo lo que
+        depende del tipo
+        """
+        with self._condicion:
+            for reporte in self._reportes.values():
+                if tipo not in reporte.dependencias:
+                    continue
+                for parametros, entrada in reporte.entradas.items():
+                    if not entrada.vigente and entrada.calculando != entrada.generacion:
+                        continue
+                    # Con un cálculo en curso no se sabe qué traerá: se invalida siempre
+                    if (cambios is None or reporte.afectado is None or entrada.calculando is not None
+                            or reporte.afectado(parametros, entrada.valor, cambios)):
+                        entrada.vigente = False
+                        entrada.generacion += 1
+                        reporte.invalidaciones += 1
+
+    def cantidades_actualizadas(self, cantidades):
+        """
+        Interfaz de observador de GestionInventario
+        """
+        self.cambio('cantidad', cantidades)
+
+    def limpiar(self):
+        with self._condicion:
+            for reporte in self._reportes.values():
+                for entrada in reporte.entradas.values():
+                    entrada.vigente = False
+                    entrada.generacion += 1
+
+    # ========== ESTADÍSTICAS ==========
+
+    def estadisticas(self):
+        """
+        Contadores por reporte y totales. Los resultados anteriores servidos
+        mientras se recalculaba cuentan como aciertos en la tasa
+        """
+        with self._condicion:
+            por_reporte = {}
+            for nombre, reporte in self._reportes.items():
+                consultas = reporte.aciertos + reporte.obsoletos + reporte.fallos
+                por_reporte[nombre] = {
+                    'entradas': len(reporte.entradas),
+                    'aciertos': reporte.aciertos,
+                    'obsoletos': reporte.obsoletos,
+                    'fallos': reporte.fallos,
+                    'invalidaciones': reporte.invalidaciones,
+                    'tasa_aciertos': ((reporte.aciertos + reporte.obsoletos) / consultas
+                                      if consultas else 0.0),
+                }
+        totales = {clave: sum(r[clave] for r in por_reporte.values())
+                   for clave in ('entradas', 'aciertos', 'obsoletos', 'fallos', 'invalidaciones')}
+        consultas = totales['aciertos'] + totales['obsoletos'] + totales['fallos']
+        totales['tasa_aciertos'] = ((totales['aciertos'] + totales['obsoletos']) / consultas
+                                    if consultas else 0.0)
+        totales['reportes'] = por_reporte
+        return totales
@@ -4,10 +4,30 @@ Ejercicio que simula un cajero automático con las siguientes opciones:
 1. Ingresar dinero (Depósito)
 2. Retirar dinero
 3. Mostrar saldo disponible
-4. Salir
+4. Ver últimos movimientos
+5. Salir
+
+Los saldos y movimientos de todas las cuentas se guardan en el libro del
+cajero (libro_cajero.py) en centavos enteros; los importes se capturan y
+muestran con Dinero (dinero.py), sin pasar por float.
 """
 
-saldo = 1000
+from datetime import datetime
+
+from dinero import Dinero
+from libro_cajero import LibroCajero
+
+SALDO_INICIAL = Dinero(100000)   # $1,000.00 para las cuentas nuevas
+
+
+def a_centavos(texto):
+    return Dinero.de(texto).centavos
+
+
+libro = LibroCajero('cajero')
+cuenta = input('Número de cuenta: ').strip()
+if libro.abrir_cuenta(cuenta, SALDO_INICIAL.centavos):
+    print(f'Cuenta nueva abierta con ${SALDO_INICIAL:,.2f}')
 
 while True:
     print('\t\tMENÚ CAJERO AUTOMÁTICO')
@@ -15,41 +35,49 @@ while True:
     print('1. Hacer depósito')
     print('2. Retirar dinero de la cuenta')
     print('3. Mostrar saldo disponible')
-    print('4. Salir')
+    print('4. Ver últimos movimientos')
+    print('5. Salir')
     print('=' * 40)
     
     opcion = int(input('Digite una opción del menú: '))
     
     if opcion == 1:
-        deposito = float(input('Cantidad a ingresar: $'))
+        deposito = a_centavos(input('Cantidad a ingresar: $'))
         if deposito > 0:
-            saldo += deposito
-            print(f'Tu nuevo saldo es de: ${saldo:.2f}')
+            saldo = libro.depositar(cuenta, deposito)
+            print(f'Tu nuevo saldo es de: ${Dinero(saldo):,.2f}')
         else:
             print('La cantidad a depositar debe ser mayor a 0')
     
     elif opcion == 2:
-        retirar = float(input('Cuánto dinero deseas retirar: $'))
+        retirar = a_centavos(input('Cuánto dinero deseas retirar: $'))
         if retirar > 0:
-            if retirar <= saldo:
-                saldo -= retirar
-                print(f'Has retirado: ${retirar:.2f}')
-                print(f'Tu nuevo saldo es: ${saldo:.2f}')
+            saldo = libro.retirar(cuenta, retirar)
+            if saldo is not None:
+                print(f'Has retirado: ${Dinero(retirar):,.2f}')
+                print(f'Tu nuevo saldo es: ${Dinero(saldo):,.2f}')
             else:
                 print('No cuentas con saldo suficiente en tu cuenta')
-                print(f'Saldo actual: ${saldo:.2f}')
+                print(f'Saldo actual: ${Dinero(libro.saldo(cuenta)):,.2f}')
         else:
             print('La cantidad a retirar debe ser mayor a 0')
     
     elif opcion == 3:
-        print(f'Tu saldo disponible es de: ${saldo:.2f}')
+        print(f'Tu saldo disponible es de: ${Dinero(libro.saldo(cuenta)):,.2f}')
     
     elif opcion == 4:
+        for movimiento in libro.movimientos(cuenta, 10):
+            fecha = datetime.fromtimestamp(movimiento.momento).strftime('%Y-%m-%d %H:%M')
+            print(f'{fecha}  {movimiento.tipo:<24} {Dinero(movimiento.importe):>+12,.2f} '
+                  f'{Dinero(movimiento.saldo):>12,.2f}')
+    
+    elif opcion == 5:
+        libro.cerrar()
         print('Gracias por tu preferencia')
         print('¡Hasta luego!')
         break
     
     else:
-        print('Por favor, seleccione una opción válida del menú (1-4)')
+        print('Por favor, seleccione una opción válida del menú (1-5)')
     
     print()  # Línea en blanco para mejor legibilidad
@@ -0,0 +1,160 @@
+"""
+Prueba de carga del servidor POS
+Varias terminales simuladas (hilos con su propio ClientePOS) escanean
+productos y cierran ventas contra servidor_pos.py durante un tiempo fijo.
+Al final se informa el rendimiento y la latencia p50/p99 de escaneos y
+ventas. Los productos de la prueba usan el prefijo CARGA- y se reponen
+(inventario alto) al empezar cada corrida.
+
+Uso:
+    python carga_pos.py --url http://localhost:8080 --terminales 32 --segundos 20
+    python carga_pos.py --sqlite carga.db     # arranca un servidor en este proceso
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+
+from cliente_pos import ClientePOS, ErrorServidor
+
+PREFIJO = 'CARGA-'
+
+
+def preparar(url, productos):
+    cliente = ClientePOS(url)
+    try:
+        id_categoria = cliente.categoria('Carga', 'Productos de la prueba de carga')
+        filas = [{'codigo_barras': f"{PREFIJO}{i:06d}",
+                  'nombre_producto': f"Producto de carga {i}",
+                  'id_categoria': id_categoria,
+                  'precio': round(1 + (i % 500) * 0.25, 2),
+                  'cantidad': 1_000_000}
+                 for i in range(productos)]
+        for inicio in range(0, len(filas), 5000):
+            cliente.importar(filas[inicio:inicio + 5000], actualizar_existentes=True)
+    finally:
+        cliente.cerrar()
+
+
+def terminal(url, numero, productos, fin, resultados, lock):
+    """
+    Ciclo de una caja: escanea de 1 a 8 productos y cierra la venta
+    """
+    generador = random.Random(numero)
+    cliente = ClientePOS(url)
+    escaneos, ventas, errores = [], [], 0
+    try:
+        while time.monotonic() < fin:
+            carrito = {}
+            for _ in range(generador.randint(1, 8)):
+                # Pocos productos muy vendidos y una cola larga, como en una tienda
+                codigo = f"{PREFIJO}{min(int(generador.paretovariate(1.2)) - 1, productos - 1):06d}"
+                inicio = time.perf_counter()
+                try:
+                    cliente.escanear(codigo)
+                except (ErrorServidor, OSError):
+                    errores += 1
+                    continue
+                escaneos.append(time.perf_counter() - inicio)
+                carrito[codigo] = carrito.get(codigo, 0) + 1
+            if not carrito:
+                continue
+            inicio = time.perf_counter()
+            try:
+                cliente.vender(carrito.items(), caja=f"carga-{numero}")
+            except (ErrorServidor, OSError):
+                errores += 1
+                continue
+            ventas.append(time.perf_counter() - inicio)
+    finally:
+        cliente.cerrar()
+
+    with lock:
+        resultados['escaneos'].extend(escaneos)
+        resultados['ventas'].extend(ventas)
+        resultados['errores'] += errores
+
+
+def percentil(tiempos, porcentaje):
+    if not tiempos:
+        return 0.0
+    return tiempos[min(len(tiempos) - 1, int(len(tiempos) * porcentaje / 100))] * 1000
+
+
+def iniciar_servidor_local(ruta_sqlite, pool):
+    """
+    Arranca servidor_pos en un hilo de este proceso sobre una base SQLite
+    """
+    from backends import BackendSQLite
+    from base_datos import GestionInventario
+    from esquema import migrar
+    from servidor_pos import crear_servidor
+
+    gestor = GestionInventario(pool_size=pool, backend=BackendSQLite(ruta_sqlite),
+                               mostrar_mensajes=False)
+    if not gestor.conectar():
+        sys.exit(1)
+    migrar(gestor)
+    gestor.construir_indice_nombres()
+    servidor = crear_servidor(gestor, '127.0.0.1', 0)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del servidor POS")
+    parser.add_argument('--url', default='http://localhost:8080')
+    parser.add_argument('--sqlite', metavar='RUTA',
+                        help="arranca un servidor local sobre esta base SQLite")
+    parser.add_argument('--pool', type=int, default=16, help="conexiones del servidor local")
+    parser.add_argument('--terminales', type=int, default=32)
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--productos', type=int, default=5000)
+    args = parser.parse_args()
+
+    servidor = None
+    url = args.url
+    if args.sqlite:
+        servidor, url = iniciar_servidor_local(args.sqlite, args.pool)
+
+    try:
+        preparar(url, args.productos)
+
+        resultados = {'escaneos': [], 'ventas': [], 'errores': 0}
+        lock = threading.Lock()
+        fin = time.monotonic() + args.segundos
+        hilos = [threading.Thread(target=terminal,
+                                  args=(url, i, args.productos, fin, resultados, lock))
+                 for i in range(args.terminales)]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        segundos = time.perf_counter() - inicio
+
+        estado = ClientePOS(url).estado()
+        print("\n" + "="*60)
+        print(f"🧪 CARGA DEL SERVIDOR POS: {args.terminales} terminales, {segundos:.1f} s")
+        print("="*60)
+        print(f"{'Petición':<12} {'Total':>10} {'Por seg.':>10} {'p50 ms':>10} {'p99 ms':>10}")
+        print("-"*60)
+        for nombre in ('escaneos', 'ventas'):
+            tiempos = sorted(resultados[nombre])
+            print(f"{nombre:<12} {len(tiempos):>10} {len(tiempos) / segundos:>10,.0f} "
+                  f"{percentil(tiempos, 50):>10.2f} {percentil(tiempos, 99):>10.2f}")
+        print("-"*60)
+        print(f"Errores: {resultados['errores']}")
+        print(f"Caché: {estado['cache']['tasa_aciertos']:.1%} aciertos; "
+              f"{estado['escaneos_agrupados']} escaneos resueltos en "
+              f"{estado['consultas_agrupadas']} consultas agrupadas")
+    finally:
+        if servidor is not None:
+            servidor.shutdown()
+            servidor.gestor.desconectar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""
+Catálogo en memoria por columnas
+Guarda los productos de las cajas sin base de datos (pos_python.py,
+ejemplo.py) en arreglos compactos: precio (en centavos, ver dinero.py) y
+cantidad en array (8 bytes por producto cada uno), la categoría como un número que apunta a una lista de
+nombres sin repetir, y dos índices hash compactos que dan la fila de un
+producto por nombre o por código en O(1). Comparado con una lista de Python
+por producto en un diccionario ocupa menos de la mitad de la memoria, y el
+valor del inventario, las unidades por categoría o los productos bajo un
+límite se calculan sobre las columnas completas (con NumPy si está
+instalado).
+
+Uso:
+    catalogo = Catalogo()
+    catalogo.agregar('7501', 'Leche', 23.5, 10, 'Lácteos')
+    catalogo.vender('7501', 2)       # Dinero('47.00')
+    catalogo.valor_total()
+"""
+
+import sys
+import zlib
+from array import array
+
+from dinero import Dinero, sumar_por_grupo, valorar
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _hash(clave):
+    """
+    Hash estable entre procesos (el de str cambia en cada ejecución), para
+    que las tablas de los índices se puedan guardar en un snapshot
+    """
+    if isinstance(clave, str):
+        return zlib.crc32(clave.encode())
+    return hash(clave)
+
+
+class _IndiceHash:
+    """
+    Índice clave -> fila con direccionamiento abierto y sondeo lineal sobre
+    un array de enteros: 4 a 8 bytes por producto en lugar de una entrada de
+    diccionario más un int. Las claves no se copian; se comparan contra la
+    columna del catálogo
+    """
+    __slots__ = ('_claves', '_tabla', '_mascara', '_usadas')
+
+    def __init__(self, claves, tabla=None):
+        self._claves = claves
+        self._tabla = tabla if tabla is not None else array('i', bytes(4 * 8))
+        self._mascara = len(self._tabla) - 1
+        self._usadas = len(claves)
+
+    def _casilla(self, clave):
+        """
+        Casilla que tiene la clave, o la casilla vacía donde iría
+        """
+        tabla, claves, mascara = self._tabla, self._claves, self._mascara
+        i = _hash(clave) & mascara
+        while tabla[i] and claves[tabla[i] - 1] != clave:
+            i = (i + 1) & mascara
+        return i
+
+    def buscar(self, clave):
+        """
+        Fila de la clave o -1
+        """
+        return self._tabla[self._casilla(clave)] - 1
+
+    def agregar(self, clave, fila):
+        """
+        La clave ya debe estar en la columna, en su fila
+        """
+        if (self._usadas + 1) * 2 > len(self._tabla):
+            self._reconstruir(len(self._tabla) * 2)
+            return
+        self._tabla[self._casilla(clave)] = fila + 1
+        self._usadas += 1
+
+    def mover(self, clave, fila):
+        self._tabla[self._casilla(clave)] = fila + 1
+
+    def quitar(self, clave):
+        """
+        Borra con corrimiento hacia atrás, sin marcas de borrado: las claves
+        que siguen en la misma racha se recorren para no cortar su búsqueda
+        """
+        tabla, claves, mascara = self._tabla, self._claves, self._mascara
+        i = j = self._casilla(clave)
+        while True:
+            tabla[i] = 0
+            while True:
+                j = (j + 1) & mascara
+                if not tabla[j]:
+                    self._usadas -= 1
+                    return
+                k = _hash(claves[tabla[j] - 1]) & mascara
+                # Se queda si su casilla ideal está entre el hueco y j
+                if (i < k <= j) if i <= j else (k > i or k <= j):
+                    continue
+                break
+            tabla[i] = tabla[j]
+            i = j
+
+    def _reconstruir(self, tamano):
+        self._tabla = array('i', bytes(4 * tamano))
+        self._mascara = tamano - 1
+        self._usadas = 0
+        for fila, clave in enumerate(self._claves):
+            self._tabla[self._casilla(clave)] = fila + 1
+            self._usadas += 1
+
+
+class Producto:
+    """
+    Copia de un renglón del catálogo
+    """
+    __slots__ = ('codigo', 'nombre', 'precio', 'cantidad', 'categoria')
+
+    def __init__(self, codigo, nombre, precio, cantidad, categoria):
+        self.codigo = codigo
+        self.nombre = nombre
+        self.precio = precio
+        self.cantidad = cantidad
+        self.categoria = categoria
+
+    def __repr__(self):
+        return (f"Producto(codigo={self.codigo!r}, nombre={self.nombre!r}, precio={self.precio}, "
+                f"cantidad={self.cantidad}, categoria={self.categoria!r})")
+
+
+class Catalogo:
+    """
+    diario: objeto opcional con registrar(operacion, *valores) que recibe
+    cada cambio ('agregar', 'eliminar', 'precio', 'cantidad'); lo usa
+    snapshot_catalogo para el registro de cambios entre snapshots
+    """
+    __slots__ = ('_codigos', '_nombres', '_precios', '_cantidades', '_categorias',
+                 '_nombres_categoria', '_id_categoria', '_por_codigo', '_por_nombre',
+                 'diario')
+
+    # Las filas se guardan en el índice como enteros de 32 bits
+    MAXIMO = 2**31 - 2
+
+    def __init__(self):
+        self._codigos = []
+        self._nombres = []
+        self._precios = array('q')
+        self._cantidades = array('q')
+        self._categorias = array('H')
+        self._nombres_categoria = []
+        self._id_categoria = {}
+        self._por_codigo = _IndiceHash(self._codigos)
+        self._por_nombre = _IndiceHash(self._nombres)
+        self.diario = None
+
+    @classmethod
+    def desde_columnas(cls, codigos, nombres, precios, cantidades, categorias,
+                       nombres_categoria, tabla_codigos, tabla_nombres):
+        """
+        Arma un catálogo con columnas e índices ya construidos (al cargar un
+        snapshot), sin volver a insertar fila por fila
+        """
+        catalogo = cls.__new__(cls)
+        catalogo._codigos = codigos
+        catalogo._nombres = nombres
+        catalogo._precios = precios
+        catalogo._cantidades = cantidades
+        catalogo._categorias = categorias
+        catalogo._nombres_categoria = list(nombres_categoria)
+        catalogo._id_categoria = {nombre: i for i, nombre in enumerate(catalogo._nombres_categoria)}
+        catalogo._por_codigo = _IndiceHash(codigos, tabla_codigos)
+        catalogo._por_nombre = _IndiceHash(nombres, tabla_nombres)
+        catalogo.diario = None
+        return catalogo
+
+    def columnas(self):
+        """
+        Columnas e índices tal como están en memoria, para guardarlos
+        """
+        return (self._codigos, self._nombres, self._precios, self._cantidades, self._categorias,
+                self._nombres_categoria, self._por_codigo._tabla, self._por_nombre._tabla)
+
+    def __len__(self):
+        return len(self._codigos)
+
+    def __contains__(self, clave):
+        return self._por_codigo.buscar(clave) >= 0 or self._por_nombre.buscar(clave) >= 0
+
+    def __iter__(self):
+        for fila in range(len(self._codigos)):
+            yield self._producto(fila)
+
+    # ========== ALTAS, BAJAS Y CONSULTAS ==========
+
+    def _categoria(self, nombre):
+        """
+        Número de la categoría; cada nombre se guarda una sola vez
+        """
+        id_categoria = self._id_categoria.get(nombre)
+        if id_categoria is None:
+            id_categoria = len(self._nombres_categoria)
+            if id_categoria > 0xFFFF:
+                raise OverflowError("Demasiadas categorías distintas")
+            self._nombres_categoria.append(nombre)
+            self._id_categoria[nombre] = id_categoria
+        return id_categoria
+
+    def agregar(self, codigo, nombre, precio, cantidad=0, categoria=''):
+        """
+        Agrega un producto. Un código o nombre repetido es un error. precio
+        en pesos o Dinero
+        """
+        if self._por_codigo.buscar(codigo) >= 0:
+            raise KeyError(f"Código repetido: {codigo}")
+        if self._por_nombre.buscar(nombre) >= 0:
+            raise KeyError(f"Nombre repetido: {nombre}")
+        fila = len(self._codigos)
+        if fila > self.MAXIMO:
+            raise OverflowError("Catálogo lleno")
+        id_categoria = self._categoria(categoria)
+        precio = Dinero.de(precio)
+        self._precios.append(precio.centavos)
+        self._cantidades.append(cantidad)
+        self._categorias.append(id_categoria)
+        self._codigos.append(codigo)
+        self._nombres.append(nombre)
+        self._por_codigo.agregar(codigo, fila)
+        self._por_nombre.agregar(nombre, fila)
+        if self.diario is not None:
+            self.diario.registrar('agregar', codigo, nombre, precio, cantidad, categoria)
+        return fila
+
+    def fila(self, clave):
+        """
+        Fila del producto por código o por nombre (KeyError si no existe)
+        """
+        fila = self._por_codigo.buscar(clave)
+        if fila < 0:
+            fila = self._por_nombre.buscar(clave)
+            if fila < 0:
+                raise KeyError(clave)
+        return fila
+
+    def _producto(self, fila):
+        return Producto(self._codigos[fila], self._nombres[fila], Dinero(self._precios[fila]),
+                        self._cantidades[fila], self._nombres_categoria[self._categorias[fila]])
+
+    def obtener(self, clave, defecto=None):
+        """
+        Producto por código o por nombre
+        """
+        try:
+            return self._producto(self.fila(clave))
+        except KeyError:
+            return defecto
+
+    def cantidad(self, clave):
+        return self._cantidades[self.fila(clave)]
+
+    def precio(self, clave):
+        return Dinero(self._precios[self.fila(clave)])
+
+    def eliminar(self, clave):
+        """
+        Quita un producto moviendo el último a su lugar, así las columnas
+        siguen sin huecos y no hay que recorrerlas
+        """
+        fila = self.fila(clave)
+        if self.diario is not None:
+            self.diario.registrar('eliminar', self._codigos[fila])
+        ultima = len(self._codigos) - 1
+        self._por_codigo.quitar(self._codigos[fila])
+        self._por_nombre.quitar(self._nombres[fila])
+        if fila != ultima:
+            self._por_codigo.mover(self._codigos[ultima], fila)
+            self._por_nombre.mover(self._nombres[ultima], fila)
+            for columna in (self._codigos, self._nombres, self._precios,
+                            self._cantidades, self._categorias):
+                columna[fila] = columna[ultima]
+        for columna in (self._codigos, self._nombres, self._precios,
+                        self._cantidades, self._categorias):
+            columna.pop()
+
+    # ========== INVENTARIO ==========
+
+    def _cantidad_cambiada(self, fila):
+        if self.diario is not None:
+            self.diario.registrar('cantidad', self._codigos[fila], self._cantidades[fila])
+
+    def establecer_precio(self, clave, precio):
+        fila = self.fila(clave)
+        precio = Dinero.de(precio)
+        self._precios[fila] = precio.centavos
+        if self.diario is not None:
+            self.diario.registrar('precio', self._codigos[fila], precio)
+
+    def establecer_cantidad(self, clave, cantidad):
+        fila = self.fila(clave)
+        self._cantidades[fila] = cantidad
+        self._cantidad_cambiada(fila)
+
+    def agregar_unidades(self, clave, cantidad):
+        fila = self.fila(clave)
+        self._cantidades[fila] += cantidad
+        self._cantidad_cambiada(fila)
+        return self._cantidades[fila]
+
+    def vender(self, clave, cantidad):
+        """
+        Descuenta si alcanza; devuelve el importe (Dinero) o None si no hay
+        unidades
+        """
+        fila = self.fila(clave)
+        if not 0 < cantidad <= self._cantidades[fila]:
+            return None
+        self._cantidades[fila] -= cantidad
+        self._cantidad_cambiada(fila)
+        return Dinero(cantidad * self._precios[fila])
+
+    def ajustar_lote(self, claves, cantidades):
+        """
+        Suma cantidades (negativas para descontar) a varios productos
+        """
+        filas = [self.fila(clave) for clave in claves]
+        if np is not None and len(filas) > 64:
+            columna = np.frombuffer(self._cantidades, dtype=np.int64)
+            np.add.at(columna, filas, np.asarray(cantidades, dtype=np.int64))
+        else:
+            for fila, cantidad in zip(filas, cantidades):
+                self._cantidades[fila] += cantidad
+        if self.diario is not None:
+            for fila in dict.fromkeys(filas):
+                self._cantidad_cambiada(fila)
+
+    # ========== CONSULTAS SOBRE COLUMNAS ==========
+
+    def valor_total(self):
+        """
+        Suma de precio * cantidad de todo el catálogo (Dinero, exacta)
+        """
+        return valorar(self._precios, self._cantidades)
+
+    def unidades_totales(self):
+        if np is not None:
+            return int(np.frombuffer(self._cantidades, dtype=np.int64).sum())
+        return sum(self._cantidades)
+
+    def valor_por_categoria(self):
+        """
+        {categoría: valor del inventario}
+        """
+        valores = sumar_por_grupo(self._categorias, self._precios, len(self._nombres_categoria),
+                                  self._cantidades)
+        return {nombre: Dinero(valor) for nombre, valor in zip(self._nombres_categoria, valores)}
+
+    def bajo_limite(self, limite):
+        """
+        Productos con menos de limite unidades, de menor a mayor cantidad
+        """
+        if np is not None:
+            cantidades = np.frombuffer(self._cantidades, dtype=np.int64)
+            filas = np.flatnonzero(cantidades < limite)
+            filas = filas[np.argsort(cantidades[filas], kind='stable')].tolist()
+        else:
+            filas = sorted((fila for fila, cantidad in enumerate(self._cantidades) if cantidad < limite),
+                           key=self._cantidades.__getitem__)
+        return [self._producto(fila) for fila in filas]
+
+    def memoria(self):
+        """
+        Bytes aproximados de las columnas numéricas y los índices (sin
+        contar los textos, que se comparten con quien los creó)
+        """
+        return (sum(sys.getsizeof(columna)
+                    for columna in (self._precios, self._cantidades, self._categorias,
+                                    self._codigos, self._nombres,
+                                    self._por_codigo._tabla, self._por_nombre._tabla)))
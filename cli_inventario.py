@@ -0,0 +1,372 @@
+"""
+Modo de línea de comandos de GestionInventario
+Para trabajos programados y scripts: cada subcomando lee sus filas de la
+entrada estándar (JSON por líneas o CSV con encabezados) y escribe el
+resultado en la salida estándar en un formato que otro programa puede leer
+(JSON por líneas, JSON o CSV). Los avisos van a la salida de errores. Toda
+la invocación usa una sola conexión a la base.
+
+Subcomandos:
+    importar  [--actualizar] [--lote N] [--crear-categorias]  filas de productos
+    exportar  [--orden nombre|categoria|precio|cantidad]
+    buscar    codigo|nombre|categoria [VALOR ...]  sin VALOR, uno por línea
+    ajustar   [CODIGO CANTIDAD] [--operacion agregar|restar|establecer]
+    reporte   valor|bajo|categorias|conteos|conciliar [--limite N] [--corregir]
+
+Las filas de productos tienen codigo_barras, nombre_producto,
+nombre_categoria (o id_categoria), precio y cantidad: lo que escribe
+exportar se puede volver a importar; con --crear-categorias también en una
+base nueva, sin dar de alta las categorías antes. Las de ajustar tienen
+codigo_barras, cantidad y opcionalmente operacion.
+
+Código de salida: 0 si todo se procesó, 1 si no se pudo conectar, 2 si los
+argumentos no son válidos y 3 si alguna fila falló o no se encontró.
+
+Uso:
+    python cli_inventario.py --sqlite tienda.db importar --formato csv < productos.csv
+    python cli_inventario.py --sqlite nueva.db importar --crear-categorias < productos.jsonl
+    python cli_inventario.py --sqlite tienda.db exportar --orden categoria > productos.jsonl
+    python cli_inventario.py buscar codigo 7501000000017 7501000000024
+    python cli_inventario.py ajustar --operacion restar < mermas.jsonl
+    python cli_inventario.py reporte bajo --limite 5 --formato csv
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+
+from backends import BackendSQLite
+from base_datos import GestionInventario
+from dinero import Dinero
+
+# Columnas de los productos que se escriben (las mismas que lee importar)
+COLUMNAS = ['codigo_barras', 'nombre_producto', 'nombre_categoria', 'precio', 'cantidad']
+
+# Códigos por consulta al buscar muchos códigos de barras
+TAMANO_LOTE_CODIGOS = 500
+
+OPERACIONES = ('agregar', 'restar', 'establecer')
+
+SALIDA_CORRECTA = 0
+SIN_CONEXION = 1
+FILAS_FALLIDAS = 3
+
+
+def _a_json(valor):
+    if isinstance(valor, (Decimal, Dinero)):
+        return float(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f"{type(valor).__name__} no se puede convertir a JSON")
+
+
+def _aviso(mensaje):
+    print(mensaje, file=sys.stderr)
+
+
+# ========== ENTRADA ==========
+
+def _abrir_entrada(ruta):
+    if ruta in (None, '-'):
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+    return open(ruta, encoding='utf-8-sig', newline='')
+
+
+def leer_filas(archivo, formato, errores):
+    """
+    Generador de diccionarios, uno por fila de la entrada. Una línea JSON
+    inválida sale como {} y su motivo queda en errores[numero] para que la
+    numeración de filas no se corra
+    """
+    if formato == 'csv':
+        yield from csv.DictReader(archivo)
+        return
+    numero = 0
+    for linea in archivo:
+        if not linea.strip():
+            continue
+        numero += 1
+        try:
+            fila = json.loads(linea)
+        except ValueError as e:
+            fila = None
+            motivo = f"JSON inválido: {e}"
+        else:
+            motivo = None if isinstance(fila, dict) else "La línea no es un objeto JSON"
+        if motivo is not None:
+            errores[numero] = motivo
+            fila = {}
+        yield fila
+
+
+# ========== SALIDA ==========
+
+class Salida:
+    """
+    Escribe filas (diccionarios) como JSON por líneas o CSV. En CSV las
+    columnas son las dadas o las de la primera fila
+    """
+
+    def __init__(self, formato, columnas=None, archivo=None):
+        self.formato = formato
+        self.columnas = columnas
+        self.archivo = archivo or sys.stdout
+        self._csv = None
+        self.filas = 0
+
+    def escribir(self, fila):
+        if self.columnas is not None:
+            fila = {columna: fila.get(columna) for columna in self.columnas}
+        if self.formato == 'csv':
+            if self._csv is None:
+                self._csv = csv.DictWriter(self.archivo, fieldnames=list(self.columnas or fila),
+                                           extrasaction='ignore', lineterminator='\n')
+                self._csv.writeheader()
+            self._csv.writerow(fila)
+        else:
+            self.archivo.write(json.dumps(fila, default=_a_json, ensure_ascii=False) + '\n')
+        self.filas += 1
+
+    def escribir_todas(self, filas):
+        for fila in filas:
+            self.escribir(fila)
+        return self
+
+
+def escribir_objeto(objeto, archivo=None):
+    """
+    Un solo resultado (resúmenes y totales) como un objeto JSON
+    """
+    archivo = archivo or sys.stdout
+    archivo.write(json.dumps(objeto, default=_a_json, ensure_ascii=False) + '\n')
+
+
+# ========== SUBCOMANDOS ==========
+
+def _crear_categorias(gestor, filas):
+    """
+    Deja pasar las filas creando antes las categorías que nombran y no
+    existen todavía
+    """
+    for fila in filas:
+        nombre = fila.get('nombre_categoria')
+        if nombre and not fila.get('id_categoria') and gestor.obtener_categoria_id(nombre) is None:
+            if gestor.crear_categoria(nombre) is not None:
+                _aviso(f"📁 Categoría creada: {nombre}")
+        yield fila
+
+
+def comando_importar(gestor, args):
+    errores = {}
+    with _abrir_entrada(args.entrada) as archivo:
+        filas = leer_filas(archivo, args.formato, errores)
+        if args.crear_categorias:
+            filas = _crear_categorias(gestor, filas)
+        resumen = gestor.importar_productos(filas, args.lote, args.actualizar)
+    fallidos = [{'fila': numero, 'codigo_barras': codigo, 'motivo': errores.get(numero, motivo)}
+                for numero, codigo, motivo in resumen['fallidos']]
+    escribir_objeto({'procesados': resumen['procesados'], 'lotes': resumen['lotes'],
+                     'fallidos': fallidos})
+    return FILAS_FALLIDAS if fallidos else SALIDA_CORRECTA
+
+
+def comando_exportar(gestor, args):
+    salida = Salida(args.formato, COLUMNAS)
+    for pagina in gestor.iterar_paginas(args.orden, args.pagina):
+        salida.escribir_todas(pagina)
+    _aviso(f"📦 {salida.filas} productos exportados")
+    return SALIDA_CORRECTA
+
+
+def _valores_busqueda(args):
+    if args.valores:
+        return args.valores
+    with _abrir_entrada(args.entrada) as archivo:
+        return [linea.strip() for linea in archivo if linea.strip()]
+
+
+def comando_buscar(gestor, args):
+    valores = _valores_busqueda(args)
+    salida = Salida(args.formato, COLUMNAS)
+    faltantes = 0
+    if args.criterio == 'codigo':
+        # Muchos códigos se leen por lotes con una consulta por lote
+        for inicio in range(0, len(valores), TAMANO_LOTE_CODIGOS):
+            codigos = valores[inicio:inicio + TAMANO_LOTE_CODIGOS]
+            productos = gestor.obtener_productos(codigos)
+            for codigo in codigos:
+                if codigo in productos:
+                    salida.escribir(productos[codigo])
+                else:
+                    faltantes += 1
+                    _aviso(f"⚠️ No encontrado: {codigo}")
+    else:
+        for valor in valores:
+            productos = gestor.buscar_producto(args.criterio, valor)
+            if not productos:
+                faltantes += 1
+                _aviso(f"⚠️ Sin resultados para {valor!r}")
+            salida.escribir_todas(productos)
+    return FILAS_FALLIDAS if faltantes else SALIDA_CORRECTA
+
+
+def _ajustes(args, errores):
+    if args.codigo is not None:
+        yield {'codigo_barras': args.codigo, 'cantidad': args.cantidad}
+        return
+    with _abrir_entrada(args.entrada) as archivo:
+        yield from leer_filas(archivo, args.formato, errores)
+
+
+def comando_ajustar(gestor, args):
+    errores = {}
+    salida = Salida(args.formato, ['fila', 'codigo_barras', 'operacion', 'cantidad', 'ok', 'motivo'])
+    fallidas = 0
+    for numero, fila in enumerate(_ajustes(args, errores), start=1):
+        operacion = fila.get('operacion') or args.operacion
+        resultado = {'fila': numero, 'codigo_barras': fila.get('codigo_barras'),
+                     'operacion': operacion, 'cantidad': fila.get('cantidad'),
+                     'ok': False, 'motivo': errores.get(numero)}
+        if resultado['motivo'] is None:
+            try:
+                cantidad = int(fila['cantidad'])
+                codigo = str(fila['codigo_barras']).strip()
+            except (KeyError, ValueError, TypeError) as e:
+                resultado['motivo'] = f"Fila inválida: {e!r}"
+            else:
+                resultado.update(codigo_barras=codigo, cantidad=cantidad)
+                if operacion not in OPERACIONES:
+                    resultado['motivo'] = f"Operación no válida: {operacion!r}"
+                elif gestor.actualizar_inventario(codigo, cantidad, operacion):
+                    resultado['ok'] = True
+                else:
+                    resultado['motivo'] = ("Producto inexistente o sin unidades suficientes"
+                                           if operacion == 'restar' else "Producto inexistente")
+        if not resultado['ok']:
+            fallidas += 1
+        salida.escribir(resultado)
+    return FILAS_FALLIDAS if fallidas else SALIDA_CORRECTA
+
+
+def comando_reporte(gestor, args):
+    if args.reporte == 'valor':
+        escribir_objeto({'valor': gestor.valor_total_inventario()})
+    elif args.reporte == 'conteos':
+        escribir_objeto(gestor.contar_registros())
+    elif args.reporte == 'bajo':
+        Salida(args.formato, COLUMNAS).escribir_todas(gestor.reporte_inventario_bajo(args.limite))
+    elif args.reporte == 'categorias':
+        Salida(args.formato).escribir_todas(gestor.valor_por_categoria())
+    elif args.reporte == 'conciliar':
+        diferencias = gestor.conciliar_valor_inventario(corregir=args.corregir)
+        if diferencias is None:
+            _aviso("❌ No se pudo conciliar el valor del inventario")
+            return FILAS_FALLIDAS
+        Salida(args.formato).escribir_todas(diferencias)
+        if diferencias and not args.corregir:
+            return FILAS_FALLIDAS
+    return SALIDA_CORRECTA
+
+
+COMANDOS = {
+    'importar': comando_importar,
+    'exportar': comando_exportar,
+    'buscar': comando_buscar,
+    'ajustar': comando_ajustar,
+    'reporte': comando_reporte,
+}
+
+
+# ========== ARGUMENTOS ==========
+
+def crear_parser():
+    parser = argparse.ArgumentParser(
+        description="Inventario desde la línea de comandos (JSON por líneas o CSV)")
+    parser.add_argument('--host', default='localhost', help="servidor de base de datos")
+    parser.add_argument('--database', default='gestion_inventario')
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--sqlite', metavar='RUTA',
+                        help="usa una base SQLite embebida en lugar de MySQL")
+
+    # Opciones comunes de los subcomandos
+    comun = argparse.ArgumentParser(add_help=False)
+    comun.add_argument('--formato', choices=('jsonl', 'csv'), default='jsonl',
+                       help="formato de la entrada y de las filas de salida")
+    comun.add_argument('--entrada', metavar='RUTA', default='-',
+                       help="archivo a leer en lugar de la entrada estándar")
+
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    importar = subcomandos.add_parser('importar', parents=[comun],
+                                      help="importa productos de la entrada")
+    importar.add_argument('--actualizar', action='store_true',
+                          help="un código de barras existente actualiza el producto")
+    importar.add_argument('--lote', type=int, default=1000, help="filas por lote")
+    importar.add_argument('--crear-categorias', action='store_true',
+                          help="crea las categorías por nombre que no existan")
+
+    exportar = subcomandos.add_parser('exportar', parents=[comun],
+                                      help="escribe todos los productos")
+    exportar.add_argument('--orden', choices=list(GestionInventario._ORDEN_PAGINADO),
+                          default='nombre')
+    exportar.add_argument('--pagina', type=int, default=1000, help="productos por consulta")
+
+    buscar = subcomandos.add_parser('buscar', parents=[comun], help="busca productos")
+    buscar.add_argument('criterio', choices=('codigo', 'nombre', 'categoria'))
+    buscar.add_argument('valores', nargs='*', metavar='VALOR',
+                        help="sin valores se lee uno por línea de la entrada")
+
+    ajustar = subcomandos.add_parser('ajustar', parents=[comun],
+                                     help="ajusta existencias (una fila por ajuste)")
+    ajustar.add_argument('codigo', nargs='?', metavar='CODIGO')
+    ajustar.add_argument('cantidad', nargs='?', type=int, metavar='CANTIDAD')
+    ajustar.add_argument('--operacion', choices=OPERACIONES, default='agregar',
+                         help="operación de las filas que no traen la suya")
+
+    reporte = subcomandos.add_parser('reporte', parents=[comun], help="reportes")
+    reporte.add_argument('reporte', choices=('valor', 'bajo', 'categorias', 'conteos', 'conciliar'))
+    reporte.add_argument('--limite', type=int, default=10, help="umbral de inventario bajo")
+    reporte.add_argument('--corregir', action='store_true',
+                         help="conciliar: reemplaza los totales por los recalculados")
+    return parser
+
+
+def main(argumentos=None):
+    parser = crear_parser()
+    args = parser.parse_args(argumentos)
+    if args.comando == 'ajustar' and (args.codigo is None) != (args.cantidad is None):
+        parser.error("ajustar lleva CODIGO y CANTIDAD juntos, o ninguno para leer la entrada")
+
+    gestor = GestionInventario(host=args.host, database=args.database, user=args.user,
+                               password=args.password,
+                               backend=BackendSQLite(args.sqlite) if args.sqlite else None,
+                               mostrar_mensajes=False)
+    try:
+        conectado = gestor.conectar()
+    except ImportError as e:
+        _aviso(f"❌ {e}")
+        conectado = False
+    if not conectado:
+        _aviso(f"❌ No se pudo conectar a {gestor.backend.descripcion()}")
+        return SIN_CONEXION
+
+    try:
+        if args.sqlite:
+            from esquema import migrar
+            # La salida estándar queda solo para los resultados
+            with contextlib.redirect_stdout(sys.stderr):
+                migrar(gestor)
+        with gestor.sesion():
+            return COMANDOS[args.comando](gestor, args)
+    finally:
+        gestor.desconectar()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Terminal ligera para el servidor POS
+No abre conexiones a la base: todo pasa por servidor_pos.py con una
+conexión HTTP persistente.
+
+Uso:
+    python cliente_pos.py --url http://localhost:8080 --caja caja1
+"""
+
+import argparse
+import http.client
+import json
+from urllib.parse import quote, urlsplit
+
+
+class ErrorServidor(RuntimeError):
+    def __init__(self, estado, mensaje):
+        super().__init__(f"{estado}: {mensaje}")
+        self.estado = estado
+
+
+class ClientePOS:
+    def __init__(self, url='http://localhost:8080', espera=10):
+        partes = urlsplit(url)
+        self._host = partes.hostname
+        self._puerto = partes.port or 80
+        self._espera = espera
+        self._conexion = None
+
+    def _pedir(self, metodo, ruta, datos=None):
+        """
+        Hace la petición y devuelve (estado, respuesta). Si el servidor cerró
+        la conexión persistente, un GET se repite una vez con otra conexión.
+        Un POST no: si el servidor ya lo aplicó y solo se perdió la
+        respuesta, repetirlo registraría dos veces la venta o el ajuste
+        """
+        cuerpo = json.dumps(datos).encode() if datos is not None else None
+        encabezados = {'Content-Type': 'application/json'} if cuerpo else {}
+        intentos = 2 if metodo == 'GET' else 1
+        for intento in range(intentos):
+            if self._conexion is None:
+                self._conexion = http.client.HTTPConnection(self._host, self._puerto,
+                                                            timeout=self._espera)
+            try:
+                self._conexion.request(metodo, ruta, body=cuerpo, headers=encabezados)
+                respuesta = self._conexion.getresponse()
+                return respuesta.status, json.loads(respuesta.read() or b'null')
+            except (http.client.HTTPException, ConnectionError):
+                self.cerrar()
+                if intento + 1 == intentos:
+                    raise
+
+    def _pedir_ok(self, metodo, ruta, datos=None):
+        estado, respuesta = self._pedir(metodo, ruta, datos)
+        if estado >= 400:
+            raise ErrorServidor(estado, respuesta.get('error') if respuesta else '')
+        return respuesta
+
+    def cerrar(self):
+        if self._conexion is not None:
+            self._conexion.close()
+            self._conexion = None
+
+    def escanear(self, codigo_barras):
+        """
+        Producto por código de barras, o None si no existe
+        """
+        estado, respuesta = self._pedir('GET', f"/productos/{quote(codigo_barras, safe='')}")
+        if estado == 404:
+            return None
+        if estado >= 400:
+            raise ErrorServidor(estado, respuesta.get('error'))
+        return respuesta
+
+    def buscar(self, texto, limite=10):
+        return self._pedir_ok('GET', f"/buscar?texto={quote(texto)}&limite={limite}")['resultados']
+
+    def vender(self, lineas, caja=None):
+        """
+        Registra la venta; devuelve el id o None si fue rechazada por stock
+        """
+        estado, respuesta = self._pedir('POST', '/ventas',
+                                        {'lineas': [list(linea) for linea in lineas], 'caja': caja})
+        if estado == 409:
+            return None
+        if estado >= 400:
+            raise ErrorServidor(estado, respuesta.get('error'))
+        return respuesta['id_venta']
+
+    def ajustar_inventario(self, codigo_barras, cantidad, operacion='agregar'):
+        estado, _ = self._pedir('POST', '/inventario', {'codigo_barras': codigo_barras,
+                                                        'cantidad': cantidad,
+                                                        'operacion': operacion})
+        return estado == 200
+
+    def categoria(self, nombre, descripcion=''):
+        """
+        Id de la categoría; la crea si no existe
+        """
+        return self._pedir_ok('POST', '/categorias',
+                              {'nombre': nombre, 'descripcion': descripcion})['id_categoria']
+
+    def importar(self, filas, actualizar_existentes=False):
+        return self._pedir_ok('POST', '/productos/importar',
+                              {'filas': filas, 'actualizar_existentes': actualizar_existentes})
+
+    def estado(self):
+        return self._pedir_ok('GET', '/estado')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Terminal del servidor POS")
+    parser.add_argument('--url', default='http://localhost:8080')
+    parser.add_argument('--caja', default='terminal')
+    args = parser.parse_args()
+
+    cliente = ClientePOS(args.url)
+    print("Escanea códigos de barras; 'total' cierra la venta, 'salir' termina")
+    carrito = {}
+    try:
+        while True:
+            entrada = input("🛒 Código: ").strip()
+            if entrada == 'salir':
+                break
+            if entrada == 'total':
+                if not carrito:
+                    continue
+                id_venta = cliente.vender(carrito.items(), args.caja)
+                if id_venta is None:
+                    print("❌ Venta rechazada: no hay unidades suficientes")
+                else:
+                    print(f"✅ Venta {id_venta} registrada")
+                carrito = {}
+                continue
+            producto = cliente.escanear(entrada)
+            if producto is None:
+                print("❌ Producto no encontrado")
+                continue
+            carrito[entrada] = carrito.get(entrada, 0) + 1
+            print(f"  {producto['nombre_producto']}  ${producto['precio']:.2f}  x{carrito[entrada]}")
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        cliente.cerrar()
+
+
+if __name__ == "__main__":
+    main()
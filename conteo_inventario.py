@@ -0,0 +1,291 @@
+"""
+Conteo físico de inventario
+Toma de inventario sobre un Catalogo (catalogo.py): los conteos llegan por
+código (o nombre) de uno en uno, en lote o desde el archivo/flujo de un
+lector de códigos, y se acumula el total de cada producto al momento. Al
+final, la diferencia contra el inventario esperado y su valor (en
+centavos exactos, ver dinero.py) se calculan para todo el catálogo de una pasada sobre las columnas (con NumPy si está
+instalado).
+
+Formato del lector: una lectura por línea, "codigo" (una unidad) o
+"codigo,cantidad" (también con tabulador, punto y coma o espacio).
+Líneas vacías y las que empiezan con # se ignoran.
+
+Uso:
+    conteo = ConteoInventario(catalogo)
+    conteo.registrar('7501', 3)
+    with open('lector.txt') as archivo:
+        conteo.leer(archivo)
+    reporte = conteo.reporte()
+    mostrar_reporte(reporte)
+    conteo.aplicar(reporte)          # el inventario queda como lo contado
+"""
+
+import heapq
+import operator
+import re
+from array import array
+from collections import Counter, namedtuple
+
+from dinero import Dinero
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+Diferencia = namedtuple('Diferencia', 'codigo nombre esperado contado diferencia valor')
+
+ReporteConteo = namedtuple('ReporteConteo', [
+    'diferencias',      # [Diferencia] de mayor a menor valor absoluto
+    'productos',        # productos comparados
+    'contados',         # productos con al menos una lectura
+    'unidades_esperadas',
+    'unidades_contadas',
+    'valor_esperado',
+    'valor_contado',
+    'faltante',         # valor de lo que falta (positivo)
+    'sobrante',         # valor de lo que sobra
+    'desconocidos',     # {clave: cantidad} de códigos que no están en el catálogo
+])
+
+_SEPARADOR = re.compile(r'[,;\t ]+')
+
+
+class ConteoInventario:
+    def __init__(self, catalogo):
+        self.catalogo = catalogo
+        self._totales = {}
+        # Última fila conocida de cada código; se revisa al conciliar porque
+        # eliminar un producto mueve otro a su fila
+        self._filas = {}
+        self.desconocidos = Counter()
+        self.lecturas = 0
+
+    def _codigo(self, clave):
+        """
+        Código del producto por código o nombre. Un código leído como texto
+        también se busca como número (ejemplo.py guarda códigos enteros)
+        """
+        try:
+            fila = self.catalogo.fila(clave)
+        except KeyError:
+            if not (isinstance(clave, str) and clave.isdigit()):
+                raise
+            fila = self.catalogo.fila(int(clave))
+        codigo = self.catalogo.columnas()[0][fila]
+        self._filas[codigo] = fila
+        return codigo
+
+    # ========== CAPTURA ==========
+
+    def registrar(self, clave, cantidad=1):
+        """
+        Suma una lectura y devuelve el total contado del producto, o None
+        si la clave no está en el catálogo
+        """
+        self.lecturas += 1
+        try:
+            codigo = self._codigo(clave)
+        except KeyError:
+            self.desconocidos[clave] += cantidad
+            return None
+        total = self._totales.get(codigo, 0) + cantidad
+        self._totales[codigo] = total
+        return total
+
+    def registrar_lote(self, lecturas):
+        """
+        Suma muchas lecturas (clave, cantidad); cada producto distinto se
+        busca una sola vez
+        """
+        acumulado = Counter()
+        for clave, cantidad in lecturas:
+            acumulado[clave] += cantidad
+            self.lecturas += 1
+        for clave, cantidad in acumulado.items():
+            try:
+                codigo = self._codigo(clave)
+            except KeyError:
+                self.desconocidos[clave] += cantidad
+                continue
+            self._totales[codigo] = self._totales.get(codigo, 0) + cantidad
+
+    def leer(self, lineas):
+        """
+        Registra las lecturas de un archivo o flujo del lector. Devuelve
+        cuántas líneas válidas había
+        """
+        lecturas = []
+        for numero, linea in enumerate(lineas, 1):
+            linea = linea.strip()
+            if not linea or linea.startswith('#'):
+                continue
+            partes = _SEPARADOR.split(linea)
+            try:
+                cantidad = int(partes[1]) if len(partes) > 1 else 1
+            except ValueError:
+                raise ValueError(f"Línea {numero}: cantidad inválida: {linea!r}") from None
+            lecturas.append((partes[0], cantidad))
+        self.registrar_lote(lecturas)
+        return len(lecturas)
+
+    def contado(self, clave):
+        return self._totales.get(self._codigo(clave), 0)
+
+    def reiniciar(self):
+        self._totales.clear()
+        self._filas.clear()
+        self.desconocidos.clear()
+        self.lecturas = 0
+
+    # ========== CONCILIACIÓN ==========
+
+    def _columna_contada(self, filas):
+        """
+        Conteos alineados con las filas del catálogo y la marca de contado
+        """
+        codigos = self.catalogo.columnas()[0]
+        contado = array('q', bytes(8 * filas))
+        marcas = bytearray(filas)
+        for codigo, total in self._totales.items():
+            fila = self._filas[codigo]
+            if fila >= filas or codigos[fila] != codigo:
+                try:
+                    fila = self._filas[codigo] = self.catalogo.fila(codigo)
+                except KeyError:
+                    # Se eliminó del catálogo durante el conteo
+                    continue
+            contado[fila] = total
+            marcas[fila] = 1
+        return contado, marcas
+
+    def reporte(self, solo_contados=False, limite=None):
+        """
+        Diferencias contra el inventario esperado. Con solo_contados=True
+        (conteo parcial) los productos sin lecturas no se comparan; si no,
+        cuentan como cero. limite acota el detalle a las mayores diferencias
+        """
+        codigos, nombres, precios, cantidades = self.catalogo.columnas()[:4]
+        contado, marcas = self._columna_contada(len(cantidades))
+
+        if np is not None:
+            esperado = np.frombuffer(cantidades, dtype=np.int64)
+            contados = np.frombuffer(contado, dtype=np.int64)
+            precio = np.frombuffer(precios, dtype=np.int64)
+            incluir = np.frombuffer(marcas, dtype=np.uint8).astype(bool)
+            if not solo_contados:
+                incluir[:] = True
+            diferencia = np.where(incluir, contados - esperado, 0)
+            valor = diferencia * precio
+            filas = np.flatnonzero(diferencia)
+            if limite is not None and len(filas) > limite:
+                filas = filas[np.argpartition(-np.abs(valor[filas]), limite - 1)[:limite]]
+            filas = filas[np.argsort(-np.abs(valor[filas]), kind='stable')].tolist()
+            totales = (int(incluir.sum()),
+                       int(esperado[incluir].sum()), int(contados[incluir].sum()),
+                       int(np.dot(esperado[incluir], precio[incluir])),
+                       int(np.dot(contados[incluir], precio[incluir])),
+                       int(-valor[valor < 0].sum()), int(valor[valor > 0].sum()))
+            diferencia, valor = diferencia.tolist(), valor.tolist()
+        else:
+            incluir = marcas if solo_contados else bytes([1]) * len(marcas)
+            diferencia = [c - e if i else 0 for c, e, i in zip(contado, cantidades, incluir)]
+            valor = list(map(operator.mul, diferencia, precios))
+            filas = [fila for fila, d in enumerate(diferencia) if d]
+            clave = lambda fila: -abs(valor[fila])
+            filas = (heapq.nsmallest(limite, filas, key=clave) if limite is not None
+                     else sorted(filas, key=clave))
+            productos = esperadas = contadas = 0
+            valor_esperado = valor_contado = 0
+            for e, c, p, i in zip(cantidades, contado, precios, incluir):
+                if i:
+                    productos += 1
+                    esperadas += e
+                    contadas += c
+                    valor_esperado += e * p
+                    valor_contado += c * p
+            totales = (productos, esperadas, contadas, valor_esperado, valor_contado,
+                       -sum(v for v in valor if v < 0), sum(v for v in valor if v > 0))
+
+        diferencias = [Diferencia(codigos[fila], nombres[fila], cantidades[fila], contado[fila],
+                                  diferencia[fila], Dinero(valor[fila]))
+                       for fila in filas]
+        productos, esperadas, contadas, valor_esperado, valor_contado, faltante, sobrante = totales
+        return ReporteConteo(diferencias, productos, len(self._totales), esperadas, contadas,
+                             Dinero(valor_esperado), Dinero(valor_contado), Dinero(faltante),
+                             Dinero(sobrante), dict(self.desconocidos))
+
+    def aplicar(self, reporte):
+        """
+        Ajusta el inventario del catálogo a lo contado según el reporte
+        (debe ser un reporte sin límite para ajustar todas las diferencias)
+        """
+        if reporte.diferencias:
+            self.catalogo.ajustar_lote([d.codigo for d in reporte.diferencias],
+                                       [d.diferencia for d in reporte.diferencias])
+        return len(reporte.diferencias)
+
+
+def mostrar_reporte(reporte, limite=20):
+    print("\n" + "="*80)
+    print("📋 CONCILIACIÓN DE CONTEO FÍSICO")
+    print("="*80)
+    print(f"Productos comparados: {reporte.productos} ({reporte.contados} con lecturas)")
+    print(f"Unidades: esperadas {reporte.unidades_esperadas}, contadas {reporte.unidades_contadas}")
+    print(f"Valor: esperado ${reporte.valor_esperado:,.2f}, contado ${reporte.valor_contado:,.2f}")
+    print(f"Faltante: ${reporte.faltante:,.2f}   Sobrante: ${reporte.sobrante:,.2f}")
+
+    if reporte.diferencias:
+        print(f"\n{'Código':<15} {'Nombre':<25} {'Esperado':>9} {'Contado':>9} {'Dif.':>7} {'Valor':>12}")
+        print("-"*80)
+        for d in reporte.diferencias[:limite]:
+            print(f"{str(d.codigo)[:15]:<15} {str(d.nombre)[:23]:<25} {d.esperado:>9} "
+                  f"{d.contado:>9} {d.diferencia:>+7} {d.valor:>+12,.2f}")
+        if len(reporte.diferencias) > limite:
+            print(f"... y {len(reporte.diferencias) - limite} diferencias más")
+    else:
+        print("\n✅ El conteo coincide con el inventario")
+
+    if reporte.desconocidos:
+        print(f"\n⚠️  Códigos que no están en el catálogo: "
+              f"{', '.join(map(str, list(reporte.desconocidos)[:10]))}")
+
+
+def conteo_interactivo(catalogo):
+    """
+    Toma de inventario desde la terminal (pos_python.py y ejemplo.py):
+    lecturas de un archivo del lector o capturadas a mano, reporte y ajuste
+    """
+    conteo = ConteoInventario(catalogo)
+    ruta = input('Archivo del lector (Enter para capturar a mano): ').strip()
+    if ruta:
+        try:
+            with open(ruta, encoding='utf-8') as archivo:
+                print(f"📥 Lecturas cargadas: {conteo.leer(archivo)}")
+        except (OSError, ValueError) as e:
+            print(f"❌ No se pudo leer {ruta}: {e}")
+            return None
+    else:
+        print('Producto (código o nombre) y cantidad encontrada; Enter vacío para terminar')
+        while True:
+            clave = input('Producto: ').strip()
+            if not clave:
+                break
+            try:
+                cantidad = int(input('Cantidad encontrada: ') or 1)
+            except ValueError:
+                print('❌ Cantidad inválida')
+                continue
+            total = conteo.registrar(clave, cantidad)
+            if total is None:
+                print(f'❌ El producto {clave} no se encuentra en el inventario')
+            else:
+                print(f'Total encontrado de {clave}: {total}')
+
+    parcial = input('¿Comparar solo los productos contados? (s/n): ').lower() == 's'
+    reporte = conteo.reporte(solo_contados=parcial)
+    mostrar_reporte(reporte)
+    if reporte.diferencias and input('¿Ajustar el inventario a lo contado? (s/n): ').lower() == 's':
+        print(f"✅ Productos ajustados: {conteo.aplicar(reporte)}")
+    return reporte
@@ -0,0 +1,356 @@
+"""
+Diario local de movimientos de caja
+Cada venta o ajuste de inventario se anota primero en un archivo local de
+solo-agregar (una línea JSON por movimiento) y la caja sigue trabajando sin
+esperar a la red. Un hilo en segundo plano los aplica en lotes a la base
+central; cada registro lleva un id único que la base central guarda en
+diario_aplicado, así que repetir un lote (por un corte a la mitad) no
+duplica nada.
+
+En el menú de base_datos.py se activa con --diario RUTA: las ventas y
+ajustes de la opción 6 se anotan aquí en vez de ir directo a la base.
+
+Uso:
+    diario = DiarioVentas('caja1.diario', gestor_central)
+    diario.iniciar()
+    diario.registrar_venta([('750100', 2, 23.5)], caja='caja1')
+    ...
+    diario.detener()
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from backends import Error, ErrorPool
+from dinero import Dinero
+
+
+class DiarioVentas:
+    def __init__(self, ruta, gestor, tamano_lote=500, intervalo=1.0,
+                 espera_maxima=60, esperar_disco=True, tamano_rotacion=64 * 1024 * 1024):
+        """
+        ruta: archivo del diario; la posición ya aplicada se guarda en ruta + '.pos'
+        gestor: GestionInventario de la base central
+        tamano_lote: registros que se aplican por transacción
+        intervalo: segundos entre revisiones cuando no hay pendientes
+        espera_maxima: tope de la espera entre reintentos sin conexión
+        esperar_disco: si es True cada anotación espera a estar en disco
+        (fsync). Los fsync se agrupan: uno solo cubre todo lo anotado
+        mientras se hacía el anterior
+        tamano_rotacion: bytes a partir de los cuales el diario se vacía una
+        vez aplicado por completo
+        """
+        self.ruta = ruta
+        self.gestor = gestor
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo
+        self.espera_maxima = espera_maxima
+        self.esperar_disco = esperar_disco
+        self.tamano_rotacion = tamano_rotacion
+        self._ruta_posicion = ruta + '.pos'
+        self._condicion = threading.Condition()
+        self._escritos = 0
+        self._en_disco = 0
+        self._detener = threading.Event()
+        self._hilos = []
+        self.aplicados = 0
+        self.ultimo_error = None
+
+        self._reparar_final()
+        self._archivo = open(ruta, 'ab')
+
+    # ========== ANOTACIÓN EN LA CAJA ==========
+
+    def registrar_venta(self, lineas, caja=None):
+        """
+        Anota una venta. lineas: (codigo_barras, cantidad) o
+        (codigo_barras, cantidad, precio_unitario); sin precio se usa el de
+        la base central al aplicarla. Devuelve el id del registro
+        """
+        filas = []
+        for codigo_barras, cantidad, *precio in lineas:
+            # El precio va como texto exacto ("23.50"), no como float
+            precio = str(Dinero.de(precio[0])) if precio and precio[0] is not None else None
+            filas.append([codigo_barras, cantidad, precio])
+        return self._anotar('venta', {'caja': caja, 'lineas': filas})
+
+    def actualizar_inventario(self, codigo_barras, cantidad, operacion='agregar'):
+        """
+        Anota un ajuste de inventario ('agregar', 'restar' o 'establecer')
+        """
+        if operacion not in ('agregar', 'restar', 'establecer'):
+            raise ValueError(f"Operación no válida: {operacion}")
+        return self._anotar('inventario', {
+            'codigo_barras': codigo_barras,
+            'cantidad': cantidad,
+            'operacion': operacion,
+        })
+
+    def _anotar(self, tipo, datos):
+        registro = {'id': uuid.uuid4().hex, 'tipo': tipo, 'fecha': time.time(), 'datos': datos}
+        linea = (json.dumps(registro, separators=(',', ':'), default=str) + '\n').encode()
+
+        with self._condicion:
+            self._archivo.write(linea)
+            self._archivo.flush()
+            self._escritos += 1
+            numero = self._escritos
+            self._condicion.notify_all()
+
+            if self.esperar_disco:
+                if not self._hilos:
+                    self._sincronizar_disco(numero)
+                while self._en_disco < numero:
+                    self._condicion.wait()
+        return registro['id']
+
+    def _sincronizar_disco(self, numero):
+        os.fsync(self._archivo.fileno())
+        self._en_disco = max(self._en_disco, numero)
+
+    def _ciclo_disco(self):
+        """
+        Hilo de fsync agrupado: mientras hace un fsync se acumulan nuevas
+        anotaciones que quedan cubiertas por el siguiente
+        """
+        while True:
+            with self._condicion:
+                while self._en_disco == self._escritos and not self._detener.is_set():
+                    self._condicion.wait()
+                if self._en_disco == self._escritos:
+                    return
+                objetivo = self._escritos
+                descriptor = self._archivo.fileno()
+
+            os.fsync(descriptor)
+
+            with self._condicion:
+                self._en_disco = max(self._en_disco, objetivo)
+                self._condicion.notify_all()
+
+    # ========== SINCRONIZACIÓN CON LA BASE CENTRAL ==========
+
+    def iniciar(self):
+        """
+        Arranca los hilos de fsync y de sincronización
+        """
+        self._detener.clear()
+        self._hilos = [threading.Thread(target=self._ciclo_disco, daemon=True),
+                       threading.Thread(target=self._ciclo_sincronizacion, daemon=True)]
+        for hilo in self._hilos:
+            hilo.start()
+
+    def detener(self, aplicar_pendientes=True):
+        """
+        Detiene los hilos; opcionalmente intenta aplicar lo pendiente antes
+        """
+        self._detener.set()
+        with self._condicion:
+            self._condicion.notify_all()
+        for hilo in self._hilos:
+            hilo.join()
+        self._hilos = []
+        if aplicar_pendientes:
+            try:
+                while self.sincronizar_pendientes():
+                    pass
+            except (*Error, ErrorPool, ConnectionError) as e:
+                self.ultimo_error = str(e)
+        with self._condicion:
+            self._archivo.flush()
+            os.fsync(self._archivo.fileno())
+            self._archivo.close()
+
+    def pendientes(self):
+        """
+        Bytes del diario que faltan por aplicar en la base central
+        """
+        with self._condicion:
+            self._archivo.flush()
+            tamano = os.path.getsize(self.ruta)
+            posicion = self._leer_posicion()
+            return tamano - posicion if posicion <= tamano else tamano
+
+    def _ciclo_sincronizacion(self):
+        espera = self.intervalo
+        while not self._detener.is_set():
+            try:
+                if not self.gestor.esta_conectado():
+                    self.gestor.reconectar()
+                if self.sincronizar_pendientes():
+                    espera = self.intervalo
+                    continue
+                espera = self.intervalo
+            except (*Error, ErrorPool, ConnectionError) as e:
+                # Sin red: se reintenta con espera creciente; la caja sigue anotando
+                self.ultimo_error = str(e)
+                espera = min(espera * 2, self.espera_maxima)
+            except Exception as e:
+                # Cualquier otro error (un registro dañado, un dato inesperado)
+                # no puede matar el hilo: el diario dejaría de vaciarse
+                self.ultimo_error = f"{type(e).__name__}: {e}"
+                espera = min(espera * 2, self.espera_maxima)
+            self._detener.wait(espera)
+
+    def sincronizar_pendientes(self):
+        """
+        Aplica a la base central el siguiente lote de registros pendientes en
+        una sola transacción. Devuelve cuántos registros se procesaron
+        """
+        posicion = self._leer_posicion()
+        registros, nueva_posicion = self._leer_lote(posicion)
+        if not registros:
+            self._rotar(nueva_posicion)
+            return 0
+        if not self.gestor.esta_conectado():
+            raise ConnectionError("sin conexión con la base central")
+
+        ids = [registro['id'] for registro in registros]
+        codigos = set()
+        with self.gestor.sesion() as cursor:
+            try:
+                marcadores = ", ".join(["%s"] * len(ids))
+                cursor.execute(f"SELECT id_registro FROM diario_aplicado "
+                               f"WHERE id_registro IN ({marcadores})", ids)
+                ya_aplicados = {fila['id_registro'] for fila in cursor.fetchall()}
+
+                for registro in registros:
+                    if registro['id'] in ya_aplicados:
+                        continue
+                    if registro['tipo'] == 'venta':
+                        codigos.update(self._aplicar_venta(cursor, registro))
+                    elif registro['tipo'] == 'inventario':
+                        codigos.add(self._aplicar_inventario(cursor, registro['datos']))
+                    cursor.execute("INSERT INTO diario_aplicado (id_registro) VALUES (%s)",
+                                   (registro['id'],))
+                self.gestor.connection.commit()
+            except Error:
+                self.gestor.connection.rollback()
+                raise
+
+        for codigo in codigos:
+            self.gestor.cache_productos.invalidar(codigo)
+        self._guardar_posicion(nueva_posicion)
+        self.gestor.notificar_cambios(codigos)
+        self.aplicados += len(registros)
+        return len(registros)
+
+    def _aplicar_venta(self, cursor, registro):
+        """
+        La venta ya ocurrió en la caja: se descuenta sin condición (si el
+        inventario central queda negativo aparece en el reporte de
+        inventario bajo) y se guarda con la fecha en que se hizo
+        """
+        datos = registro['datos']
+        lineas = []
+        for codigo_barras, cantidad, precio in datos['lineas']:
+            cursor.execute("UPDATE productos SET cantidad = cantidad - %s WHERE codigo_barras = %s",
+                           (cantidad, codigo_barras))
+            if precio is None:
+                cursor.execute("SELECT precio FROM productos WHERE codigo_barras = %s",
+                               (codigo_barras,))
+                fila = cursor.fetchone()
+                precio = fila['precio'] if fila else 0
+            lineas.append((codigo_barras, cantidad, Dinero.de(precio)))
+
+        fecha = datetime.fromtimestamp(registro['fecha']).strftime('%Y-%m-%d %H:%M:%S')
+        total = sum((precio * cantidad for _, cantidad, precio in lineas), Dinero())
+        cursor.execute("INSERT INTO ventas (fecha, caja, total) VALUES (%s, %s, %s)",
+                       (fecha, datos['caja'], total.pesos))
+        id_venta = cursor.lastrowid
+        cursor.executemany(
+            """
+            INSERT INTO detalle_ventas (id_venta, linea, codigo_barras, cantidad, precio_unitario)
+            VALUES (%s, %s, %s, %s, %s)
+            """,
+            [(id_venta, numero, codigo, cantidad, precio.pesos)
+             for numero, (codigo, cantidad, precio) in enumerate(lineas, start=1)])
+        return [codigo for codigo, _, _ in lineas]
+
+    def _aplicar_inventario(self, cursor, datos):
+        query = {
+            'agregar': "UPDATE productos SET cantidad = cantidad + %s WHERE codigo_barras = %s",
+            'restar': "UPDATE productos SET cantidad = cantidad - %s WHERE codigo_barras = %s",
+            'establecer': "UPDATE productos SET cantidad = %s WHERE codigo_barras = %s",
+        }[datos['operacion']]
+        cursor.execute(query, (datos['cantidad'], datos['codigo_barras']))
+        return datos['codigo_barras']
+
+    # ========== ARCHIVO Y POSICIÓN ==========
+
+    def _leer_lote(self, posicion):
+        """
+        Lee hasta tamano_lote líneas completas desde posicion. Una posición
+        que no cae al inicio de una línea (más allá del final o a media
+        línea) se trata como 0: volver a aplicar es seguro porque
+        diario_aplicado descarta lo que ya se aplicó
+        """
+        registros = []
+        with open(self.ruta, 'rb') as archivo:
+            if posicion > 0:
+                archivo.seek(posicion - 1)
+                if archivo.read(1) != b'\n':
+                    posicion = 0
+            archivo.seek(posicion)
+            while len(registros) < self.tamano_lote:
+                linea = archivo.readline()
+                if not linea.endswith(b'\n'):
+                    break  # línea a medio escribir: se toma en la siguiente vuelta
+                registros.append(json.loads(linea))
+                posicion += len(linea)
+        return registros, posicion
+
+    def _leer_posicion(self):
+        try:
+            with open(self._ruta_posicion) as archivo:
+                return int(archivo.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _guardar_posicion(self, posicion):
+        temporal = self._ruta_posicion + '.tmp'
+        with open(temporal, 'w') as archivo:
+            archivo.write(str(posicion))
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, self._ruta_posicion)
+
+    def _rotar(self, posicion):
+        """
+        Vacía el diario cuando ya se aplicó completo y creció demasiado. La
+        posición 0 se guarda antes de vaciar: si el proceso se corta entre
+        los dos pasos se vuelve a aplicar el diario (sin duplicar nada) en
+        lugar de quedar una posición más allá del final
+        """
+        if posicion < self.tamano_rotacion:
+            return
+        with self._condicion:
+            self._archivo.flush()
+            if os.path.getsize(self.ruta) != posicion:
+                return
+            self._guardar_posicion(0)
+            self._archivo.truncate(0)
+            os.fsync(self._archivo.fileno())
+
+    def _reparar_final(self):
+        """
+        Si el programa se cortó a media escritura, descarta la última línea
+        incompleta para que la siguiente anotación no quede pegada a ella
+        """
+        if not os.path.exists(self.ruta):
+            return
+        with open(self.ruta, 'rb+') as archivo:
+            archivo.seek(0, os.SEEK_END)
+            tamano = archivo.tell()
+            if tamano == 0:
+                return
+            archivo.seek(max(0, tamano - 65536))
+            final = archivo.read()
+            if final.endswith(b'\n'):
+                return
+            corte = final.rfind(b'\n')
+            archivo.truncate(tamano - len(final) + corte + 1 if corte >= 0 else max(0, tamano - len(final)))
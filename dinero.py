@@ -0,0 +1,334 @@
+"""
+Dinero en centavos enteros
+Los precios y saldos con float acumulan errores de redondeo (0.1 + 0.2 no
+es 0.3, y al sumar miles de importes los centavos se desvían); Decimal es
+exacto pero lento para recorrer columnas completas. Dinero guarda un
+entero de centavos: sumar y multiplicar por cantidades es exacto, y el
+redondeo (impuestos, descuentos, redondeo de efectivo) es siempre a medio
+centavo hacia arriba, lejos de cero.
+
+Las operaciones por lote trabajan sobre columnas array('q') de centavos
+(las del catálogo y los libros) con NumPy si está instalado y, si no, con
+enteros de Python; los resultados son los mismos en ambos casos. Si un
+resultado podría no caber en int64 se usan enteros de Python aunque esté
+NumPy.
+
+Uso:
+    precio = Dinero.de('23.50')           # también float, Decimal o int (pesos)
+    total = precio * 3 + Dinero(1050)     # Dinero(1050) son $10.50
+    total.impuesto('0.16')
+    f"${total:,.2f}"
+
+    precios = a_centavos([23.5, 10, '0.99'])
+    valorar(precios, cantidades)          # Dinero con el valor del inventario
+    aplicar_tasa(precios, '0.16')         # impuesto de cada renglón
+"""
+
+import operator
+from array import array
+from decimal import Decimal, ROUND_HALF_UP
+from functools import total_ordering
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_CENTAVO = Decimal('0.01')
+_LIMITE = 2 ** 63 - 1   # mayor int64
+
+
+def _fraccion(factor):
+    """
+    (numerador, denominador) enteros de un factor. Los float se toman por
+    su representación decimal ('0.16', no 0.16000000000000000333)
+    """
+    if isinstance(factor, int):
+        return factor, 1
+    if isinstance(factor, float):
+        factor = repr(factor)
+    return Decimal(factor).as_integer_ratio()
+
+
+def _dividir(numerador, denominador):
+    """
+    numerador / denominador redondeado a medio hacia arriba (lejos de cero)
+    """
+    cociente, resto = divmod(abs(numerador), denominador)
+    if 2 * resto >= denominador:
+        cociente += 1
+    return cociente if numerador >= 0 else -cociente
+
+
+def _nuevo(centavos):
+    """
+    Dinero sin la validación de __init__, para los resultados internos
+    """
+    dinero = object.__new__(Dinero)
+    dinero.centavos = centavos
+    return dinero
+
+
+@total_ordering
+class Dinero:
+    __slots__ = ('centavos',)
+
+    def __init__(self, centavos=0):
+        if not isinstance(centavos, int) or isinstance(centavos, bool):
+            raise TypeError(f"Dinero se crea con centavos enteros; para pesos use Dinero.de({centavos!r})")
+        self.centavos = centavos
+
+    @classmethod
+    def de(cls, valor):
+        """
+        Dinero a partir de pesos: int, float, Decimal o texto ('1,234.50'
+        y '$9.99' también), redondeado al centavo
+        """
+        if isinstance(valor, Dinero):
+            return valor
+        if isinstance(valor, int) and not isinstance(valor, bool):
+            return cls(valor * 100)
+        if isinstance(valor, float):
+            valor = repr(valor)
+        elif isinstance(valor, str):
+            valor = valor.strip().lstrip('$').replace(',', '')
+        try:
+            pesos = Decimal(valor)
+        except (ArithmeticError, TypeError, ValueError):
+            raise ValueError(f"Importe inválido: {valor!r}") from None
+        if not pesos.is_finite():
+            raise ValueError(f"Importe inválido: {valor!r}")
+        return cls(int(pesos.quantize(_CENTAVO, rounding=ROUND_HALF_UP).scaleb(2)))
+
+    @property
+    def pesos(self):
+        """
+        Decimal exacto con dos decimales (para la base de datos)
+        """
+        return Decimal(self.centavos).scaleb(-2)
+
+    # ========== ARITMÉTICA ==========
+
+    def __add__(self, otro):
+        if type(otro) is Dinero:
+            return _nuevo(self.centavos + otro.centavos)
+        return NotImplemented
+
+    def __radd__(self, otro):
+        # sum() empieza en 0
+        if otro == 0 and not isinstance(otro, Dinero):
+            return self
+        return self.__add__(otro)
+
+    def __sub__(self, otro):
+        if type(otro) is Dinero:
+            return _nuevo(self.centavos - otro.centavos)
+        return NotImplemented
+
+    def __neg__(self):
+        return Dinero(-self.centavos)
+
+    def __abs__(self):
+        return Dinero(abs(self.centavos))
+
+    def __mul__(self, factor):
+        """
+        Por una cantidad entera es exacto; por un factor (tasa, descuento)
+        se redondea al centavo
+        """
+        if type(factor) is int:
+            return _nuevo(self.centavos * factor)
+        if isinstance(factor, (Dinero, bool)):
+            return NotImplemented
+        try:
+            numerador, denominador = _fraccion(factor)
+        except (ArithmeticError, TypeError, ValueError):
+            return NotImplemented
+        return _nuevo(_dividir(self.centavos * numerador, denominador))
+
+    __rmul__ = __mul__
+
+    def impuesto(self, tasa):
+        return self * tasa
+
+    def con_impuesto(self, tasa):
+        return self + self * tasa
+
+    def redondear(self, multiplo):
+        """
+        Al múltiplo de centavos más cercano (50 para monedas de 50 centavos)
+        """
+        return _nuevo(_dividir(self.centavos, multiplo) * multiplo)
+
+    def repartir(self, partes):
+        """
+        Divide en partes que suman exactamente el total; los centavos que
+        sobran van a las primeras
+        """
+        cociente, resto = divmod(self.centavos, partes)
+        return [Dinero(cociente + (i < resto)) for i in range(partes)]
+
+    # ========== COMPARACIÓN Y CONVERSIÓN ==========
+
+    def __eq__(self, otro):
+        if isinstance(otro, Dinero):
+            return self.centavos == otro.centavos
+        return NotImplemented
+
+    def __lt__(self, otro):
+        if isinstance(otro, Dinero):
+            return self.centavos < otro.centavos
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.centavos)
+
+    def __bool__(self):
+        return self.centavos != 0
+
+    def __float__(self):
+        return self.centavos / 100
+
+    def __str__(self):
+        return str(self.pesos)
+
+    def __repr__(self):
+        return f"Dinero('{self.pesos}')"
+
+    def __format__(self, formato):
+        """
+        Acepta los formatos numéricos de siempre (',.2f', '>12,.2f'...) y los
+        aplica al Decimal exacto, no a un float
+        """
+        return format(self.pesos, formato)
+
+
+# ========== OPERACIONES POR LOTE ==========
+
+def a_centavos(valores):
+    """
+    array('q') de centavos a partir de importes en pesos (o Dinero)
+    """
+    return array('q', [Dinero.de(valor).centavos for valor in valores])
+
+
+def _columna(valores):
+    """
+    Vista int64 de una columna (array, lista o arreglo de NumPy)
+    """
+    if isinstance(valores, array):
+        valores = np.frombuffer(valores, dtype=np.dtype(valores.typecode))
+    return np.asarray(valores).astype(np.int64, copy=False)
+
+
+def _maximo(columna):
+    """
+    Mayor valor absoluto de una columna int64, como entero de Python
+    """
+    return max(int(columna.max()), -int(columna.min()))
+
+
+def _vectorizar(*columnas, factor=1, margen=0, acumula=True):
+    """
+    Columnas int64 para operar con NumPy, o None si no está instalado, son
+    pocos renglones o el resultado podría pasarse de int64 (NumPy no avisa:
+    da la vuelta). Los resultados se acotan con enteros de Python:
+    producto de los máximos de cada columna por factor, por dos (los
+    redondeos) más margen, y por el número de renglones si se suman
+    """
+    if np is None or len(columnas[0]) <= 64:
+        return None
+    try:
+        vistas = [_columna(columna) for columna in columnas]
+    except OverflowError:
+        return None
+    cota = abs(factor)
+    for vista in vistas:
+        cota *= _maximo(vista)
+    if acumula:
+        cota *= len(vistas[0])
+    if 2 * cota + margen > _LIMITE:
+        return None
+    return vistas
+
+
+def sumar(centavos):
+    """
+    Total de una columna de centavos
+    """
+    vistas = _vectorizar(centavos)
+    if vistas:
+        return Dinero(int(vistas[0].sum()))
+    return Dinero(int(sum(centavos)))
+
+
+def multiplicar(centavos, cantidades):
+    """
+    Importe de cada renglón (precio * cantidad), exacto
+    """
+    vistas = _vectorizar(centavos, cantidades, acumula=False)
+    if vistas:
+        return array('q', (vistas[0] * vistas[1]).tobytes())
+    return array('q', map(operator.mul, centavos, cantidades))
+
+
+def valorar(centavos, cantidades):
+    """
+    Suma de precio * cantidad: el valor de un inventario o de una venta
+    """
+    vistas = _vectorizar(centavos, cantidades)
+    if vistas:
+        return Dinero(int(np.dot(vistas[0], vistas[1])))
+    return Dinero(int(sum(map(operator.mul, centavos, cantidades))))
+
+
+def aplicar_tasa(centavos, tasa):
+    """
+    Cada importe por la tasa, redondeado al centavo renglón por renglón
+    (el impuesto de cada línea de un ticket)
+    """
+    numerador, denominador = _fraccion(tasa)
+    vistas = _vectorizar(centavos, factor=numerador, margen=denominador, acumula=False)
+    if vistas:
+        productos = vistas[0] * numerador
+        redondeados = (2 * np.abs(productos) + denominador) // (2 * denominador)
+        return array('q', np.where(productos < 0, -redondeados, redondeados).tobytes())
+    doble = 2 * denominador
+    return array('q', [(2 * p + denominador) // doble if p >= 0 else -((denominador - 2 * p) // doble)
+                       for p in (c * numerador for c in centavos)])
+
+
+def redondear(centavos, multiplo):
+    """
+    Cada importe al múltiplo de centavos más cercano
+    """
+    vistas = _vectorizar(centavos, margen=multiplo, acumula=False)
+    if vistas:
+        columna = vistas[0]
+        redondeados = (2 * np.abs(columna) + multiplo) // (2 * multiplo) * multiplo
+        return array('q', np.where(columna < 0, -redondeados, redondeados).tobytes())
+    doble = 2 * multiplo
+    return array('q', [(2 * c + multiplo) // doble * multiplo if c >= 0
+                       else -((multiplo - 2 * c) // doble * multiplo) for c in centavos])
+
+
+def sumar_por_grupo(grupos, centavos, total_grupos, cantidades=None):
+    """
+    [centavos] por grupo: grupos[i] es el grupo del renglón i. Con
+    cantidades suma centavos * cantidad (valor por categoría)
+    """
+    columnas = (centavos,) if cantidades is None else (centavos, cantidades)
+    vistas = _vectorizar(*columnas)
+    if vistas:
+        importes = vistas[0] if cantidades is None else vistas[0] * vistas[1]
+        sumas = np.zeros(total_grupos, dtype=np.int64)
+        np.add.at(sumas, np.asarray(grupos, dtype=np.intp), importes)
+        return sumas.tolist()
+    sumas = [0] * total_grupos
+    if cantidades is None:
+        for grupo, importe in zip(grupos, centavos):
+            sumas[grupo] += importe
+    else:
+        for grupo, importe, cantidad in zip(grupos, centavos, cantidades):
+            sumas[grupo] += importe * cantidad
+    return [int(suma) for suma in sumas]
@@ -0,0 +1,574 @@
+"""
+Esquema de la base de datos gestion_inventario
+Migraciones versionadas para crear las tablas que usa GestionInventario con
+sus índices, y una verificación con EXPLAIN que falla si alguna consulta de
+GestionInventario recorre completa la tabla productos.
+
+Uso:
+    python esquema.py migrar [--crear-base]
+    python esquema.py verificar
+    python esquema.py version
+    python esquema.py conciliar
+    python esquema.py migrar --sqlite tienda.db
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+
+from backends import BackendSQLite, Error
+from base_datos import GestionInventario
+
+# Cada migración: (versión, descripción, {motor: sentencias}). Nunca se
+# modifica una migración ya publicada; los cambios van en una versión nueva.
+# En SQLite los importes son centavos INTEGER (no tiene un tipo decimal
+# exacto); CursorSQLite los convierte a Decimal al leer y escribir.
+MIGRACIONES = [
+    (1, "Tablas categorias y productos con sus índices", {
+        'MySQL': [
+            """
+            CREATE TABLE IF NOT EXISTS categorias (
+                id_categoria INT AUTO_INCREMENT PRIMARY KEY,
+                nombre_categoria VARCHAR(100) NOT NULL,
+                descripcion TEXT,
+                fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE KEY uq_categorias_nombre (nombre_categoria)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS productos (
+                id_producto INT AUTO_INCREMENT PRIMARY KEY,
+                codigo_barras VARCHAR(50) NOT NULL,
+                nombre_producto VARCHAR(200) NOT NULL,
+                id_categoria INT NOT NULL,
+                precio DECIMAL(10, 2) NOT NULL DEFAULT 0,
+                cantidad INT NOT NULL DEFAULT 0,
+                UNIQUE KEY uq_productos_codigo (codigo_barras),
+                CONSTRAINT fk_productos_categoria FOREIGN KEY (id_categoria)
+                    REFERENCES categorias (id_categoria)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """,
+            # Listado por nombre y su paginación por clave (nombre, código)
+            "CREATE INDEX idx_productos_nombre ON productos (nombre_producto, codigo_barras)",
+            # Búsqueda por categoría y listado por categoría
+            "CREATE INDEX idx_productos_categoria ON productos (id_categoria, codigo_barras)",
+            # Listado por precio
+            "CREATE INDEX idx_productos_precio ON productos (precio, codigo_barras)",
+            # Cubre reporte_inventario_bajo (todas las columnas de p.* están en
+            # el índice, la llave primaria va implícita) y el listado por cantidad
+            """
+            CREATE INDEX idx_productos_cantidad ON productos
+                (cantidad, codigo_barras, id_categoria, precio, nombre_producto)
+            """,
+        ],
+        'SQLite': [
+            """
+            CREATE TABLE IF NOT EXISTS categorias (
+                id_categoria INTEGER PRIMARY KEY AUTOINCREMENT,
+                nombre_categoria TEXT NOT NULL UNIQUE,
+                descripcion TEXT,
+                fecha_creacion TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS productos (
+                id_producto INTEGER PRIMARY KEY AUTOINCREMENT,
+                codigo_barras TEXT NOT NULL UNIQUE,
+                nombre_producto TEXT NOT NULL,
+                id_categoria INTEGER NOT NULL REFERENCES categorias (id_categoria),
+                precio INTEGER NOT NULL DEFAULT 0,
+                cantidad INTEGER NOT NULL DEFAULT 0
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_productos_nombre ON productos (nombre_producto, codigo_barras)",
+            "CREATE INDEX IF NOT EXISTS idx_productos_categoria ON productos (id_categoria, codigo_barras)",
+            "CREATE INDEX IF NOT EXISTS idx_productos_precio ON productos (precio, codigo_barras)",
+            """
+            CREATE INDEX IF NOT EXISTS idx_productos_cantidad ON productos
+                (cantidad, codigo_barras, id_categoria, precio, nombre_producto)
+            """,
+        ],
+    }),
+    (2, "Tablas ventas y detalle_ventas", {
+        'MySQL': [
+            """
+            CREATE TABLE IF NOT EXISTS ventas (
+                id_venta BIGINT AUTO_INCREMENT PRIMARY KEY,
+                fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                caja VARCHAR(50),
+                total DECIMAL(12, 2) NOT NULL,
+                KEY idx_ventas_fecha (fecha)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS detalle_ventas (
+                id_venta BIGINT NOT NULL,
+                linea INT NOT NULL,
+                codigo_barras VARCHAR(50) NOT NULL,
+                cantidad INT NOT NULL,
+                precio_unitario DECIMAL(10, 2) NOT NULL,
+                PRIMARY KEY (id_venta, linea),
+                KEY idx_detalle_ventas_codigo (codigo_barras),
+                CONSTRAINT fk_detalle_ventas_venta FOREIGN KEY (id_venta)
+                    REFERENCES ventas (id_venta)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """,
+        ],
+        'SQLite': [
+            """
+            CREATE TABLE IF NOT EXISTS ventas (
+                id_venta INTEGER PRIMARY KEY AUTOINCREMENT,
+                fecha TEXT DEFAULT CURRENT_TIMESTAMP,
+                caja TEXT,
+                total INTEGER NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_ventas_fecha ON ventas (fecha)",
+            """
+            CREATE TABLE IF NOT EXISTS detalle_ventas (
+                id_venta INTEGER NOT NULL REFERENCES ventas (id_venta),
+                linea INTEGER NOT NULL,
+                codigo_barras TEXT NOT NULL,
+                cantidad INTEGER NOT NULL,
+                precio_unitario INTEGER NOT NULL,
+                PRIMARY KEY (id_venta, linea)
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_detalle_ventas_codigo ON detalle_ventas (codigo_barras)",
+        ],
+    }),
+    (3, "Registros del diario de cajas ya aplicados", {
+        'MySQL': [
+            """
+            CREATE TABLE IF NOT EXISTS diario_aplicado (
+                id_registro CHAR(32) PRIMARY KEY,
+                aplicado TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """,
+        ],
+        'SQLite': [
+            """
+            CREATE TABLE IF NOT EXISTS diario_aplicado (
+                id_registro TEXT PRIMARY KEY,
+                aplicado TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+        ],
+    }),
+    # Totales por categoría que mantienen los disparadores de productos en la
+    # misma transacción que cada INSERT/UPDATE/DELETE (altas, ajustes, ventas,
+    # importaciones y el diario de cajas). Cada categoría se reparte en 8
+    # ranuras según id_producto para que dos cajas que venden productos
+    # distintos de la misma categoría no esperen por la misma fila
+    (4, "Resumen del valor del inventario por categoría", {
+        'MySQL': [
+            """
+            CREATE TABLE IF NOT EXISTS resumen_inventario (
+                id_categoria INT NOT NULL,
+                ranura TINYINT NOT NULL,
+                productos INT NOT NULL DEFAULT 0,
+                unidades BIGINT NOT NULL DEFAULT 0,
+                valor DECIMAL(18, 2) NOT NULL DEFAULT 0,
+                PRIMARY KEY (id_categoria, ranura)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """,
+            "DROP TRIGGER IF EXISTS trg_productos_resumen_alta",
+            """
+            CREATE TRIGGER trg_productos_resumen_alta AFTER INSERT ON productos
+            FOR EACH ROW
+                INSERT INTO resumen_inventario (id_categoria, ranura, productos, unidades, valor)
+                VALUES (NEW.id_categoria, NEW.id_producto % 8, 1, NEW.cantidad,
+                        NEW.precio * NEW.cantidad)
+                ON DUPLICATE KEY UPDATE productos = productos + 1,
+                                        unidades = unidades + NEW.cantidad,
+                                        valor = valor + NEW.precio * NEW.cantidad
+            """,
+            "DROP TRIGGER IF EXISTS trg_productos_resumen_cambio",
+            """
+            CREATE TRIGGER trg_productos_resumen_cambio AFTER UPDATE ON productos
+            FOR EACH ROW
+            BEGIN
+                IF NOT (OLD.precio <=> NEW.precio AND OLD.cantidad <=> NEW.cantidad
+                        AND OLD.id_categoria <=> NEW.id_categoria) THEN
+                    UPDATE resumen_inventario
+                    SET productos = productos - 1,
+                        unidades = unidades - OLD.cantidad,
+                        valor = valor - OLD.precio * OLD.cantidad
+                    WHERE id_categoria = OLD.id_categoria AND ranura = OLD.id_producto % 8;
+                    INSERT INTO resumen_inventario (id_categoria, ranura, productos, unidades, valor)
+                    VALUES (NEW.id_categoria, NEW.id_producto % 8, 1, NEW.cantidad,
+                            NEW.precio * NEW.cantidad)
+                    ON DUPLICATE KEY UPDATE productos = productos + 1,
+                                            unidades = unidades + NEW.cantidad,
+                                            valor = valor + NEW.precio * NEW.cantidad;
+                END IF;
+            END
+            """,
+            "DROP TRIGGER IF EXISTS trg_productos_resumen_baja",
+            """
+            CREATE TRIGGER trg_productos_resumen_baja AFTER DELETE ON productos
+            FOR EACH ROW
+                UPDATE resumen_inventario
+                SET productos = productos - 1,
+                    unidades = unidades - OLD.cantidad,
+                    valor = valor - OLD.precio * OLD.cantidad
+                WHERE id_categoria = OLD.id_categoria AND ranura = OLD.id_producto % 8
+            """,
+            # Con los disparadores ya activos se recalcula todo en la misma
+            # transacción: lo que se vendió mientras tanto queda incluido y
+            # volver a correr la migración no suma dos veces
+            "DELETE FROM resumen_inventario",
+            """
+            INSERT INTO resumen_inventario (id_categoria, ranura, productos, unidades, valor)
+            SELECT id_categoria, id_producto % 8, COUNT(*), SUM(cantidad), SUM(precio * cantidad)
+            FROM productos GROUP BY id_categoria, id_producto % 8
+            """,
+        ],
+        'SQLite': [
+            """
+            CREATE TABLE IF NOT EXISTS resumen_inventario (
+                id_categoria INTEGER NOT NULL,
+                ranura INTEGER NOT NULL,
+                productos INTEGER NOT NULL DEFAULT 0,
+                unidades INTEGER NOT NULL DEFAULT 0,
+                valor INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (id_categoria, ranura)
+            )
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_productos_resumen_alta AFTER INSERT ON productos
+            BEGIN
+                INSERT INTO resumen_inventario (id_categoria, ranura, productos, unidades, valor)
+                VALUES (NEW.id_categoria, NEW.id_producto % 8, 1, NEW.cantidad,
+                        NEW.precio * NEW.cantidad)
+                ON CONFLICT (id_categoria, ranura) DO UPDATE
+                SET productos = productos + 1,
+                    unidades = unidades + excluded.unidades,
+                    valor = valor + excluded.valor;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_productos_resumen_cambio
+            AFTER UPDATE OF precio, cantidad, id_categoria ON productos
+            BEGIN
+                UPDATE resumen_inventario
+                SET productos = productos - 1,
+                    unidades = unidades - OLD.cantidad,
+                    valor = valor - OLD.precio * OLD.cantidad
+                WHERE id_categoria = OLD.id_categoria AND ranura = OLD.id_producto % 8;
+                INSERT INTO resumen_inventario (id_categoria, ranura, productos, unidades, valor)
+                VALUES (NEW.id_categoria, NEW.id_producto % 8, 1, NEW.cantidad,
+                        NEW.precio * NEW.cantidad)
+                ON CONFLICT (id_categoria, ranura) DO UPDATE
+                SET productos = productos + 1,
+                    unidades = unidades + excluded.unidades,
+                    valor = valor + excluded.valor;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_productos_resumen_baja AFTER DELETE ON productos
+            BEGIN
+                UPDATE resumen_inventario
+                SET productos = productos - 1,
+                    unidades = unidades - OLD.cantidad,
+                    valor = valor - OLD.precio * OLD.cantidad
+                WHERE id_categoria = OLD.id_categoria AND ranura = OLD.id_producto % 8;
+            END
+            """,
+            # Con los disparadores ya activos se recalcula todo en la misma
+            # transacción: lo que se vendió mientras tanto queda incluido y
+            # volver a correr la migración no suma dos veces
+            "DELETE FROM resumen_inventario",
+            """
+            INSERT INTO resumen_inventario (id_categoria, ranura, productos, unidades, valor)
+            SELECT id_categoria, id_producto % 8, COUNT(*), SUM(cantidad), SUM(precio * cantidad)
+            FROM productos GROUP BY id_categoria, id_producto % 8
+            """,
+        ],
+    }),
+    (5, "Puntos de reorden por producto", {
+        'MySQL': [
+            """
+            CREATE TABLE IF NOT EXISTS puntos_reorden (
+                codigo_barras VARCHAR(50) PRIMARY KEY,
+                punto_reorden INT NOT NULL,
+                CONSTRAINT fk_puntos_reorden_producto FOREIGN KEY (codigo_barras)
+                    REFERENCES productos (codigo_barras) ON DELETE CASCADE
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """,
+        ],
+        'SQLite': [
+            """
+            CREATE TABLE IF NOT EXISTS puntos_reorden (
+                codigo_barras TEXT PRIMARY KEY
+                    REFERENCES productos (codigo_barras) ON DELETE CASCADE,
+                punto_reorden INTEGER NOT NULL
+            )
+            """,
+        ],
+    }),
+]
+
+TABLA_VERSION = {
+    'MySQL': """
+    CREATE TABLE IF NOT EXISTS version_esquema (
+        version INT PRIMARY KEY,
+        descripcion VARCHAR(200) NOT NULL,
+        aplicada TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    'SQLite': """
+    CREATE TABLE IF NOT EXISTS version_esquema (
+        version INTEGER PRIMARY KEY,
+        descripcion TEXT NOT NULL,
+        aplicada TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+}
+
+# Consultas que por diseño leen toda la tabla: se informan pero no fallan
+RECORRIDOS_ESPERADOS = {
+    'buscar_producto(nombre)': "LIKE '%...%' solo se usa si no hay índice de nombres",
+    'listar_productos': "devuelve el catálogo completo; el menú usa iterar_paginas",
+}
+
+
+def version_actual(cursor, motor='MySQL'):
+    """
+    Última versión aplicada (0 si la base no tiene esquema versionado)
+    """
+    cursor.execute(TABLA_VERSION[motor])
+    cursor.execute("SELECT MAX(version) AS version FROM version_esquema")
+    fila = cursor.fetchone()
+    return fila['version'] or 0
+
+
+def migrar(gestor, hasta=None):
+    """
+    Aplica en orden las migraciones pendientes. Si las tablas ya existían
+    sin versión, los índices repetidos se ignoran y solo se registra la versión
+    """
+    motor = gestor.backend.nombre
+    with gestor.sesion() as cursor:
+        actual = version_actual(cursor, motor)
+        pendientes = [m for m in MIGRACIONES
+                      if m[0] > actual and (hasta is None or m[0] <= hasta)]
+        if not pendientes:
+            print(f"✅ Esquema al día (versión {actual})")
+            return actual
+
+        for version, descripcion, sentencias in pendientes:
+            print(f"⏳ Aplicando migración {version}: {descripcion}")
+            for sentencia in sentencias[motor]:
+                try:
+                    cursor.execute(sentencia)
+                except Error as e:
+                    if not gestor.backend.es_indice_repetido(e):
+                        print(f"❌ Error en la migración {version}: {e}")
+                        raise
+            cursor.execute("INSERT INTO version_esquema (version, descripcion) VALUES (%s, %s)",
+                           (version, descripcion))
+            gestor.connection.commit()
+            actual = version
+
+    print(f"✅ Esquema actualizado a la versión {actual}")
+    return actual
+
+
+def crear_base(host, database, user, password):
+    """
+    Crea la base de datos MySQL si todavía no existe
+    """
+    import mysql.connector
+    conexion = mysql.connector.connect(host=host, user=user, password=password)
+    try:
+        cursor = conexion.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{database}` "
+                       "DEFAULT CHARACTER SET utf8mb4")
+        cursor.close()
+    finally:
+        conexion.close()
+
+
+# ========== VERIFICACIÓN DE PLANES CON EXPLAIN ==========
+
+class CursorExplicado:
+    """
+    Envuelve el cursor de GestionInventario: antes de cada SELECT pide el
+    plan de ejecución con los mismos parámetros y lo guarda para revisarlo
+    """
+    def __init__(self, cursor, conexion, backend):
+        self._cursor = cursor
+        self._conexion = conexion
+        self._backend = backend
+        self.metodo = None
+        self.planes = []
+
+    def execute(self, query, params=None):
+        if query.lstrip().upper().startswith("SELECT"):
+            self.planes.append((self.metodo, query,
+                                self._backend.explicar(self._conexion, query, params)))
+        return self._cursor.execute(query, params)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+def _recorridos_completos(plan):
+    """
+    Tablas del plan que se leen completas. categorias es un catálogo chico
+    y se permite recorrerla
+    """
+    return [paso['tabla'] for paso in plan
+            if paso['completo'] and paso['tabla'] in ('p', 'productos')]
+
+
+def verificar_planes(gestor):
+    """
+    Ejecuta las consultas de lectura de GestionInventario con EXPLAIN y
+    revisa las sentencias de modificación. Devuelve la lista de problemas
+    (vacía si ninguna consulta recorre completa la tabla productos).
+    Conviene correrla sobre una base con datos: con tablas vacías el
+    optimizador puede elegir recorridos que no usaría en producción
+    """
+    with gestor.sesion():
+        gestor.cursor.execute("SELECT codigo_barras FROM productos LIMIT 1")
+        fila = gestor.cursor.fetchone()
+        gestor.cursor.execute("SELECT nombre_categoria FROM categorias LIMIT 1")
+        categoria = gestor.cursor.fetchone()
+    codigo = fila['codigo_barras'] if fila else '0000000000000'
+    nombre_categoria = categoria['nombre_categoria'] if categoria else 'General'
+
+    pruebas = [
+        ('listar_categorias', lambda: gestor.listar_categorias()),
+        ('obtener_categoria_id', lambda: gestor.obtener_categoria_id(nombre_categoria)),
+        ('buscar_producto(codigo)', lambda: gestor.buscar_producto("codigo", codigo)),
+        ('buscar_producto(nombre)', lambda: gestor.buscar_producto("nombre", "a")),
+        ('buscar_producto(categoria)', lambda: gestor.buscar_producto("categoria", nombre_categoria)),
+        ('reporte_inventario_bajo', lambda: gestor.reporte_inventario_bajo(10)),
+        ('valor_total_inventario', lambda: gestor.valor_total_inventario()),
+        ('valor_por_categoria', lambda: gestor.valor_por_categoria()),
+        ('listar_productos', lambda: gestor.listar_productos()),
+        ('contar_registros', lambda: gestor.contar_registros()),
+    ]
+    for orden in GestionInventario._ORDEN_PAGINADO:
+        # Páginas de un producto para que también se ejecute la consulta de
+        # la página siguiente
+        pruebas.append((f'iterar_paginas({orden})',
+                        lambda orden=orden: list(zip(range(2), gestor.iterar_paginas(orden, 1)))))
+
+    modificaciones = [
+        ('actualizar_producto', "UPDATE productos SET precio = precio WHERE codigo_barras = %s"),
+        ('actualizar_inventario', "UPDATE productos SET cantidad = cantidad + 0 WHERE codigo_barras = %s"),
+        ('registrar_venta', "UPDATE productos SET cantidad = cantidad - 0 "
+                            "WHERE codigo_barras = %s AND cantidad >= 0"),
+        ('eliminar_producto', "DELETE FROM productos WHERE codigo_barras = %s"),
+    ]
+
+    problemas = []
+    indice, cache = gestor.indice_nombres, gestor.cache_productos.capacidad
+    gestor.indice_nombres = None       # que buscar_producto use SQL
+    gestor.cache_productos.capacidad = 0
+    gestor.cache_productos.limpiar()
+
+    with gestor.sesion():
+        original = gestor.cursor
+        explicado = CursorExplicado(original, gestor.connection, gestor.backend)
+        if gestor.pool:
+            gestor._local.cursor = explicado
+        else:
+            gestor._cursor = explicado
+
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                for metodo, prueba in pruebas:
+                    explicado.metodo = metodo
+                    # Sin resultados guardados, para que cada reporte consulte
+                    gestor.cache_reportes.limpiar()
+                    prueba()
+
+            for metodo, query in modificaciones:
+                explicado.planes.append(
+                    (metodo, query, gestor.backend.explicar(gestor.connection, query, (codigo,))))
+        finally:
+            if gestor.pool:
+                gestor._local.cursor = original
+            else:
+                gestor._cursor = original
+            gestor.indice_nombres = indice
+            gestor.cache_productos.capacidad = cache
+
+    print("\n" + "="*80)
+    print("🔎 PLANES DE EJECUCIÓN")
+    print("="*80)
+    for metodo, query, plan in explicado.planes:
+        tablas = _recorridos_completos(plan)
+        resumen = ", ".join(f"{paso['tabla']}:{paso['detalle']}" for paso in plan)
+        if not tablas:
+            print(f"✅ {metodo:<30} {resumen}")
+        elif metodo in RECORRIDOS_ESPERADOS:
+            print(f"ℹ️ {metodo:<30} {resumen} ({RECORRIDOS_ESPERADOS[metodo]})")
+        else:
+            print(f"❌ {metodo:<30} {resumen}")
+            problemas.append((metodo, " ".join(query.split())))
+
+    return problemas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migraciones y verificación del esquema")
+    parser.add_argument('comando', choices=['migrar', 'verificar', 'version', 'conciliar'])
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--database', default='gestion_inventario')
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--hasta', type=int, help="versión máxima a aplicar")
+    parser.add_argument('--crear-base', action='store_true',
+                        help="crea la base de datos si no existe")
+    parser.add_argument('--sqlite', metavar='RUTA',
+                        help="usa una base SQLite embebida en lugar de MySQL")
+    args = parser.parse_args()
+
+    if args.crear_base and not args.sqlite:
+        try:
+            crear_base(args.host, args.database, args.user, args.password)
+        except Error as e:
+            print(f"❌ Error al crear la base de datos: {e}")
+            sys.exit(1)
+
+    gestor = GestionInventario(host=args.host, database=args.database,
+                               user=args.user, password=args.password,
+                               backend=BackendSQLite(args.sqlite) if args.sqlite else None)
+    if not gestor.conectar():
+        sys.exit(1)
+
+    try:
+        if args.comando == 'migrar':
+            migrar(gestor, args.hasta)
+        elif args.comando == 'version':
+            with gestor.sesion() as cursor:
+                print(f"Versión del esquema: {version_actual(cursor, gestor.backend.nombre)}")
+        elif args.comando == 'conciliar':
+            diferencias = gestor.conciliar_valor_inventario()
+            if diferencias is None:
+                sys.exit(1)
+        else:
+            problemas = verificar_planes(gestor)
+            if problemas:
+                print(f"\n❌ {len(problemas)} consultas recorren completa la tabla productos:")
+                for metodo, query in problemas:
+                    print(f"  {metodo}: {query}")
+                sys.exit(1)
+            print("\n✅ Ninguna consulta recorre completa la tabla productos")
+    except Error:
+        sys.exit(1)
+    finally:
+        gestor.desconectar()
+
+
+if __name__ == "__main__":
+    main()
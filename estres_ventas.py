@@ -0,0 +1,172 @@
+"""
+Prueba de estrés de ventas concurrentes
+Varias cajas (hilos) comparten un GestionInventario en modo pool y venden
+los mismos productos al mismo tiempo hasta agotarlos. Al final se comprueba
+que no hubo sobreventa: el inventario nunca queda negativo y lo descontado
+coincide exactamente con lo registrado en detalle_ventas.
+
+Uso:
+    python estres_ventas.py --cajas 16 --inventario 5000
+    python estres_ventas.py --sqlite estres.db
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import sys
+import threading
+import time
+
+from backends import BackendSQLite
+from base_datos import GestionInventario
+from esquema import migrar
+
+CODIGOS = ['ESTRES-0001', 'ESTRES-0002']
+
+
+def preparar(gestor, inventario):
+    """
+    Crea (o reinicia) los productos de la prueba con el inventario indicado
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        id_categoria = gestor.obtener_categoria_id('Estres')
+        if id_categoria is None:
+            id_categoria = gestor.crear_categoria('Estres', 'Productos de la prueba de estrés')
+    limpiar(gestor)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for codigo in CODIGOS:
+            gestor.crear_producto(codigo, f"Producto {codigo}", id_categoria, 10.0, inventario)
+
+
+def limpiar(gestor):
+    with gestor.sesion() as cursor:
+        cursor.execute("""
+        DELETE FROM detalle_ventas
+        WHERE id_venta IN (SELECT id_venta FROM ventas WHERE caja LIKE 'estres-%')
+        """)
+        cursor.execute("DELETE FROM ventas WHERE caja LIKE 'estres-%'")
+        cursor.execute("DELETE FROM productos WHERE codigo_barras LIKE 'ESTRES-%'")
+        gestor.connection.commit()
+
+
+def caja(gestor, numero, resultados, lock):
+    """
+    Vende hasta que varias ventas seguidas son rechazadas por falta de stock
+    """
+    generador = random.Random(numero)
+    vendidas = {codigo: 0 for codigo in CODIGOS}
+    ventas = rechazadas = 0
+    tiempos = []
+
+    while rechazadas < 20:
+        lineas = [(CODIGOS[0], generador.randint(1, 3))]
+        if generador.random() < 0.5:
+            lineas.append((CODIGOS[1], generador.randint(1, 3)))
+
+        inicio = time.perf_counter()
+        id_venta = gestor.registrar_venta(lineas, caja=f"estres-{numero}")
+        tiempos.append(time.perf_counter() - inicio)
+
+        if id_venta is None:
+            rechazadas += 1
+            continue
+        ventas += 1
+        for codigo, cantidad in lineas:
+            vendidas[codigo] += cantidad
+
+    with lock:
+        resultados['ventas'] += ventas
+        resultados['tiempos'].extend(tiempos)
+        for codigo in CODIGOS:
+            resultados['vendidas'][codigo] += vendidas[codigo]
+
+
+def verificar(gestor, inventario, vendidas):
+    """
+    Devuelve la lista de inconsistencias encontradas
+    """
+    errores = []
+    with gestor.sesion() as cursor:
+        for codigo in CODIGOS:
+            cursor.execute("SELECT cantidad FROM productos WHERE codigo_barras = %s", (codigo,))
+            restante = cursor.fetchone()['cantidad']
+            cursor.execute("""
+            SELECT COALESCE(SUM(d.cantidad), 0) AS unidades
+            FROM detalle_ventas d JOIN ventas v ON d.id_venta = v.id_venta
+            WHERE v.caja LIKE 'estres-%%' AND d.codigo_barras = %s
+            """, (codigo,))
+            registradas = int(cursor.fetchone()['unidades'])
+
+            if restante < 0:
+                errores.append(f"{codigo}: inventario negativo ({restante})")
+            if inventario - restante != registradas:
+                errores.append(f"{codigo}: se descontaron {inventario - restante} "
+                               f"pero detalle_ventas registra {registradas}")
+            if registradas != vendidas[codigo]:
+                errores.append(f"{codigo}: las cajas vendieron {vendidas[codigo]} "
+                               f"pero detalle_ventas registra {registradas}")
+    return errores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de estrés de ventas concurrentes")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--database', default='gestion_inventario')
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--sqlite', metavar='RUTA',
+                        help="usa una base SQLite embebida en lugar de MySQL")
+    parser.add_argument('--cajas', type=int, default=16, help="hilos vendiendo a la vez")
+    parser.add_argument('--inventario', type=int, default=5000,
+                        help="unidades iniciales de cada producto")
+    args = parser.parse_args()
+
+    gestor = GestionInventario(host=args.host, database=args.database, user=args.user,
+                               password=args.password, pool_size=min(args.cajas, 32),
+                               backend=BackendSQLite(args.sqlite) if args.sqlite else None)
+    if not gestor.conectar():
+        sys.exit(1)
+    if args.sqlite:
+        with contextlib.redirect_stdout(io.StringIO()):
+            migrar(gestor)
+
+    try:
+        preparar(gestor, args.inventario)
+
+        resultados = {'ventas': 0, 'tiempos': [], 'vendidas': {c: 0 for c in CODIGOS}}
+        lock = threading.Lock()
+        hilos = [threading.Thread(target=caja, args=(gestor, i, resultados, lock))
+                 for i in range(args.cajas)]
+
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+        segundos = time.perf_counter() - inicio
+
+        tiempos = sorted(resultados['tiempos'])
+        print("\n" + "="*60)
+        print(f"🧪 ESTRÉS DE VENTAS: {args.cajas} cajas, {args.inventario} unidades por producto")
+        print("="*60)
+        print(f"Ventas registradas: {resultados['ventas']} en {segundos:.2f} s "
+              f"({resultados['ventas'] / segundos:,.0f} ventas/s)")
+        print(f"Latencia p50: {tiempos[len(tiempos) // 2] * 1000:.1f} ms   "
+              f"p99: {tiempos[int(len(tiempos) * 0.99)] * 1000:.1f} ms")
+
+        errores = verificar(gestor, args.inventario, resultados['vendidas'])
+        limpiar(gestor)
+        if errores:
+            print("❌ Inconsistencias:")
+            for error in errores:
+                print(f"  {error}")
+            sys.exit(1)
+        print("✅ Sin sobreventa: inventario y detalle de ventas coinciden")
+    finally:
+        gestor.desconectar()
+
+
+if __name__ == "__main__":
+    main()
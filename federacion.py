@@ -0,0 +1,265 @@
+"""
+Consultas federadas sobre varias tiendas
+Cada tienda tiene su propia base (un GestionInventario por tienda, MySQL o
+SQLite). Federacion manda la misma consulta a todas a la vez desde un pool
+de hilos y junta los resultados: el valor del inventario se suma, y los
+listados ordenados (inventario bajo, productos) se mezclan con un merge de
+k vías que va tomando fila por fila de cada tienda, sin reordenar todo.
+
+Cada tienda tiene un tiempo límite: la que no responde a tiempo o da error
+queda en fallidas y el resultado se arma con las demás. Si una consulta
+anterior a una tienda con una sola conexión sigue en curso (se le acabó el
+tiempo pero no ha terminado), esa tienda se salta en lugar de usar la
+misma conexión desde dos hilos.
+
+Uso:
+    federacion = Federacion({
+        'centro': GestionInventario(mostrar_mensajes=False),
+        'norte': GestionInventario(backend=BackendSQLite('norte.db'), mostrar_mensajes=False),
+    }, tiempo_limite=2.0)
+    federacion.conectar()
+    resultado = federacion.valor_total_inventario()
+    resultado.valor, resultado.por_tienda, resultado.fallidas
+    for producto in federacion.iterar_productos('precio'):
+        ...
+    federacion.cerrar()
+
+Desde la terminal:
+    python federacion.py --sqlite centro.db norte.db sur.db --limite 5
+"""
+
+import argparse
+import heapq
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as TiempoAgotado
+from itertools import islice
+from operator import itemgetter
+
+from backends import BackendSQLite, Error
+from base_datos import GestionInventario
+from dinero import Dinero
+
+ResultadoFederado = namedtuple('ResultadoFederado', [
+    'valor',        # resultado combinado
+    'por_tienda',   # {tienda: resultado de esa tienda}
+    'fallidas',     # {tienda: motivo} de las que no respondieron
+])
+
+
+# ========== CONSULTAS POR TIENDA ==========
+# Pasan por la caché de reportes de cada tienda pero sin el manejo de
+# errores de los métodos públicos (que devuelven 0 o []): un error tiene
+# que marcar la tienda como fallida, no sumar cero
+
+def _valor_total(gestor):
+    return gestor.cache_reportes.obtener('valor_total', (), gestor._consultar_valor_total)
+
+
+def _inventario_bajo(gestor, limite):
+    return gestor.cache_reportes.obtener('inventario_bajo', (limite,),
+                                         gestor._consultar_inventario_bajo)
+
+
+class Federacion:
+    def __init__(self, tiendas, tiempo_limite=5.0, hilos=None):
+        """
+        tiendas: {nombre: GestionInventario}
+        tiempo_limite: segundos que se espera a cada tienda por consulta
+        hilos: tamaño del pool (por defecto uno por tienda)
+        """
+        self.tiendas = dict(tiendas)
+        self.tiempo_limite = tiempo_limite
+        self._pool = ThreadPoolExecutor(max_workers=hilos or len(self.tiendas),
+                                        thread_name_prefix='federacion')
+        self._en_curso = {}
+        self._lock = threading.Lock()
+
+    def conectar(self):
+        """
+        Conecta todas las tiendas en paralelo; devuelve las que fallaron
+        """
+        resultado = self._repartir(lambda gestor: gestor.conectar())
+        fallidas = dict(resultado.fallidas)
+        fallidas.update((nombre, "no se pudo conectar")
+                        for nombre, conectada in resultado.por_tienda.items() if not conectada)
+        return fallidas
+
+    def cerrar(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        for gestor in self.tiendas.values():
+            try:
+                gestor.desconectar()
+            except Error:
+                pass
+
+    # ========== REPARTO ==========
+
+    def _enviar(self, nombre, funcion, *args):
+        """
+        Manda la consulta a una tienda, o None si la anterior a esa tienda
+        sigue ocupando su única conexión
+        """
+        gestor = self.tiendas[nombre]
+        with self._lock:
+            anterior = self._en_curso.get(nombre)
+            if gestor.pool_size == 0 and anterior is not None and not anterior.done():
+                return None
+            futuro = self._pool.submit(funcion, gestor, *args)
+            self._en_curso[nombre] = futuro
+        return futuro
+
+    def _repartir(self, funcion, *args):
+        """
+        funcion(gestor, *args) en todas las tiendas a la vez. Espera hasta
+        tiempo_limite y devuelve ResultadoFederado sin combinar (valor None)
+        """
+        futuros, fallidas = {}, {}
+        for nombre in self.tiendas:
+            futuro = self._enviar(nombre, funcion, *args)
+            if futuro is None:
+                fallidas[nombre] = "ocupada con una consulta anterior"
+            else:
+                futuros[futuro] = nombre
+
+        listos, pendientes = wait(futuros, timeout=self.tiempo_limite)
+        por_tienda = {}
+        for futuro in listos:
+            nombre = futuros[futuro]
+            try:
+                por_tienda[nombre] = futuro.result()
+            except Exception as e:
+                fallidas[nombre] = f"error: {e}"
+        for futuro in pendientes:
+            fallidas[futuros[futuro]] = f"sin respuesta en {self.tiempo_limite} s"
+        return ResultadoFederado(None, por_tienda, fallidas)
+
+    # ========== CONSULTAS ==========
+
+    def valor_total_inventario(self):
+        """
+        Suma del valor del inventario de las tiendas que respondieron
+        """
+        resultado = self._repartir(_valor_total)
+        return resultado._replace(valor=sum(resultado.por_tienda.values(), Dinero()))
+
+    def reporte_inventario_bajo(self, limite=10, maximo=None):
+        """
+        Productos con menos de limite unidades en cualquier tienda, de
+        menor a mayor cantidad; cada fila lleva su 'tienda'. maximo corta
+        el listado combinado sin recorrer el resto
+        """
+        resultado = self._repartir(_inventario_bajo, limite)
+        listas = [[dict(producto, tienda=nombre) for producto in productos]
+                  for nombre, productos in sorted(resultado.por_tienda.items())]
+        combinados = heapq.merge(*listas, key=itemgetter('cantidad'))
+        return resultado._replace(valor=list(islice(combinados, maximo)))
+
+    def buscar_codigo(self, codigo_barras):
+        """
+        El producto en cada tienda que lo tiene: valor es [(tienda, producto)]
+        """
+        resultado = self._repartir(lambda gestor: gestor.obtener_producto(codigo_barras))
+        encontrados = [(nombre, producto) for nombre, producto in sorted(resultado.por_tienda.items())
+                       if producto is not None]
+        return resultado._replace(valor=encontrados)
+
+    def iterar_productos(self, ordenar_por="nombre", tamano_pagina=500, fallidas=None):
+        """
+        Generador con los productos de todas las tiendas en el orden de
+        listar_productos, mezclados fila por fila. Cada tienda se lee por
+        páginas (iterar_paginas) y la siguiente página se pide en el pool
+        mientras se consume la actual. Una tienda que no entrega una página
+        a tiempo se deja de leer y se anota en fallidas (dict opcional).
+        Cada tienda ordena los textos en binario (iterar_paginas con
+        binario=True), que es como los compara el merge en Python: con la
+        collation de MySQL, que ignora mayúsculas, "apple" quedaría antes
+        que "Banana" y el merge las entregaría desordenadas
+        """
+        _, clave, direccion = GestionInventario._ORDEN_PAGINADO.get(
+            ordenar_por, GestionInventario._ORDEN_PAGINADO["nombre"])
+        fallidas = {} if fallidas is None else fallidas
+        flujos = [self._filas(nombre, ordenar_por, tamano_pagina, fallidas)
+                  for nombre in sorted(self.tiendas)]
+        yield from heapq.merge(*flujos, key=lambda fila: (fila[clave], fila['codigo_barras']),
+                               reverse=direccion == "DESC")
+
+    def _filas(self, nombre, ordenar_por, tamano_pagina, fallidas):
+        """
+        Generador con las filas de una tienda. La primera página se pide al
+        llamar (así todas las tiendas empiezan a la vez) y cada siguiente
+        mientras se consume la anterior
+        """
+        paginas = self.tiendas[nombre].iterar_paginas(ordenar_por, tamano_pagina, binario=True)
+        siguiente = lambda gestor: next(paginas, None)
+
+        def filas(futuro):
+            while futuro is not None:
+                try:
+                    pagina = futuro.result(timeout=self.tiempo_limite)
+                except TiempoAgotado:
+                    fallidas[nombre] = f"sin respuesta en {self.tiempo_limite} s"
+                    return
+                except Exception as e:
+                    fallidas[nombre] = f"error: {e}"
+                    return
+                if pagina is None:
+                    return
+                futuro = self._enviar(nombre, siguiente)
+                if futuro is None:
+                    fallidas[nombre] = "ocupada con una consulta anterior"
+                for fila in pagina:
+                    yield dict(fila, tienda=nombre)
+
+        primera = self._enviar(nombre, siguiente)
+        if primera is None:
+            fallidas[nombre] = "ocupada con una consulta anterior"
+        return filas(primera)
+
+def main():
+    parser = argparse.ArgumentParser(description="Reportes combinados de varias tiendas")
+    parser.add_argument('--sqlite', nargs='+', metavar='RUTA', required=True,
+                        help="bases SQLite de las tiendas (el nombre del archivo es el de la tienda)")
+    parser.add_argument('--tiempo-limite', type=float, default=5.0)
+    parser.add_argument('--limite', type=int, default=10, help="umbral de inventario bajo")
+    parser.add_argument('--codigo', help="código de barras a buscar en todas las tiendas")
+    args = parser.parse_args()
+
+    tiendas = {ruta.rsplit('/', 1)[-1].rsplit('.', 1)[0]:
+               GestionInventario(backend=BackendSQLite(ruta), mostrar_mensajes=False)
+               for ruta in args.sqlite}
+    federacion = Federacion(tiendas, args.tiempo_limite)
+    for nombre, motivo in federacion.conectar().items():
+        print(f"❌ {nombre}: {motivo}")
+
+    try:
+        valor = federacion.valor_total_inventario()
+        print("\n" + "="*60)
+        print(f"💰 VALOR TOTAL DE {len(valor.por_tienda)} TIENDAS: ${valor.valor:,.2f}")
+        print("="*60)
+        for nombre, total in sorted(valor.por_tienda.items()):
+            print(f"{nombre:<30} ${total:>14,.2f}")
+
+        bajo = federacion.reporte_inventario_bajo(args.limite, maximo=20)
+        print(f"\n⚠️ INVENTARIO BAJO (menos de {args.limite} unidades)")
+        print("-"*60)
+        for producto in bajo.valor:
+            print(f"{producto['tienda'][:14]:<15} {producto['codigo_barras'][:15]:<16} "
+                  f"{producto['nombre_producto'][:20]:<21} {producto['cantidad']:>6}")
+
+        if args.codigo:
+            encontrado = federacion.buscar_codigo(args.codigo)
+            print(f"\n🔍 {args.codigo} en {len(encontrado.valor)} tiendas")
+            for nombre, producto in encontrado.valor:
+                print(f"{nombre:<15} {producto['nombre_producto']:<25} {producto['cantidad']:>6}")
+
+        for resultado in (valor, bajo):
+            for nombre, motivo in resultado.fallidas.items():
+                print(f"⚠️ {nombre}: {motivo}")
+    finally:
+        federacion.cerrar()
+
+
+if __name__ == "__main__":
+    main()
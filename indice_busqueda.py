@@ -0,0 +1,151 @@
+"""
+Índice de búsqueda de productos por nombre
+Índice invertido de trigramas en memoria: tolera errores de dedo, ordena
+por parecido y sirve para búsqueda mientras se escribe (type-ahead).
+Se construye una vez desde la tabla productos y luego se actualiza con cada
+alta, cambio o baja, sin volver a leer la tabla.
+"""
+
+import threading
+import unicodedata
+from array import array
+from collections import Counter, defaultdict
+
+
+def normalizar(texto):
+    """
+    Minúsculas, sin acentos y con cualquier signo convertido en espacio
+    """
+    texto = unicodedata.normalize('NFKD', str(texto).lower())
+    return ''.join(c if c.isalnum() else ' ' for c in texto if not unicodedata.combining(c))
+
+
+def trigramas(texto, prefijo_final=False):
+    """
+    Trigramas de cada palabra con relleno ('  co', ' coc', ...) para que el
+    inicio de palabra pese más. Con prefijo_final la última palabra se
+    trata como incompleta (el usuario sigue escribiendo) y no se cierra
+    """
+    palabras = normalizar(texto).split()
+    resultado = set()
+    for i, palabra in enumerate(palabras):
+        abierta = prefijo_final and i == len(palabras) - 1
+        relleno = f"  {palabra}" if abierta else f"  {palabra} "
+        for j in range(len(relleno) - 2):
+            resultado.add(relleno[j:j + 3])
+    return resultado
+
+
+class IndiceNombres:
+    def __init__(self, max_postings=50000, max_candidatos=300, puntaje_minimo=0.4):
+        """
+        max_postings: entradas del índice que se revisan como máximo por
+        búsqueda; acota la latencia aunque el catálogo tenga millones de
+        productos (se revisan primero los trigramas más raros)
+        max_candidatos: candidatos que se califican con detalle
+        puntaje_minimo: fracción de la consulta que debe coincidir
+        """
+        self.max_postings = max_postings
+        self.max_candidatos = max_candidatos
+        self.puntaje_minimo = puntaje_minimo
+        self._postings = defaultdict(lambda: array('I'))
+        self._codigos = []      # id interno -> código de barras (None si se borró)
+        self._nombres = []      # id interno -> nombre original
+        self._tamanos = array('H')  # id interno -> número de trigramas del nombre
+        self._ids = {}          # código de barras -> id interno
+        self._borrados = 0
+        self._lock = threading.RLock()
+
+    def agregar(self, codigo_barras, nombre):
+        """
+        Agrega un producto o reemplaza el nombre si el código ya existe
+        """
+        with self._lock:
+            if codigo_barras in self._ids:
+                self._quitar_id(self._ids[codigo_barras])
+
+            id_interno = len(self._codigos)
+            self._codigos.append(codigo_barras)
+            self._nombres.append(nombre)
+            self._ids[codigo_barras] = id_interno
+            propios = trigramas(nombre)
+            self._tamanos.append(min(len(propios), 0xFFFF))
+            for trigrama in propios:
+                self._postings[trigrama].append(id_interno)
+
+    def quitar(self, codigo_barras):
+        """
+        Quita un producto del índice. Las entradas viejas se marcan como
+        borradas y se compactan cuando son más de una cuarta parte
+        """
+        with self._lock:
+            id_interno = self._ids.get(codigo_barras)
+            if id_interno is None:
+                return
+            self._quitar_id(id_interno)
+            if self._borrados > 1000 and self._borrados * 4 > len(self._codigos):
+                self._compactar()
+
+    def buscar(self, texto, limite=10):
+        """
+        Devuelve hasta limite tuplas (codigo_barras, nombre, puntaje) de la
+        más a la menos parecida
+        """
+        consulta = trigramas(texto, prefijo_final=True)
+        if not consulta:
+            return []
+
+        with self._lock:
+            conteo = Counter()
+            revisados = 0
+            for trigrama in sorted(consulta, key=lambda t: len(self._postings.get(t, ()))):
+                lista = self._postings.get(trigrama)
+                if not lista:
+                    continue
+                restante = self.max_postings - revisados
+                if restante <= 0:
+                    break
+                conteo.update(lista[:restante] if len(lista) > restante else lista)
+                revisados += min(len(lista), restante)
+
+            # Los candidatos salen del conteo (que puede estar incompleto por
+            # el tope de postings) y se califican con todos sus trigramas
+            resultados = []
+            for id_interno, _ in conteo.most_common(self.max_candidatos):
+                codigo = self._codigos[id_interno]
+                if codigo is None:
+                    continue
+                nombre = self._nombres[id_interno]
+                comunes = len(consulta & trigramas(nombre))
+                cobertura = comunes / len(consulta)
+                if cobertura < self.puntaje_minimo:
+                    continue
+                parecido = comunes / (len(consulta) + self._tamanos[id_interno] - comunes)
+                resultados.append((codigo, nombre, round(cobertura * 0.7 + parecido * 0.3, 4)))
+
+        resultados.sort(key=lambda r: (-r[2], r[1]))
+        return resultados[:limite]
+
+    def _quitar_id(self, id_interno):
+        self._ids.pop(self._codigos[id_interno], None)
+        self._codigos[id_interno] = None
+        self._nombres[id_interno] = None
+        self._borrados += 1
+
+    def _compactar(self):
+        """
+        Reconstruye el índice solo con los productos vigentes
+        """
+        vigentes = [(c, n) for c, n in zip(self._codigos, self._nombres) if c is not None]
+        self._postings = defaultdict(lambda: array('I'))
+        self._codigos, self._nombres, self._ids = [], [], {}
+        self._tamanos = array('H')
+        self._borrados = 0
+        for codigo, nombre in vigentes:
+            self.agregar(codigo, nombre)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, codigo_barras):
+        return codigo_barras in self._ids
@@ -0,0 +1,358 @@
+"""
+Instrumentación de GestionInventario
+Mide cada método público y cada consulta que emite: llamadas, tiempo en la
+base de datos contra tiempo en Python, filas devueltas, errores de SQL y
+muestras de las consultas lentas con su texto. Los datos se leen con
+estadisticas() o se vuelcan periódicamente a un archivo JSON o en formato
+de texto de Prometheus (el que lee el textfile collector de node_exporter).
+
+También incluye un muestreador de pilas para perfilar un proceso
+interactivo sin el costo de cProfile.
+
+Uso:
+    instrumentacion = Instrumentacion(umbral_lento=0.05)
+    instrumentacion.instalar(gestor)
+    instrumentacion.iniciar_volcado('metricas.prom', intervalo=30)
+    ...
+    print(instrumentacion.estadisticas())
+"""
+
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from functools import wraps
+
+from backends import Error
+
+# Métodos de conexión y de infraestructura que no se miden
+NO_MEDIDOS = {'conectar', 'desconectar', 'sesion', 'liberar_conexion', 'esta_conectado',
+              'reconectar', 'agregar_observador', 'quitar_observador', 'connection', 'cursor'}
+
+
+class CursorInstrumentado:
+    """
+    Envuelve el cursor de un backend y anota el tiempo de cada execute y
+    fetch, las filas leídas y los errores
+    """
+    def __init__(self, cursor, instrumentacion):
+        self._cursor = cursor
+        self._instrumentacion = instrumentacion
+
+    def _medir(self, sql, operacion, *args):
+        inicio = time.perf_counter()
+        try:
+            resultado = operacion(*args)
+        except Error:
+            self._instrumentacion._anotar_consulta(sql, time.perf_counter() - inicio, 0, error=True)
+            raise
+        self._instrumentacion._anotar_consulta(sql, time.perf_counter() - inicio, 0)
+        return resultado
+
+    def execute(self, query, params=None):
+        return self._medir(query, self._cursor.execute, query, params)
+
+    def executemany(self, query, secuencia):
+        return self._medir(query, self._cursor.executemany, query, secuencia)
+
+    def _leer(self, operacion, *args):
+        inicio = time.perf_counter()
+        filas = operacion(*args)
+        cantidad = 0 if filas is None else (1 if isinstance(filas, dict) else len(filas))
+        self._instrumentacion._anotar_consulta(None, time.perf_counter() - inicio, cantidad)
+        return filas
+
+    def fetchone(self):
+        return self._leer(self._cursor.fetchone)
+
+    def fetchall(self):
+        return self._leer(self._cursor.fetchall)
+
+    def fetchmany(self, tamano):
+        return self._leer(self._cursor.fetchmany, tamano)
+
+    def __iter__(self):
+        for fila in self._cursor:
+            self._instrumentacion._anotar_consulta(None, 0.0, 1)
+            yield fila
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+
+class Instrumentacion:
+    def __init__(self, umbral_lento=0.1, muestras_lentas=100):
+        """
+        umbral_lento: segundos a partir de los cuales una consulta se guarda
+        como muestra lenta
+        muestras_lentas: cuántas muestras lentas recientes se conservan
+        """
+        self.umbral_lento = umbral_lento
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._metodos = {}
+        self._lentas = deque(maxlen=muestras_lentas)
+        self._volcado = None
+        self._detener_volcado = threading.Event()
+        self.desde = time.time()
+
+    # ========== INSTALACIÓN ==========
+
+    def instalar(self, gestor):
+        """
+        Mide los métodos públicos del gestor y los cursores que cree desde
+        ahora (y el actual en modo de una sola conexión)
+        """
+        gestor.instrumentacion = self
+        for nombre, metodo in inspect.getmembers(type(gestor), inspect.isfunction):
+            if nombre.startswith('_') or nombre in NO_MEDIDOS:
+                continue
+            setattr(gestor, nombre, self._envolver(nombre, getattr(gestor, nombre), metodo))
+        if gestor.pool is None and gestor._cursor is not None:
+            gestor._cursor = self.envolver_cursor(gestor._cursor)
+        return gestor
+
+    def envolver_cursor(self, cursor):
+        return CursorInstrumentado(cursor, self)
+
+    def _envolver(self, nombre, ligado, funcion):
+        if inspect.isgeneratorfunction(funcion):
+            # En un generador se mide cada paso, que es cuando se consulta
+            @wraps(ligado)
+            def generador(*args, **kwargs):
+                iterador = ligado(*args, **kwargs)
+                primero = True
+                while True:
+                    self._entrar(nombre)
+                    inicio = time.perf_counter()
+                    try:
+                        valor = next(iterador)
+                    except StopIteration:
+                        return
+                    finally:
+                        self._salir(nombre, time.perf_counter() - inicio, llamada=primero)
+                        primero = False
+                    yield valor
+            return generador
+
+        @wraps(ligado)
+        def envoltura(*args, **kwargs):
+            self._entrar(nombre)
+            inicio = time.perf_counter()
+            try:
+                return ligado(*args, **kwargs)
+            finally:
+                self._salir(nombre, time.perf_counter() - inicio)
+        return envoltura
+
+    # ========== REGISTRO ==========
+
+    def _pila(self):
+        pila = getattr(self._local, 'pila', None)
+        if pila is None:
+            pila = self._local.pila = []
+        return pila
+
+    def _datos(self, nombre):
+        datos = self._metodos.get(nombre)
+        if datos is None:
+            datos = self._metodos[nombre] = {'llamadas': 0, 'segundos': 0.0, 'segundos_bd': 0.0,
+                                             'consultas': 0, 'filas': 0, 'errores': 0,
+                                             'maximo': 0.0}
+        return datos
+
+    def _entrar(self, nombre):
+        self._pila().append(nombre)
+
+    def _salir(self, nombre, segundos, llamada=True):
+        self._pila().pop()
+        with self._lock:
+            datos = self._datos(nombre)
+            datos['llamadas'] += llamada
+            datos['segundos'] += segundos
+            datos['maximo'] = max(datos['maximo'], segundos)
+
+    def _anotar_consulta(self, sql, segundos, filas, error=False):
+        """
+        El tiempo de base se suma a todos los métodos activos en el hilo
+        (los tiempos de un método incluyen a los que llama)
+        """
+        pila = self._pila()
+        metodos = set(pila) or {'(fuera de un método)'}
+        with self._lock:
+            for nombre in metodos:
+                datos = self._datos(nombre)
+                datos['segundos_bd'] += segundos
+                datos['filas'] += filas
+                if sql is not None:
+                    datos['consultas'] += 1
+                    datos['errores'] += error
+            if sql is not None and segundos >= self.umbral_lento:
+                self._lentas.append({'metodo': pila[-1] if pila else None,
+                                     'sql': " ".join(sql.split()),
+                                     'segundos': round(segundos, 6),
+                                     'error': error,
+                                     'fecha': datetime.now().isoformat(timespec='seconds')})
+
+    # ========== CONSULTA Y VOLCADO ==========
+
+    def estadisticas(self):
+        """
+        {'desde', 'metodos': {nombre: {...}}, 'lentas': [...]}; el tiempo
+        en Python es el total menos el de base de datos
+        """
+        with self._lock:
+            metodos = {}
+            for nombre, datos in sorted(self._metodos.items()):
+                metodos[nombre] = dict(datos, segundos_python=max(0.0, datos['segundos']
+                                                                  - datos['segundos_bd']))
+            return {'desde': self.desde, 'metodos': metodos, 'lentas': list(self._lentas)}
+
+    def reiniciar(self):
+        with self._lock:
+            self._metodos.clear()
+            self._lentas.clear()
+            self.desde = time.time()
+
+    def prometheus(self):
+        """
+        Estadísticas en el formato de texto de Prometheus
+        """
+        metricas = [
+            ('inventario_llamadas_total', 'counter', "Llamadas por método", 'llamadas'),
+            ('inventario_consultas_total', 'counter', "Consultas SQL emitidas por método", 'consultas'),
+            ('inventario_filas_total', 'counter', "Filas leídas por método", 'filas'),
+            ('inventario_errores_sql_total', 'counter', "Consultas con error por método", 'errores'),
+            ('inventario_segundos_max', 'gauge', "Llamada más lenta por método", 'maximo'),
+        ]
+        estadisticas = self.estadisticas()['metodos']
+        lineas = []
+        for nombre, tipo, ayuda, clave in metricas:
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            for metodo, datos in estadisticas.items():
+                lineas.append(f'{nombre}{{metodo="{metodo}"}} {datos[clave]}')
+        lineas.append("# HELP inventario_segundos_total Tiempo por método, en base de datos y en Python")
+        lineas.append("# TYPE inventario_segundos_total counter")
+        for metodo, datos in estadisticas.items():
+            lineas.append(f'inventario_segundos_total{{metodo="{metodo}",lugar="bd"}} '
+                          f'{datos["segundos_bd"]:.6f}')
+            lineas.append(f'inventario_segundos_total{{metodo="{metodo}",lugar="python"}} '
+                          f'{datos["segundos_python"]:.6f}')
+        return "\n".join(lineas) + "\n"
+
+    def volcar(self, ruta):
+        """
+        Escribe las estadísticas en ruta (.prom en formato Prometheus, si no
+        JSON). Se escribe a un temporal y se renombra para que un lector
+        nunca vea el archivo a medias
+        """
+        if ruta.endswith('.prom'):
+            contenido = self.prometheus()
+        else:
+            contenido = json.dumps(self.estadisticas(), indent=2, ensure_ascii=False)
+        temporal = ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            archivo.write(contenido)
+        os.replace(temporal, ruta)
+
+    def iniciar_volcado(self, ruta, intervalo=60):
+        """
+        Vuelca las estadísticas cada intervalo segundos en un hilo aparte
+        """
+        def ciclo():
+            while not self._detener_volcado.wait(intervalo):
+                try:
+                    self.volcar(ruta)
+                except OSError as e:
+                    print(f"❌ Error al volcar métricas en {ruta}: {e}", file=sys.stderr)
+
+        self._detener_volcado.clear()
+        self._volcado = threading.Thread(target=ciclo, daemon=True)
+        self._volcado.start()
+
+    def detener_volcado(self, ruta=None):
+        """
+        Detiene el volcado periódico; con ruta hace un último volcado
+        """
+        self._detener_volcado.set()
+        if self._volcado is not None:
+            self._volcado.join()
+            self._volcado = None
+        if ruta:
+            self.volcar(ruta)
+
+    def mostrar(self, limite=15):
+        """
+        Tabla de los métodos con más tiempo acumulado
+        """
+        estadisticas = self.estadisticas()
+        metodos = sorted(estadisticas['metodos'].items(), key=lambda m: -m[1]['segundos'])
+        print(f"\n{'Método':<28} {'Llamadas':>9} {'Total s':>9} {'BD s':>9} "
+              f"{'Python s':>9} {'Filas':>9}")
+        print("-"*78)
+        for nombre, datos in metodos[:limite]:
+            print(f"{nombre:<28} {datos['llamadas']:>9} {datos['segundos']:>9.3f} "
+                  f"{datos['segundos_bd']:>9.3f} {datos['segundos_python']:>9.3f} {datos['filas']:>9}")
+        if estadisticas['lentas']:
+            print(f"\n🐢 Consultas lentas recientes (≥ {self.umbral_lento * 1000:.0f} ms):")
+            for lenta in estadisticas['lentas'][-5:]:
+                print(f"  {lenta['segundos'] * 1000:8.1f} ms  {lenta['metodo']}: {lenta['sql'][:90]}")
+
+
+# ========== MUESTREO DE PILAS ==========
+
+class MuestreadorPilas:
+    """
+    Perfilador por muestreo: cada intervalo segundos anota la pila del hilo
+    observado. Cuesta mucho menos que cProfile y el resultado se guarda en
+    formato de pilas colapsadas (una línea "f1;f2;f3 cuenta"), que leen
+    flamegraph.pl y speedscope
+    """
+    def __init__(self, intervalo=0.005, hilo=None):
+        self.intervalo = intervalo
+        self._id_hilo = (hilo or threading.main_thread()).ident
+        self._pilas = Counter()
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def iniciar(self):
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+
+    def _ciclo(self):
+        while not self._detener.wait(self.intervalo):
+            marco = sys._current_frames().get(self._id_hilo)
+            pila = []
+            while marco is not None:
+                codigo = marco.f_code
+                pila.append(f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:"
+                            f"{codigo.co_firstlineno})")
+                marco = marco.f_back
+            if pila:
+                self._pilas[";".join(reversed(pila))] += 1
+
+    def guardar(self, ruta):
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            for pila, cuenta in self._pilas.most_common():
+                archivo.write(f"{pila} {cuenta}\n")
+
+    def mas_frecuentes(self, limite=15):
+        """
+        Funciones con más muestras propias (la punta de la pila)
+        """
+        propias = Counter()
+        for pila, cuenta in self._pilas.items():
+            propias[pila.rsplit(';', 1)[-1]] += cuenta
+        return propias.most_common(limite)
@@ -0,0 +1,153 @@
+"""
+Servicio de inventario para asyncio
+Envuelve un GestionInventario en modo pool sin mensajes ni preguntas y
+ejecuta cada operación en un grupo de hilos propio, uno por conexión del
+pool, para que el ciclo de eventos nunca se bloquee esperando a la base.
+Las corrutinas devuelven los mismos datos que los métodos de
+GestionInventario (None, False o [] cuando la operación falla) y no
+imprimen nada, así un solo ciclo de eventos puede atender a cientos de
+terminales o a una API web.
+
+Uso:
+    async with InventarioAsync(hilos=16, backend=BackendSQLite('tienda.db')) as inventario:
+        producto = await inventario.obtener_producto('7501000000001')
+        id_venta = await inventario.registrar_venta([('7501000000001', 2)], caja='web')
+        async for pagina in inventario.iterar_paginas('precio', 100):
+            ...
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from base_datos import GestionInventario
+
+
+class InventarioAsync:
+    def __init__(self, hilos=16, **opciones):
+        """
+        hilos: consultas que pueden estar en curso a la vez; es también el
+        tamaño del pool de conexiones. Las operaciones que llegan con todos
+        los hilos ocupados esperan su turno sin bloquear el ciclo de eventos
+        opciones: se pasan a GestionInventario (host, database, backend,
+        cache_tamano, ...)
+        """
+        self.gestor = GestionInventario(pool_size=hilos, mostrar_mensajes=False, **opciones)
+        self._ejecutor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='inventario')
+
+    async def _en_hilo(self, funcion, *args, **kwargs):
+        ciclo = asyncio.get_running_loop()
+        return await ciclo.run_in_executor(self._ejecutor, functools.partial(funcion, *args, **kwargs))
+
+    # ========== CONEXIÓN ==========
+
+    async def conectar(self, indice_nombres=True):
+        """
+        Crea el pool y, si se pide, el índice de búsqueda por nombre
+        """
+        if not await self._en_hilo(self.gestor.conectar):
+            return False
+        if indice_nombres:
+            await self._en_hilo(self.gestor.construir_indice_nombres)
+        return True
+
+    async def cerrar(self):
+        """
+        Espera a que terminen las operaciones en curso y cierra el pool. La
+        espera se hace en otro hilo: el ciclo de eventos sigue atendiendo
+        """
+        ciclo = asyncio.get_running_loop()
+        await ciclo.run_in_executor(None, self._ejecutor.shutdown)
+        await ciclo.run_in_executor(None, self.gestor.desconectar)
+
+    async def __aenter__(self):
+        if not await self.conectar():
+            raise ConnectionError(f"No se pudo conectar a {self.gestor.backend.descripcion()}")
+        return self
+
+    async def __aexit__(self, *excepcion):
+        await self.cerrar()
+
+    # ========== CATEGORÍAS ==========
+
+    async def listar_categorias(self):
+        return await self._en_hilo(self.gestor.listar_categorias)
+
+    async def crear_categoria(self, nombre, descripcion=""):
+        return await self._en_hilo(self.gestor.crear_categoria, nombre, descripcion)
+
+    async def obtener_categoria_id(self, nombre_categoria):
+        return await self._en_hilo(self.gestor.obtener_categoria_id, nombre_categoria)
+
+    # ========== BÚSQUEDA ==========
+
+    async def obtener_producto(self, codigo_barras):
+        """
+        Un acierto de la caché se responde sin pasar por el grupo de hilos
+        """
+        producto = self.gestor.cache_productos.obtener(codigo_barras)
+        if producto is not None:
+            return producto
+        return await self._en_hilo(self.gestor.obtener_producto, codigo_barras)
+
+    async def buscar_producto(self, criterio, valor):
+        return await self._en_hilo(self.gestor.buscar_producto, criterio, valor)
+
+    async def sugerir_productos(self, texto, limite=10):
+        return await self._en_hilo(self.gestor.sugerir_productos, texto, limite)
+
+    async def iterar_paginas(self, ordenar_por="nombre", tamano_pagina=500):
+        """
+        Generador asíncrono de páginas; cada página se lee en un hilo del
+        grupo y la conexión se suelta entre una y otra
+        """
+        paginas = self.gestor.iterar_paginas(ordenar_por, tamano_pagina)
+        try:
+            while True:
+                pagina = await self._en_hilo(next, paginas, None)
+                if pagina is None:
+                    return
+                yield pagina
+        finally:
+            paginas.close()
+
+    # ========== PRODUCTOS E INVENTARIO ==========
+
+    async def crear_producto(self, codigo_barras, nombre, id_categoria, precio, cantidad=0):
+        return await self._en_hilo(self.gestor.crear_producto, codigo_barras, nombre,
+                                   id_categoria, precio, cantidad)
+
+    async def actualizar_producto(self, codigo_barras, campo, nuevo_valor):
+        return await self._en_hilo(self.gestor.actualizar_producto, codigo_barras, campo, nuevo_valor)
+
+    async def eliminar_producto(self, codigo_barras):
+        """
+        Borra sin pedir confirmación: la confirmación es cosa de la interfaz
+        """
+        return await self._en_hilo(self.gestor.eliminar_producto, codigo_barras, confirmar=False)
+
+    async def actualizar_inventario(self, codigo_barras, cantidad, operacion='agregar'):
+        return await self._en_hilo(self.gestor.actualizar_inventario, codigo_barras,
+                                   cantidad, operacion)
+
+    async def registrar_venta(self, lineas, caja=None):
+        return await self._en_hilo(self.gestor.registrar_venta, lineas, caja)
+
+    async def importar_productos(self, filas, tamano_lote=1000, actualizar_existentes=False):
+        """
+        filas debe ser una lista o un iterable que no dependa del ciclo de
+        eventos: se consume dentro del hilo
+        """
+        return await self._en_hilo(self.gestor.importar_productos, filas, tamano_lote,
+                                   actualizar_existentes)
+
+    # ========== REPORTES ==========
+
+    async def reporte_inventario_bajo(self, limite=10):
+        return await self._en_hilo(self.gestor.reporte_inventario_bajo, limite)
+
+    async def valor_total_inventario(self):
+        return await self._en_hilo(self.gestor.valor_total_inventario)
+
+    async def valor_por_categoria(self):
+        return await self._en_hilo(self.gestor.valor_por_categoria)
@@ -0,0 +1,366 @@
+"""
+Libro de movimientos del cajero automático
+Varias cuentas con su saldo en centavos (enteros, sin errores de
+redondeo) y un libro de solo anexado con cada apertura, depósito, retiro
+y transferencia junto con el saldo que dejó. La comprobación de saldo y
+el descuento son atómicos: cada cuenta pertenece a una de N franjas con
+su propio lock, así que sesiones de cuentas distintas no se esperan entre
+sí. Los movimientos se guardan en un archivo de registros fijos; con
+esperar_disco=True cada operación vuelve cuando su registro está en disco,
+y un solo fsync cubre todo lo anotado mientras se hacía el anterior.
+
+Uso:
+    libro = LibroCajero('cajero')
+    libro.abrir_cuenta('0001', 100000)        # $1,000.00
+    libro.retirar('0001', 25050)              # saldo nuevo o None
+    libro.movimientos('0001', 10)
+    libro.cerrar()
+"""
+
+import os
+import struct
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+# tipo, cuenta, importe, saldo, momento
+REGISTRO = struct.Struct('<BIqqd')
+
+APERTURA = ord('A')
+DEPOSITO = ord('D')
+RETIRO = ord('R')
+TRANSFERENCIA_SALIDA = ord('S')
+TRANSFERENCIA_ENTRADA = ord('E')
+
+NOMBRES_TIPO = {APERTURA: 'apertura', DEPOSITO: 'depósito', RETIRO: 'retiro',
+                TRANSFERENCIA_SALIDA: 'transferencia enviada',
+                TRANSFERENCIA_ENTRADA: 'transferencia recibida'}
+
+Movimiento = namedtuple('Movimiento', 'numero tipo importe saldo momento')
+
+
+class LibroCajero:
+    def __init__(self, ruta=None, esperar_disco=True, franjas=64, tamano_bufer=64 * 1024):
+        """
+        ruta: base de los archivos (<ruta>.libro y <ruta>.cuentas); None
+        deja todo en memoria
+        esperar_disco: cada operación espera a que su registro tenga fsync;
+        si es False se escribe al llenarse el búfer o con vaciar()
+        franjas: locks entre los que se reparten las cuentas
+        """
+        self.ruta = ruta
+        self.esperar_disco = esperar_disco and ruta is not None
+        self.tamano_bufer = tamano_bufer
+
+        # Cuentas: número -> índice; saldo y último movimiento por índice
+        self.cuentas = []
+        self._indice = {}
+        self._saldos = array('q')
+        self._ultimo = array('q')
+
+        # Libro por columnas; anterior enlaza los movimientos de cada cuenta
+        self._tipos = array('B')
+        self._de_cuenta = array('I')
+        self._importes = array('q')
+        self._saldos_libro = array('q')
+        self._momentos = array('d')
+        self._anterior = array('q')
+
+        self._franjas = [threading.Lock() for _ in range(franjas)]
+        self._lock_cuentas = threading.Lock()
+        self._lock_libro = threading.Lock()
+        self._condicion = threading.Condition()
+        self._pendiente = bytearray()
+        self._escribiendo = False
+        self._en_disco = 0
+        self._archivo = None
+        self._archivo_cuentas = None
+
+        if ruta is not None:
+            self._recuperar()
+            self._archivo = open(f"{ruta}.libro", 'ab')
+            self._archivo_cuentas = open(f"{ruta}.cuentas", 'a', encoding='utf-8')
+
+    # ========== RECUPERACIÓN ==========
+
+    def _recuperar(self):
+        """
+        Rehace cuentas y saldos desde los archivos. Lo que el proceso dejó
+        a medias al morir se descarta: un registro cortado al final, una
+        transferencia enviada sin su entrada y una cuenta sin su apertura
+        """
+        cuentas = []
+        if os.path.exists(f"{self.ruta}.cuentas"):
+            with open(f"{self.ruta}.cuentas", encoding='utf-8') as archivo:
+                cuentas = [linea[:-1] for linea in archivo if linea.endswith('\n')]
+
+        registros = []
+        if os.path.exists(f"{self.ruta}.libro"):
+            with open(f"{self.ruta}.libro", 'rb') as archivo:
+                datos = archivo.read()
+            registros = list(REGISTRO.iter_unpack(
+                memoryview(datos)[:len(datos) - len(datos) % REGISTRO.size]))
+            for numero, registro in enumerate(registros):
+                if registro[1] >= len(cuentas):
+                    del registros[numero:]
+                    break
+            # Las dos mitades de una transferencia se escriben juntas: si
+            # solo quedó la salida, la transferencia no llegó a disco
+            if registros and registros[-1][0] == TRANSFERENCIA_SALIDA:
+                registros.pop()
+            if len(registros) * REGISTRO.size != len(datos):
+                with open(f"{self.ruta}.libro", 'r+b') as archivo:
+                    archivo.truncate(len(registros) * REGISTRO.size)
+
+        # Las cuentas se anotan en el mismo orden que sus aperturas
+        abiertas = sum(1 for registro in registros if registro[0] == APERTURA)
+        if abiertas < len(cuentas):
+            del cuentas[abiertas:]
+            temporal = f"{self.ruta}.cuentas.tmp"
+            with open(temporal, 'w', encoding='utf-8') as archivo:
+                archivo.writelines(numero_cuenta + '\n' for numero_cuenta in cuentas)
+            os.replace(temporal, f"{self.ruta}.cuentas")
+        for numero_cuenta in cuentas:
+            self._indice[numero_cuenta] = len(self.cuentas)
+            self.cuentas.append(numero_cuenta)
+
+        self._saldos.extend([0] * len(self.cuentas))
+        self._ultimo.extend([-1] * len(self.cuentas))
+        for numero, (tipo, cuenta, importe, saldo, momento) in enumerate(registros):
+            self._tipos.append(tipo)
+            self._de_cuenta.append(cuenta)
+            self._importes.append(importe)
+            self._saldos_libro.append(saldo)
+            self._momentos.append(momento)
+            self._anterior.append(self._ultimo[cuenta])
+            self._saldos[cuenta] = saldo
+            self._ultimo[cuenta] = numero
+        self._en_disco = len(self._tipos)
+
+    # ========== ANOTACIÓN ==========
+
+    def _anotar(self, *movimientos):
+        """
+        Agrega movimientos (tipo, cuenta, importe, saldo) al libro, con las
+        franjas de sus cuentas tomadas, y devuelve el número del último.
+        Entran juntos al búfer, así que ninguna escritura lleva solo una parte
+        """
+        momento = time.time()
+        with self._lock_libro:
+            for tipo, cuenta, importe, saldo in movimientos:
+                numero = len(self._tipos)
+                self._tipos.append(tipo)
+                self._de_cuenta.append(cuenta)
+                self._importes.append(importe)
+                self._saldos_libro.append(saldo)
+                self._momentos.append(momento)
+                self._anterior.append(self._ultimo[cuenta])
+                self._ultimo[cuenta] = numero
+                if self._archivo is not None:
+                    self._pendiente += REGISTRO.pack(tipo, cuenta, importe, saldo, momento)
+            if (self._archivo is not None and not self.esperar_disco
+                    and len(self._pendiente) >= self.tamano_bufer):
+                self._archivo.write(self._pendiente)
+                self._pendiente = bytearray()
+                self._en_disco = numero + 1
+        return numero
+
+    def _a_disco(self, numero):
+        """
+        Espera a que el movimiento numero esté en disco. Quien llega cuando
+        nadie escribe se lleva todo lo pendiente en un solo write + fsync
+        """
+        if not self.esperar_disco:
+            return
+        while True:
+            with self._condicion:
+                while self._escribiendo and self._en_disco <= numero:
+                    self._condicion.wait()
+                if self._en_disco > numero:
+                    return
+                self._escribiendo = True
+            hasta = None
+            try:
+                with self._lock_libro:
+                    datos, self._pendiente = self._pendiente, bytearray()
+                    total = len(self._tipos)
+                self._archivo.write(datos)
+                self._archivo.flush()
+                os.fsync(self._archivo.fileno())
+                hasta = total
+            finally:
+                with self._condicion:
+                    if hasta is not None:
+                        self._en_disco = max(self._en_disco, hasta)
+                    self._escribiendo = False
+                    self._condicion.notify_all()
+
+    def vaciar(self):
+        """
+        Escribe lo pendiente y hace fsync
+        """
+        if self._archivo is None:
+            return
+        with self._condicion:
+            while self._escribiendo:
+                self._condicion.wait()
+            with self._lock_libro:
+                self._archivo.write(self._pendiente)
+                self._pendiente = bytearray()
+                self._en_disco = len(self._tipos)
+            self._archivo.flush()
+            os.fsync(self._archivo.fileno())
+
+    def cerrar(self):
+        self.vaciar()
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo_cuentas.close()
+            self._archivo = None
+
+    # ========== CUENTAS ==========
+
+    def _cuenta(self, numero_cuenta):
+        try:
+            return self._indice[numero_cuenta]
+        except KeyError:
+            raise KeyError(f"Cuenta inexistente: {numero_cuenta}") from None
+
+    def _franja(self, cuenta):
+        return self._franjas[cuenta % len(self._franjas)]
+
+    def abrir_cuenta(self, numero_cuenta, saldo_inicial=0):
+        """
+        Da de alta una cuenta; devuelve False si ya existía
+        """
+        if saldo_inicial < 0:
+            raise ValueError("El saldo inicial no puede ser negativo")
+        if '\n' in numero_cuenta:
+            raise ValueError(f"Número de cuenta no válido: {numero_cuenta!r}")
+        with self._lock_cuentas:
+            if numero_cuenta in self._indice:
+                return False
+            # El nombre llega a disco antes que la apertura; si el proceso
+            # muere entre los dos, _recuperar descarta la cuenta entera
+            if self._archivo_cuentas is not None:
+                self._archivo_cuentas.write(numero_cuenta + '\n')
+                self._archivo_cuentas.flush()
+                if self.esperar_disco:
+                    os.fsync(self._archivo_cuentas.fileno())
+            with self._lock_libro:
+                cuenta = len(self.cuentas)
+                self.cuentas.append(numero_cuenta)
+                self._saldos.append(saldo_inicial)
+                self._ultimo.append(-1)
+            numero = self._anotar((APERTURA, cuenta, saldo_inicial, saldo_inicial))
+            # Visible para las demás sesiones solo cuando ya está anotada
+            self._indice[numero_cuenta] = cuenta
+        self._a_disco(numero)
+        return True
+
+    def __contains__(self, numero_cuenta):
+        return numero_cuenta in self._indice
+
+    def __len__(self):
+        return len(self.cuentas)
+
+    def saldo(self, numero_cuenta):
+        return self._saldos[self._cuenta(numero_cuenta)]
+
+    # ========== OPERACIONES ==========
+
+    def depositar(self, numero_cuenta, importe):
+        """
+        Suma importe (centavos) y devuelve el saldo nuevo
+        """
+        if importe <= 0:
+            raise ValueError("El importe debe ser mayor a 0")
+        cuenta = self._cuenta(numero_cuenta)
+        with self._franja(cuenta):
+            saldo = self._saldos[cuenta] + importe
+            self._saldos[cuenta] = saldo
+            numero = self._anotar((DEPOSITO, cuenta, importe, saldo))
+        self._a_disco(numero)
+        return saldo
+
+    def retirar(self, numero_cuenta, importe):
+        """
+        Descuenta importe si el saldo alcanza; devuelve el saldo nuevo o
+        None si no alcanza (nunca queda negativo)
+        """
+        if importe <= 0:
+            raise ValueError("El importe debe ser mayor a 0")
+        cuenta = self._cuenta(numero_cuenta)
+        with self._franja(cuenta):
+            saldo = self._saldos[cuenta] - importe
+            if saldo < 0:
+                return None
+            self._saldos[cuenta] = saldo
+            numero = self._anotar((RETIRO, cuenta, -importe, saldo))
+        self._a_disco(numero)
+        return saldo
+
+    def transferir(self, origen, destino, importe):
+        """
+        Mueve importe entre dos cuentas de forma atómica; devuelve el saldo
+        nuevo del origen o None si no alcanza
+        """
+        if importe <= 0:
+            raise ValueError("El importe debe ser mayor a 0")
+        de, a = self._cuenta(origen), self._cuenta(destino)
+        if de == a:
+            raise ValueError("El origen y el destino son la misma cuenta")
+        # Siempre en el mismo orden para que dos transferencias cruzadas no se bloqueen
+        franjas = [self._franjas[i] for i in sorted({de % len(self._franjas), a % len(self._franjas)})]
+        for franja in franjas:
+            franja.acquire()
+        try:
+            saldo = self._saldos[de] - importe
+            if saldo < 0:
+                return None
+            self._saldos[de] = saldo
+            self._saldos[a] += importe
+            numero = self._anotar((TRANSFERENCIA_SALIDA, de, -importe, saldo),
+                                  (TRANSFERENCIA_ENTRADA, a, importe, self._saldos[a]))
+        finally:
+            for franja in reversed(franjas):
+                franja.release()
+        self._a_disco(numero)
+        return saldo
+
+    # ========== CONSULTAS ==========
+
+    def movimientos(self, numero_cuenta, n=10):
+        """
+        Los n movimientos más recientes de la cuenta, del último al primero
+        """
+        cuenta = self._cuenta(numero_cuenta)
+        resultado = []
+        numero = self._ultimo[cuenta]
+        while numero >= 0 and len(resultado) < n:
+            resultado.append(Movimiento(numero, NOMBRES_TIPO[self._tipos[numero]],
+                                        self._importes[numero], self._saldos_libro[numero],
+                                        self._momentos[numero]))
+            numero = self._anterior[numero]
+        return resultado
+
+    def total_movimientos(self):
+        return len(self._tipos)
+
+    def verificar(self):
+        """
+        Recalcula cada saldo sumando sus movimientos y lo compara con el
+        saldo guardado y con el saldo corrido del libro (sin operaciones en
+        curso). Devuelve las cuentas que no cuadran
+        """
+        with self._lock_libro:
+            sumas = [0] * len(self.cuentas)
+            errores = set()
+            for cuenta, importe, saldo in zip(self._de_cuenta, self._importes, self._saldos_libro):
+                sumas[cuenta] += importe
+                if sumas[cuenta] != saldo:
+                    errores.add(self.cuentas[cuenta])
+            errores.update(self.cuentas[cuenta] for cuenta, suma in enumerate(sumas)
+                           if suma != self._saldos[cuenta])
+        return sorted(errores)
@@ -0,0 +1,421 @@
+"""
+Libro de ventas por columnas
+Copia analítica de las líneas de venta (ventas + detalle_ventas) guardada
+por columnas y partida por día: cada día es un directorio con un archivo
+por columna (segundo del día, producto, cantidad, precio unitario en
+centavos, caja)
+al que solo se agrega al final. Productos y cajas se guardan una vez en
+un diccionario y las columnas llevan su número. Los reportes (ingresos por
+hora, por categoría, productos más vendidos) recorren solo los días del
+rango y se calculan sobre las columnas completas (con NumPy si está
+instalado), sin consultar la base; los ingresos se suman en centavos
+enteros y se devuelven como Dinero (dinero.py).
+
+Las ventas se traen de la base con sincronizar(gestor). Cada línea guarda
+el id de su venta, así que una venta ya copiada se reconoce y no se
+duplica. Se vuelve a leer una ventana de ids por debajo de la última
+copiada para tomar las ventas que se confirmaron después de otra con id
+mayor (dos cajas a la vez).
+
+Uso:
+    libro = LibroVentas('libro_ventas')
+    libro.sincronizar(gestor)
+    libro.ingresos_por_hora(desde=date.today())
+    libro.mas_vendidos(10, desde=date.today() - timedelta(days=7))
+"""
+
+import heapq
+import os
+import threading
+from array import array
+from datetime import date, datetime, time as hora, timedelta, timezone
+
+from dinero import Dinero, sumar_por_grupo, valorar
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Nombre del archivo, tipo de array. ventas es el id_venta de la línea y
+# lineas cuántas tiene esa venta (0 en las que no vienen de la base)
+COLUMNAS = (('segundos', 'I'), ('productos', 'I'), ('cantidades', 'i'),
+            ('centavos', 'q'), ('cajas', 'H'), ('ventas', 'Q'), ('lineas', 'I'))
+
+# Ids por debajo de la última venta copiada que se vuelven a revisar
+VENTANA_REVISION = 1000
+
+
+class Particion:
+    """
+    Las líneas de un día, una array por columna
+    """
+    __slots__ = ('dia', 'directorio', 'columnas', '_archivos')
+
+    def __init__(self, dia, directorio):
+        self.dia = dia
+        self.directorio = directorio
+        self.columnas = {nombre: array(tipo) for nombre, tipo in COLUMNAS}
+        self._archivos = None
+
+    def __len__(self):
+        return len(self.columnas['segundos'])
+
+    def cargar(self):
+        """
+        Lee las columnas del disco. Si el proceso murió a mitad de una
+        escritura, las columnas se recortan al largo de la más corta y se
+        quita la última venta si no quedaron todas sus líneas (se vuelve a
+        copiar en la siguiente sincronización)
+        """
+        for nombre, columna in self.columnas.items():
+            ruta = os.path.join(self.directorio, nombre)
+            if os.path.exists(ruta):
+                with open(ruta, 'rb') as archivo:
+                    datos = archivo.read()
+                columna.frombytes(datos[:len(datos) - len(datos) % columna.itemsize])
+
+        filas = min(len(columna) for columna in self.columnas.values())
+        ventas, lineas = self.columnas['ventas'], self.columnas['lineas']
+        if filas and lineas[filas - 1]:
+            ultima = ventas[filas - 1]
+            inicio = filas - 1
+            while inicio > 0 and ventas[inicio - 1] == ultima:
+                inicio -= 1
+            if filas - inicio < lineas[filas - 1]:
+                filas = inicio
+
+        for nombre, columna in self.columnas.items():
+            if len(columna) > filas:
+                del columna[filas:]
+                with open(os.path.join(self.directorio, nombre), 'r+b') as archivo:
+                    archivo.truncate(filas * columna.itemsize)
+
+    def agregar(self, filas):
+        """
+        filas: [(segundo, producto, cantidad, centavos, caja, venta, lineas)]
+        """
+        if self._archivos is None:
+            os.makedirs(self.directorio, exist_ok=True)
+            self._archivos = {nombre: open(os.path.join(self.directorio, nombre), 'ab')
+                              for nombre, tipo in COLUMNAS}
+        for (nombre, tipo), valores in zip(COLUMNAS, zip(*filas)):
+            nuevas = array(tipo, valores)
+            self.columnas[nombre].extend(nuevas)
+            self._archivos[nombre].write(nuevas.tobytes())
+        for archivo in self._archivos.values():
+            archivo.flush()
+
+    def cerrar(self):
+        if self._archivos is not None:
+            for archivo in self._archivos.values():
+                archivo.close()
+            self._archivos = None
+
+
+class LibroVentas:
+    def __init__(self, directorio):
+        self.directorio = directorio
+        self.particiones = {}
+        self.productos = []
+        self.cajas = []
+        self._id_producto = {}
+        self._id_caja = {}
+        self.ultima_venta = 0
+        self.piso_ventas = 0
+        self._copiadas = set()
+        self._lock = threading.Lock()
+        self._archivos_diccionario = {}
+
+        os.makedirs(directorio, exist_ok=True)
+        self._cargar()
+
+    # ========== ALMACENAMIENTO ==========
+
+    def _ruta(self, nombre):
+        return os.path.join(self.directorio, nombre)
+
+    def _cargar(self):
+        for nombre, lista, indice in (('productos.txt', self.productos, self._id_producto),
+                                      ('cajas.txt', self.cajas, self._id_caja)):
+            if os.path.exists(self._ruta(nombre)):
+                with open(self._ruta(nombre), encoding='utf-8') as archivo:
+                    for linea in archivo:
+                        if linea.endswith('\n'):
+                            indice[linea[:-1]] = len(lista)
+                            lista.append(linea[:-1])
+        # Hasta piso_ventas todo está copiado
+        if os.path.exists(self._ruta('piso_ventas')):
+            with open(self._ruta('piso_ventas')) as archivo:
+                self.piso_ventas = int(archivo.read() or 0)
+
+        for nombre in sorted(os.listdir(self.directorio)):
+            try:
+                dia = date.fromisoformat(nombre)
+            except ValueError:
+                continue
+            particion = Particion(dia, self._ruta(nombre))
+            particion.cargar()
+            self.particiones[dia] = particion
+            self._copiadas.update(venta for venta in set(particion.columnas['ventas'])
+                                  if venta > self.piso_ventas)
+        self.ultima_venta = max(self._copiadas, default=self.piso_ventas)
+
+    def _numero(self, valor, lista, indice, archivo):
+        """
+        Número de un producto o caja; los nuevos se anotan en su diccionario
+        antes que cualquier línea que los use
+        """
+        numero = indice.get(valor)
+        if numero is None:
+            if '\n' in valor:
+                raise ValueError(f"Valor no válido para el libro: {valor!r}")
+            numero = indice[valor] = len(lista)
+            lista.append(valor)
+            if archivo not in self._archivos_diccionario:
+                self._archivos_diccionario[archivo] = open(self._ruta(archivo), 'a', encoding='utf-8')
+            self._archivos_diccionario[archivo].write(valor + '\n')
+            self._archivos_diccionario[archivo].flush()
+        return numero
+
+    def registrar(self, lineas, momento=None, caja=None, id_venta=0):
+        """
+        Agrega las líneas de una venta
+        lineas: (codigo_barras, cantidad, precio_unitario en pesos o Dinero)
+        momento: datetime de la venta (por defecto ahora)
+        id_venta: id en la base (0 si no viene de ella)
+        """
+        momento = momento or datetime.now()
+        dia = momento.date()
+        segundo = momento.hour * 3600 + momento.minute * 60 + momento.second
+        with self._lock:
+            id_caja = self._numero(caja or '', self.cajas, self._id_caja, 'cajas.txt')
+            lineas = list(lineas)
+            filas = [(segundo, self._numero(codigo, self.productos, self._id_producto, 'productos.txt'),
+                      cantidad, Dinero.de(precio).centavos, id_caja,
+                      id_venta, len(lineas) if id_venta else 0)
+                     for codigo, cantidad, precio in lineas]
+            if not filas:
+                return
+            particion = self.particiones.get(dia)
+            if particion is None:
+                particion = self.particiones[dia] = Particion(dia, self._ruta(dia.isoformat()))
+            particion.agregar(filas)
+
+    def sincronizar(self, gestor, tamano_lote=5000, ventana=VENTANA_REVISION):
+        """
+        Copia las ventas de la base que todavía no están en el libro.
+        Vuelve a leer desde `ventana` ids antes de la última copiada, para
+        tomar las que se confirmaron tarde, y salta las que ya tiene (cada
+        línea lleva su id_venta, así que una caída después de escribir no
+        duplica nada). Devuelve cuántas líneas se agregaron
+        """
+        # SQLite guarda CURRENT_TIMESTAMP como texto en UTC
+        utc = gestor.backend.nombre == 'SQLite'
+        lineas = 0
+
+        def copiar(venta, pendientes, momento, caja):
+            if venta in self._copiadas:
+                return 0
+            self.registrar(pendientes, momento, caja, venta)
+            self._copiadas.add(venta)
+            self.ultima_venta = max(self.ultima_venta, venta)
+            return len(pendientes)
+
+        with gestor.sesion() as cursor:
+            cursor.execute(
+                """
+                SELECT v.id_venta, v.fecha, v.caja, d.codigo_barras, d.cantidad, d.precio_unitario
+                FROM ventas v
+                JOIN detalle_ventas d ON d.id_venta = v.id_venta
+                WHERE v.id_venta > %s
+                ORDER BY v.id_venta, d.linea
+                """, (max(self.piso_ventas, self.ultima_venta - ventana),))
+            venta, momento, caja, pendientes = None, None, None, []
+            while True:
+                filas = cursor.fetchmany(tamano_lote)
+                for fila in filas:
+                    if fila['id_venta'] != venta:
+                        if pendientes:
+                            lineas += copiar(venta, pendientes, momento, caja)
+                        venta, caja, pendientes = fila['id_venta'], fila['caja'], []
+                        momento = fila['fecha']
+                        if isinstance(momento, str):
+                            momento = datetime.fromisoformat(momento)
+                        if utc:
+                            momento = momento.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+                    pendientes.append((fila['codigo_barras'], int(fila['cantidad']),
+                                       Dinero.de(fila['precio_unitario'])))
+                if not filas:
+                    break
+            if pendientes:
+                lineas += copiar(venta, pendientes, momento, caja)
+
+        # Lo que queda por debajo de la ventana ya no se vuelve a revisar
+        piso = max(self.piso_ventas, self.ultima_venta - ventana)
+        if piso != self.piso_ventas:
+            self.piso_ventas = piso
+            self._copiadas = {venta for venta in self._copiadas if venta > piso}
+            temporal = self._ruta('piso_ventas.tmp')
+            with open(temporal, 'w') as archivo:
+                archivo.write(str(piso))
+            os.replace(temporal, self._ruta('piso_ventas'))
+        return lineas
+
+    def cerrar(self):
+        with self._lock:
+            for particion in self.particiones.values():
+                particion.cerrar()
+            for archivo in self._archivos_diccionario.values():
+                archivo.close()
+            self._archivos_diccionario.clear()
+
+    def __len__(self):
+        return sum(len(particion) for particion in self.particiones.values())
+
+    # ========== SELECCIÓN DE RANGO ==========
+
+    def _rango(self, desde, hasta):
+        """
+        Partes de cada partición dentro de [desde, hasta): (partición,
+        segundo inicial, segundo final). desde/hasta son date o datetime
+        """
+        def punto(valor, predeterminado):
+            if valor is None:
+                return predeterminado
+            if not isinstance(valor, datetime):
+                valor = datetime.combine(valor, hora())
+            return valor
+
+        inicio = punto(desde, datetime.min)
+        fin = punto(hasta, datetime.max)
+        for dia in sorted(self.particiones):
+            if not inicio.date() <= dia <= fin.date():
+                continue
+            comienzo = datetime.combine(dia, hora())
+            desde_segundo = max(0, int((inicio - comienzo).total_seconds())) if inicio > comienzo else 0
+            hasta_segundo = int((fin - comienzo).total_seconds()) if fin.date() == dia else 86400
+            if hasta_segundo > desde_segundo:
+                yield self.particiones[dia], desde_segundo, hasta_segundo
+
+    def _columnas(self, desde, hasta, nombres):
+        """
+        Las columnas pedidas de las líneas del rango: arrays de NumPy si
+        está instalado, listas si no
+        """
+        if np is not None:
+            partes = {nombre: [] for nombre in nombres}
+            for particion, inicio, fin in self._rango(desde, hasta):
+                segundos = np.frombuffer(particion.columnas['segundos'], dtype=np.uint32)
+                completa = inicio == 0 and fin >= 86400
+                filtro = None if completa else (segundos >= inicio) & (segundos < fin)
+                for nombre in nombres:
+                    columna = particion.columnas[nombre]
+                    valores = np.frombuffer(columna, dtype=np.dtype(columna.typecode))
+                    partes[nombre].append(valores if filtro is None else valores[filtro])
+            return [np.concatenate(partes[nombre]) if partes[nombre] else np.zeros(0)
+                    for nombre in nombres]
+
+        resultado = [[] for _ in nombres]
+        for particion, inicio, fin in self._rango(desde, hasta):
+            columnas = [particion.columnas[nombre] for nombre in nombres]
+            if inicio == 0 and fin >= 86400:
+                for lista, columna in zip(resultado, columnas):
+                    lista.extend(columna)
+                continue
+            for fila, segundo in enumerate(particion.columnas['segundos']):
+                if inicio <= segundo < fin:
+                    for lista, columna in zip(resultado, columnas):
+                        lista.append(columna[fila])
+        return resultado
+
+    # ========== REPORTES ==========
+
+    def resumen(self, desde=None, hasta=None):
+        """
+        {'lineas', 'unidades', 'ingresos'} del rango
+        """
+        cantidades, centavos = self._columnas(desde, hasta, ('cantidades', 'centavos'))
+        unidades = int(cantidades.sum()) if np is not None else sum(cantidades)
+        return {'lineas': len(cantidades), 'unidades': unidades,
+                'ingresos': valorar(centavos, cantidades)}
+
+    def ingresos_por_hora(self, desde=None, hasta=None):
+        """
+        Lista de 24 importes: lo vendido en cada hora del día
+        """
+        segundos, cantidades, centavos = self._columnas(
+            desde, hasta, ('segundos', 'cantidades', 'centavos'))
+        horas = [segundo // 3600 for segundo in segundos] if np is None else segundos // 3600
+        return [Dinero(valor) for valor in sumar_por_grupo(horas, centavos, 24, cantidades)]
+
+    def ingresos_por_categoria(self, categorias, desde=None, hasta=None):
+        """
+        {categoría: importe}. categorias: {codigo_barras: categoría}; los
+        productos que no aparecen ahí se agrupan en 'Sin categoría'
+        """
+        nombres = sorted(set(categorias.values()) | {'Sin categoría'})
+        numero = {nombre: i for i, nombre in enumerate(nombres)}
+        sin_categoria = numero['Sin categoría']
+        de_producto = array('I', (numero.get(categorias.get(codigo), sin_categoria)
+                                  for codigo in self.productos))
+
+        productos, cantidades, centavos = self._columnas(
+            desde, hasta, ('productos', 'cantidades', 'centavos'))
+        if np is not None:
+            grupos = np.frombuffer(de_producto, dtype=np.uint32)[productos.astype(np.intp)]
+        else:
+            grupos = [de_producto[producto] for producto in productos]
+        valores = sumar_por_grupo(grupos, centavos, len(nombres), cantidades)
+        return {nombre: Dinero(valor) for nombre, valor in zip(nombres, valores)
+                if valor or nombre != 'Sin categoría'}
+
+    def mas_vendidos(self, n=10, desde=None, hasta=None, por='ingresos'):
+        """
+        [(codigo_barras, unidades, ingresos)] de los n productos con más
+        ingresos (por='ingresos') o más unidades (por='unidades')
+        """
+        productos, cantidades, centavos = self._columnas(
+            desde, hasta, ('productos', 'cantidades', 'centavos'))
+        ingresos = sumar_por_grupo(productos, centavos, len(self.productos), cantidades)
+        if np is not None:
+            indices = productos.astype(np.intp)
+            unidades = np.bincount(indices, weights=cantidades, minlength=len(self.productos))
+            orden = np.array(ingresos, dtype=np.int64) if por == 'ingresos' else unidades
+            mejores = np.flatnonzero(unidades)
+            if len(mejores) > n:
+                mejores = mejores[np.argpartition(-orden[mejores], n - 1)[:n]]
+            mejores = mejores[np.argsort(-orden[mejores], kind='stable')].tolist()
+            return [(self.productos[i], int(unidades[i]), Dinero(ingresos[i])) for i in mejores]
+
+        unidades = [0] * len(self.productos)
+        for producto, cantidad in zip(productos, cantidades):
+            unidades[producto] += cantidad
+        orden = ingresos if por == 'ingresos' else unidades
+        mejores = heapq.nlargest(n, (i for i, u in enumerate(unidades) if u), key=orden.__getitem__)
+        return [(self.productos[i], unidades[i], Dinero(ingresos[i])) for i in mejores]
+
+def categorias_de_productos(gestor):
+    """
+    {codigo_barras: nombre_categoria} de todo el catálogo, para
+    ingresos_por_categoria
+    """
+    with gestor.sesion() as cursor:
+        cursor.execute("SELECT codigo_barras, id_categoria FROM productos")
+        filas = gestor.completar_categorias(cursor.fetchall())
+    return {fila['codigo_barras']: fila['nombre_categoria'] for fila in filas}
+
+
+def pedir_rango():
+    """
+    Pide un rango de fechas en la terminal; vacío = últimos 7 días
+    """
+    texto = input("Desde (AAAA-MM-DD, vacío = últimos 7 días): ").strip()
+    try:
+        desde = date.fromisoformat(texto) if texto else date.today() - timedelta(days=6)
+        texto = input("Hasta (AAAA-MM-DD, vacío = hoy): ").strip()
+        hasta = date.fromisoformat(texto) if texto else date.today()
+    except ValueError:
+        print("❌ Fecha no válida, se usan los últimos 7 días")
+        desde, hasta = date.today() - timedelta(days=6), date.today()
+    return desde, hasta + timedelta(days=1)
@@ -0,0 +1,243 @@
+"""
+Monitor de inventario bajo por eventos
+En lugar de repetir reporte_inventario_bajo cada cierto tiempo, el monitor
+se registra como observador de un GestionInventario y revisa solo los
+productos que cambia cada operación (altas, ajustes, ventas, importaciones
+y el diario de cajas). Cada producto tiene su propio punto de reorden
+(tabla puntos_reorden; sin él se usa umbral_predeterminado). Cuando un
+producto baja de su punto se emite una alerta 'bajo' y cuando lo vuelve a
+alcanzar una 'repuesto'.
+
+El monitor solo ve los cambios hechos con el GestionInventario al que está
+registrado; si otros procesos también escriben, cargar() vuelve a leer el
+estado de la base y emite las alertas que falten.
+
+Uso:
+    monitor = MonitorInventario(gestor)
+    gestor.agregar_observador(monitor)
+    monitor.cargar()
+    for alerta in monitor.escuchar():   # hilo de reabastecimiento
+        ...
+"""
+
+import heapq
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from backends import Error
+
+Alerta = namedtuple('Alerta', 'tipo codigo_barras cantidad punto_reorden fecha')
+
+
+class MonitorInventario:
+    def __init__(self, gestor, umbral_predeterminado=10, tamano_cola=10000):
+        """
+        gestor: GestionInventario del que se leen cantidades y puntos
+        umbral_predeterminado: punto de reorden de los productos sin uno propio
+        tamano_cola: alertas que espera escuchar() antes de descartar las
+        más viejas
+        """
+        self.gestor = gestor
+        self.umbral_predeterminado = umbral_predeterminado
+        self._umbrales = {}     # solo los productos con punto propio
+        self._bajos = {}        # codigo_barras -> cantidad de los que están bajo su punto
+        self._heap = []         # (cantidad - punto, secuencia, codigo_barras)
+        self._vigentes = {}     # codigo_barras -> secuencia de su entrada válida en el heap
+        self._secuencia = 0
+        self._lock = threading.Lock()
+        self._suscriptores = []
+        self._cola = queue.Queue(maxsize=tamano_cola)
+        self.emitidas = 0
+        self.descartadas = 0
+        self.ultimo_error = None
+
+    # ========== ESTADO INICIAL Y PUNTOS DE REORDEN ==========
+
+    def cargar(self, avisar=True):
+        """
+        Lee de la base los puntos de reorden y los productos que están bajo
+        su punto. Usa el índice de cantidad y la llave de puntos_reorden, sin
+        recorrer productos. Con avisar=True emite las alertas de los
+        productos que cambiaron de estado desde la última carga
+        """
+        try:
+            with self.gestor.sesion() as cursor:
+                cursor.execute("""
+                SELECT r.codigo_barras, r.punto_reorden, p.cantidad
+                FROM puntos_reorden r
+                JOIN productos p ON p.codigo_barras = r.codigo_barras
+                """)
+                propios = cursor.fetchall()
+                cursor.execute("SELECT codigo_barras, cantidad FROM productos WHERE cantidad < %s",
+                               (self.umbral_predeterminado,))
+                bajo_predeterminado = cursor.fetchall()
+        except Error as e:
+            print(f"❌ Error al cargar el monitor de inventario: {e}")
+            return False
+
+        umbrales = {fila['codigo_barras']: fila['punto_reorden'] for fila in propios}
+        bajos = {fila['codigo_barras']: fila['cantidad'] for fila in bajo_predeterminado
+                 if fila['codigo_barras'] not in umbrales}
+        bajos.update((fila['codigo_barras'], fila['cantidad']) for fila in propios
+                     if fila['cantidad'] < fila['punto_reorden'])
+
+        with self._lock:
+            anteriores = set(self._bajos)
+            self._umbrales = umbrales
+            self._bajos = {}
+            self._heap = []
+            self._vigentes = {}
+            alertas = [self._evaluar(codigo, cantidad, codigo in anteriores)
+                       for codigo, cantidad in bajos.items()]
+            # Los que dejaron de estar bajo (repuestos o eliminados por otro
+            # proceso); su cantidad no se leyó
+            alertas += [Alerta('repuesto', codigo, None, self.punto_reorden(codigo), time.time())
+                        for codigo in anteriores - bajos.keys()]
+        if avisar:
+            self._emitir([alerta for alerta in alertas if alerta])
+        return True
+
+    def punto_reorden(self, codigo_barras):
+        return self._umbrales.get(codigo_barras, self.umbral_predeterminado)
+
+    def establecer_punto_reorden(self, codigo_barras, punto_reorden):
+        """
+        Guarda el punto de reorden de un producto (None vuelve al
+        predeterminado) y revisa enseguida su estado
+        """
+        try:
+            with self.gestor.sesion() as cursor:
+                if punto_reorden is None:
+                    cursor.execute("DELETE FROM puntos_reorden WHERE codigo_barras = %s",
+                                   (codigo_barras,))
+                else:
+                    cursor.execute(
+                        "INSERT INTO puntos_reorden (codigo_barras, punto_reorden) VALUES (%s, %s)"
+                        + self.gestor.backend.upsert('codigo_barras', ['punto_reorden']),
+                        (codigo_barras, punto_reorden))
+                self.gestor.connection.commit()
+                cursor.execute("SELECT cantidad FROM productos WHERE codigo_barras = %s",
+                               (codigo_barras,))
+                fila = cursor.fetchone()
+        except Error as e:
+            print(f"❌ Error al guardar el punto de reorden: {e}")
+            return False
+
+        with self._lock:
+            if punto_reorden is None:
+                self._umbrales.pop(codigo_barras, None)
+            else:
+                self._umbrales[codigo_barras] = punto_reorden
+        self.cantidades_actualizadas({codigo_barras: fila['cantidad'] if fila else None})
+        return True
+
+    # ========== EVENTOS ==========
+
+    def cantidades_actualizadas(self, cantidades):
+        """
+        Llamado por GestionInventario después de cada cambio confirmado
+        cantidades: {codigo_barras: cantidad}, None si el producto se eliminó
+        """
+        with self._lock:
+            alertas = [self._evaluar(codigo, cantidad, codigo in self._bajos)
+                       for codigo, cantidad in cantidades.items()]
+        self._emitir([alerta for alerta in alertas if alerta])
+
+    def _evaluar(self, codigo_barras, cantidad, estaba_bajo):
+        """
+        Actualiza el estado de un producto y devuelve la alerta si cruzó su
+        punto de reorden. Se llama con el lock tomado
+        """
+        if cantidad is None:  # producto eliminado
+            self._umbrales.pop(codigo_barras, None)
+            self._bajos.pop(codigo_barras, None)
+            self._vigentes.pop(codigo_barras, None)
+            return None
+
+        punto = self._umbrales.get(codigo_barras, self.umbral_predeterminado)
+        if cantidad < punto:
+            self._bajos[codigo_barras] = cantidad
+            self._secuencia += 1
+            self._vigentes[codigo_barras] = self._secuencia
+            heapq.heappush(self._heap, (cantidad - punto, self._secuencia, codigo_barras))
+            self._compactar()
+            if estaba_bajo:
+                return None
+            return Alerta('bajo', codigo_barras, cantidad, punto, time.time())
+
+        if estaba_bajo:
+            self._bajos.pop(codigo_barras, None)
+            self._vigentes.pop(codigo_barras, None)
+            return Alerta('repuesto', codigo_barras, cantidad, punto, time.time())
+        return None
+
+    def _compactar(self):
+        """
+        Las entradas viejas del heap se descartan de forma perezosa; cuando
+        son mayoría se reconstruye solo con las vigentes
+        """
+        if len(self._heap) <= 2 * len(self._vigentes) + 64:
+            return
+        self._heap = [entrada for entrada in self._heap
+                      if self._vigentes.get(entrada[2]) == entrada[1]]
+        heapq.heapify(self._heap)
+
+    def _emitir(self, alertas):
+        for alerta in alertas:
+            self.emitidas += 1
+            for funcion in list(self._suscriptores):
+                try:
+                    funcion(alerta)
+                except Exception as e:
+                    # Un suscriptor con errores no debe tumbar la venta que
+                    # disparó la alerta
+                    self.ultimo_error = repr(e)
+            try:
+                self._cola.put_nowait(alerta)
+            except queue.Full:
+                try:
+                    self._cola.get_nowait()
+                    self.descartadas += 1
+                except queue.Empty:
+                    pass
+                self._cola.put_nowait(alerta)
+
+    # ========== CONSUMO DE ALERTAS ==========
+
+    def suscribir(self, funcion):
+        """
+        funcion(alerta) se llama en el hilo que hizo el cambio, apenas se
+        confirma; debe ser rápida
+        """
+        self._suscriptores.append(funcion)
+
+    def escuchar(self, espera=None):
+        """
+        Generador de alertas en orden de llegada. Con espera termina si pasan
+        esos segundos sin alertas; sin ella espera indefinidamente
+        """
+        while True:
+            try:
+                yield self._cola.get(timeout=espera)
+            except queue.Empty:
+                return
+
+    def urgentes(self, cantidad=10):
+        """
+        Productos bajo su punto de reorden, primero los que más les falta:
+        lista de (codigo_barras, cantidad, punto_reorden)
+        """
+        with self._lock:
+            vigentes = (entrada for entrada in self._heap
+                        if self._vigentes.get(entrada[2]) == entrada[1])
+            return [(codigo, self._bajos[codigo], self.punto_reorden(codigo))
+                    for _, _, codigo in heapq.nsmallest(cantidad, vigentes)]
+
+    def bajos(self):
+        """
+        {codigo_barras: cantidad} de todos los productos bajo su punto
+        """
+        with self._lock:
+            return dict(self._bajos)
@@ -1,31 +1,48 @@
-productos = {}
+from conteo_inventario import conteo_interactivo
+from dinero import Dinero
+from snapshot_catalogo import AlmacenCatalogo
+
+# Lo capturado se conserva entre ejecuciones en productos.snap/.delta
+almacen = AlmacenCatalogo('productos')
+productos = almacen.abrir()
 flag = True
 
 def nuevo():
     print('Nuevo producto')
     nombre = str(input('Nombre de producto: '))
-    costo = float(input("Costo de producto $:"))
+    costo = Dinero.de(input("Costo de producto $:"))
     cantidad = int(input('Cantidad inicial de este producto: '))
     categoria = str(input('Categoria de producto: '))
-    productos [nombre] = [costo,cantidad,categoria]
-    print(productos)
+    if nombre in productos:
+        print(f'El producto {nombre} ya esta registrado')
+        return
+    # Sin código de barras: el nombre sirve también como código
+    productos.agregar(nombre, nombre, costo, cantidad, categoria)
+    print(productos.obtener(nombre))
 
 def venta():
     print("Elegiste vender un producto")
-    
+    nombre = str(input('Nombre de producto a vender: '))
+    if nombre not in productos:
+        print(f'El producto {nombre} no esta registrado')
+        return
+    cantidad = int(input('Cantidad a vender: '))
+    importe = productos.vender(nombre, cantidad)
+    if importe is not None:
+        print(f'Vendiste {cantidad} de {nombre} por ${importe:.2f}')
+        print(f'Quedan {productos.cantidad(nombre)} en inventario')
+    else:
+        print(f'No hay suficiente {nombre} para la venta (disponible: {productos.cantidad(nombre)})')
 
-def inventario():#funcion a mejorar
-    prod_inventario = str(input('Nombre de producto encontrado: '))
-    if prod_inventario in productos:
-        contado = []
-        suma = 0
-        while contado != cantidad:
-            print('te faltan')
+
+def inventario():
+    print('Conteo de inventario')
+    conteo_interactivo(productos)
 
 while flag is True:
     print('Funciones de menu')
 
-    print('1.- Agregar producto','\n2.- Venta de producto','\n3.- Inventario')
+    print('1.- Agregar producto','\n2.- Venta de producto','\n3.- Inventario','\n4.- Salir')
 
     menu = int(input('Seleccione una opcion de menu: '))
 
@@ -37,3 +54,8 @@ while flag is True:
     
     elif menu == 3:
         inventario()
+
+    elif menu == 4:
+        almacen.guardar()
+        almacen.cerrar()
+        flag = False
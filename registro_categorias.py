@@ -0,0 +1,77 @@
+"""
+Registro de categorías en memoria
+Las categorías son pocas y casi no cambian, así que GestionInventario las
+lee una vez y las guarda en dos diccionarios (id -> nombre y nombre -> id).
+Las consultas de productos ya no hacen JOIN con categorias: leen
+id_categoria y el nombre se completa desde aquí. crear_categoria agrega la
+nueva al registro; una categoría creada desde otro proceso aparece como un
+id desconocido y hace que el registro se recargue.
+
+Los nombres se buscan sin distinguir mayúsculas (casefold), como los
+resolvía la collation de MySQL cuando la búsqueda se hacía en la base.
+"""
+
+import threading
+
+
+class RegistroCategorias:
+    def __init__(self):
+        self._por_id = {}
+        self._por_nombre = {}
+        self._lock = threading.Lock()
+        self.cargado = False
+        self.cargas = 0
+
+    def cargar(self, filas):
+        """
+        Reemplaza el registro con filas {'id_categoria', 'nombre_categoria'}
+        """
+        por_id = {fila['id_categoria']: fila['nombre_categoria'] for fila in filas}
+        with self._lock:
+            # Se reemplazan los diccionarios completos: quien lee a la vez
+            # ve el registro anterior o el nuevo, nunca uno a medias
+            self._por_id = por_id
+            self._por_nombre = {nombre.casefold(): id_categoria
+                                for id_categoria, nombre in por_id.items()}
+            self.cargado = True
+            self.cargas += 1
+
+    def agregar(self, id_categoria, nombre):
+        with self._lock:
+            por_id = dict(self._por_id)
+            por_id[id_categoria] = nombre
+            por_nombre = dict(self._por_nombre)
+            por_nombre[nombre.casefold()] = id_categoria
+            self._por_id, self._por_nombre = por_id, por_nombre
+
+    def nombre(self, id_categoria):
+        return self._por_id.get(id_categoria)
+
+    def id(self, nombre):
+        return self._por_nombre.get(nombre.casefold())
+
+    def __contains__(self, id_categoria):
+        return id_categoria in self._por_id
+
+    def __len__(self):
+        return len(self._por_id)
+
+    def nombres(self):
+        """
+        [(nombre, id_categoria)] en orden alfabético
+        """
+        return sorted((nombre, id_categoria) for id_categoria, nombre in self._por_id.items())
+
+    def completar(self, productos):
+        """
+        Pone nombre_categoria en cada fila de producto. Devuelve False si
+        alguna categoría no está en el registro (quedó en None)
+        """
+        por_id = self._por_id
+        completo = True
+        for producto in productos:
+            nombre = por_id.get(producto['id_categoria'])
+            if nombre is None:
+                completo = False
+            producto['nombre_categoria'] = nombre
+        return completo
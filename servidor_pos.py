@@ -0,0 +1,285 @@
+"""
+Servidor POS HTTP/JSON
+Un solo proceso de larga duración comparte entre todas las terminales el
+pool de conexiones, la caché de productos y el índice de búsqueda. Los
+escaneos que llegan casi al mismo tiempo y no están en la caché se agrupan
+en una sola consulta (AgrupadorConsultas).
+
+Rutas:
+    GET  /productos/<codigo>            escaneo de un producto
+    POST /productos/consulta            {"codigos": [...]}
+    POST /productos/importar            {"filas": [...], "actualizar_existentes": false}
+    POST /categorias                    {"nombre": "...", "descripcion": "..."}
+    GET  /buscar?texto=...&limite=10    búsqueda por nombre tolerante a errores
+    POST /ventas                        {"lineas": [[codigo, cantidad], ...], "caja": "..."}
+    POST /inventario                    {"codigo_barras", "cantidad", "operacion"}
+    GET  /reportes/valor
+    GET  /reportes/bajo?limite=10
+    GET  /estado
+
+Las rutas no piden autenticación y registran ventas y cambian existencias,
+así que el servidor solo atiende en 127.0.0.1 salvo que se pida --exponer.
+
+Uso:
+    python servidor_pos.py --puerto 8080 --pool 16
+    python servidor_pos.py --sqlite tienda.db
+    python servidor_pos.py --escuchar 0.0.0.0 --exponer   # terminales en la red
+"""
+
+import argparse
+import ipaddress
+import json
+import sys
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from backends import BackendSQLite, Error, ErrorPool
+from base_datos import GestionInventario
+from dinero import Dinero
+
+
+class AgrupadorConsultas:
+    """
+    Junta los escaneos que no están en la caché: el primer hilo que pide un
+    código espera unos milisegundos a que lleguen más y los resuelve todos
+    con una sola consulta; los demás solo esperan su resultado
+    """
+    def __init__(self, gestor, espera=0.002, maximo=200):
+        self.gestor = gestor
+        self.espera = espera
+        self.maximo = maximo
+        self._lock = threading.Lock()
+        self._lote_lleno = threading.Condition(self._lock)
+        self._pendientes = {}   # codigo_barras -> [evento, producto, error]
+        self.consultas = 0
+        self.agrupados = 0
+
+    def obtener(self, codigo_barras):
+        producto = self.gestor.cache_productos.obtener(codigo_barras)
+        if producto is not None:
+            return producto
+
+        with self._lock:
+            pendiente = self._pendientes.get(codigo_barras)
+            lider = not self._pendientes
+            if pendiente is None:
+                pendiente = self._pendientes[codigo_barras] = [threading.Event(), None, None]
+                if len(self._pendientes) >= self.maximo:
+                    self._lote_lleno.notify()
+            if lider:
+                self._lote_lleno.wait(self.espera)
+                lote, self._pendientes = self._pendientes, {}
+
+        if lider:
+            # Pase lo que pase con la consulta, los que esperan en el lote se
+            # despiertan con el resultado o con el error
+            productos = {}
+            error = RuntimeError("La consulta agrupada no terminó")
+            try:
+                productos = self.gestor.obtener_productos(list(lote))
+                error = None
+            except Exception as e:
+                error = e
+            finally:
+                with self._lock:
+                    self.consultas += 1
+                    self.agrupados += len(lote)
+                for codigo, entrada in lote.items():
+                    entrada[1], entrada[2] = productos.get(codigo), error
+                    entrada[0].set()
+
+        pendiente[0].wait()
+        if pendiente[2] is not None:
+            raise pendiente[2]
+        return pendiente[1]
+
+
+def _a_json(valor):
+    if isinstance(valor, (Decimal, Dinero)):
+        return float(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f"{type(valor).__name__} no se puede convertir a JSON")
+
+
+class ManejadorPOS(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # conexiones persistentes para las terminales
+    # Sin Nagle: encabezados y cuerpo salen en escrituras separadas y con él
+    # cada respuesta esperaría el ACK retrasado del cliente (~40 ms)
+    disable_nagle_algorithm = True
+
+    # El servidor guarda el gestor y el agrupador (ver crear_servidor)
+    def do_GET(self):
+        self._atender('GET')
+
+    def do_POST(self):
+        self._atender('POST')
+
+    def log_message(self, formato, *args):
+        if self.server.registrar_peticiones:
+            super().log_message(formato, *args)
+
+    def _atender(self, metodo):
+        url = urlsplit(self.path)
+        partes = [unquote(parte) for parte in url.path.strip('/').split('/')]
+        parametros = {clave: valores[-1] for clave, valores in parse_qs(url.query).items()}
+        try:
+            datos = self._leer_json() if metodo == 'POST' else {}
+            estado, respuesta = self._despachar(metodo, partes, parametros, datos)
+        except (ValueError, KeyError, TypeError) as e:
+            estado, respuesta = 400, {'error': f"Petición inválida: {e}"}
+        except ErrorPool as e:
+            estado, respuesta = 503, {'error': str(e)}
+        except Error as e:
+            estado, respuesta = 500, {'error': str(e)}
+        self._responder(estado, respuesta)
+
+    def _leer_json(self):
+        longitud = int(self.headers.get('Content-Length') or 0)
+        if not longitud:
+            return {}
+        return json.loads(self.rfile.read(longitud))
+
+    def _responder(self, estado, respuesta):
+        cuerpo = json.dumps(respuesta, default=_a_json, ensure_ascii=False).encode()
+        self.send_response(estado)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _despachar(self, metodo, partes, parametros, datos):
+        gestor = self.server.gestor
+        ruta = (metodo, partes[0] if partes else '', len(partes))
+
+        if ruta == ('GET', 'productos', 2):
+            producto = self.server.agrupador.obtener(partes[1])
+            if producto is None:
+                return 404, {'error': "Producto no encontrado"}
+            return 200, producto
+
+        if ruta == ('POST', 'productos', 2) and partes[1] == 'consulta':
+            return 200, {'productos': gestor.obtener_productos(datos['codigos'])}
+
+        if ruta == ('POST', 'productos', 2) and partes[1] == 'importar':
+            resumen = gestor.importar_productos(datos['filas'], datos.get('tamano_lote', 1000),
+                                                datos.get('actualizar_existentes', False))
+            return 200, resumen
+
+        if ruta == ('POST', 'categorias', 1):
+            id_categoria = gestor.obtener_categoria_id(datos['nombre'])
+            if id_categoria is not None:
+                return 200, {'id_categoria': id_categoria}
+            id_categoria = gestor.crear_categoria(datos['nombre'], datos.get('descripcion', ''))
+            if id_categoria is None:
+                return 409, {'error': "No se pudo crear la categoría"}
+            return 201, {'id_categoria': id_categoria}
+
+        if ruta == ('GET', 'buscar', 1):
+            resultados = gestor.sugerir_productos(parametros['texto'],
+                                                  int(parametros.get('limite', 10)))
+            return 200, {'resultados': [{'codigo_barras': codigo, 'nombre_producto': nombre,
+                                         'puntaje': puntaje}
+                                        for codigo, nombre, puntaje in resultados]}
+
+        if ruta == ('POST', 'ventas', 1):
+            lineas = [(str(codigo), int(cantidad)) for codigo, cantidad in datos['lineas']]
+            id_venta = gestor.registrar_venta(lineas, datos.get('caja'))
+            if id_venta is None:
+                return 409, {'error': "Venta rechazada: producto inexistente o sin unidades"}
+            return 201, {'id_venta': id_venta}
+
+        if ruta == ('POST', 'inventario', 1):
+            if gestor.actualizar_inventario(datos['codigo_barras'], int(datos['cantidad']),
+                                            datos.get('operacion', 'agregar')):
+                return 200, {'ok': True}
+            return 409, {'error': "No se pudo actualizar el inventario"}
+
+        if ruta == ('GET', 'reportes', 2) and partes[1] == 'valor':
+            return 200, {'total': gestor.valor_total_inventario(),
+                         'categorias': gestor.valor_por_categoria()}
+
+        if ruta == ('GET', 'reportes', 2) and partes[1] == 'bajo':
+            return 200, {'productos': gestor.reporte_inventario_bajo(int(parametros.get('limite', 10)))}
+
+        if ruta == ('GET', 'estado', 1):
+            agrupador = self.server.agrupador
+            return 200, {'motor': gestor.backend.descripcion(),
+                         'pool': gestor.pool_size,
+                         'cache': gestor.cache_productos.estadisticas(),
+                         'consultas_agrupadas': agrupador.consultas,
+                         'escaneos_agrupados': agrupador.agrupados,
+                         'activo_desde': self.server.inicio}
+
+        return 404, {'error': f"Ruta no encontrada: {metodo} {self.path}"}
+
+
+def crear_servidor(gestor, host='127.0.0.1', puerto=8080, registrar_peticiones=False):
+    """
+    Crea el servidor HTTP (sin arrancarlo) sobre un gestor ya conectado
+    """
+    servidor = ThreadingHTTPServer((host, puerto), ManejadorPOS)
+    servidor.daemon_threads = True
+    servidor.gestor = gestor
+    servidor.agrupador = AgrupadorConsultas(gestor)
+    servidor.registrar_peticiones = registrar_peticiones
+    servidor.inicio = time.time()
+    return servidor
+
+
+def _es_local(host):
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor POS HTTP/JSON")
+    parser.add_argument('--host', default='localhost', help="servidor de base de datos")
+    parser.add_argument('--database', default='gestion_inventario')
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--sqlite', metavar='RUTA',
+                        help="usa una base SQLite embebida en lugar de MySQL")
+    parser.add_argument('--escuchar', default='127.0.0.1', help="dirección donde atender")
+    parser.add_argument('--exponer', action='store_true',
+                        help="permite atender fuera de 127.0.0.1 (las rutas no piden autenticación)")
+    parser.add_argument('--puerto', type=int, default=8080)
+    parser.add_argument('--pool', type=int, default=16, help="conexiones a la base")
+    parser.add_argument('--registrar', action='store_true', help="muestra cada petición")
+    args = parser.parse_args()
+    if not args.exponer and not _es_local(args.escuchar):
+        parser.error(f"--escuchar {args.escuchar} expone el servidor sin autenticación; "
+                     "agrega --exponer para permitirlo")
+
+    gestor = GestionInventario(host=args.host, database=args.database, user=args.user,
+                               password=args.password, pool_size=args.pool,
+                               backend=BackendSQLite(args.sqlite) if args.sqlite else None,
+                               mostrar_mensajes=False)
+    if not gestor.conectar():
+        print(f"❌ No se pudo conectar a {gestor.backend.descripcion()}")
+        sys.exit(1)
+    gestor.construir_indice_nombres()
+
+    servidor = crear_servidor(gestor, args.escuchar, args.puerto, args.registrar)
+    print(f"🖥️ Servidor POS en http://{args.escuchar}:{args.puerto} "
+          f"({gestor.backend.descripcion()}, pool de {args.pool})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        gestor.desconectar()
+        print("🔌 Servidor detenido")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+"""
+Snapshot binario del catálogo en memoria
+Guarda un Catalogo (catalogo.py) en un archivo que se abre con mmap: las
+columnas numéricas y las tablas de los índices se copian tal cual a sus
+arrays, y los textos (códigos y nombres) se leen del mapa solo cuando se
+piden, así que abrir un millón de productos no requiere interpretar nada
+fila por fila. Los cambios entre un snapshot y el siguiente van a un
+registro de solo anexado (<ruta>.delta) que se aplica al abrir.
+
+Formato (little-endian, secciones alineadas a 8 bytes):
+    cabecera   MAGICO, versión, tipo de códigos y nombres, CRC32 del resto,
+               generación, filas y (desplazamiento, largo) de cada sección
+    secciones  precios q (centavos), cantidades q, categorías H, códigos, nombres,
+               nombres de categoría y las dos tablas de índice i
+Una columna de textos son dos secciones: desplazamientos Q (filas + 1) y
+los bytes UTF-8 seguidos; una columna de enteros es una sola sección q.
+
+Uso:
+    almacen = AlmacenCatalogo('productos')
+    catalogo = almacen.abrir()        # snapshot + cambios pendientes
+    catalogo.vender('7501', 2)        # queda en productos.delta
+    almacen.guardar()                 # nuevo snapshot, registro vacío
+"""
+
+import mmap
+import os
+import struct
+import zlib
+from array import array
+
+from catalogo import Catalogo
+from dinero import Dinero
+
+MAGICO = b'CATALOGO'
+VERSION = 2
+
+TEXTO = 0
+ENTERO = 1
+
+SECCIONES = ('precios', 'cantidades', 'categorias', 'codigos', 'codigos_desp',
+             'nombres', 'nombres_desp', 'categorias_nombres', 'categorias_desp',
+             'tabla_codigos', 'tabla_nombres')
+
+CABECERA = struct.Struct('<8sHBBIQQ' + 'QQ' * len(SECCIONES))
+
+MAGICO_DELTA = b'CATDELTA'
+CABECERA_DELTA = struct.Struct('<8sQ')
+REGISTRO = struct.Struct('<II')
+
+OPERACIONES = {'agregar': b'A', 'eliminar': b'E', 'precio': b'P', 'cantidad': b'C'}
+NOMBRE_OPERACION = {codigo: nombre for nombre, codigo in OPERACIONES.items()}
+
+
+class SnapshotInvalido(Exception):
+    pass
+
+
+# ========== COLUMNAS DE TEXTO ==========
+
+class TextosMapeados:
+    """
+    Columna de textos respaldada por el snapshot: cada valor se decodifica
+    al pedirlo. Admite lo que el catálogo le hace a sus listas (leer,
+    reemplazar, agregar al final y quitar el último); lo nuevo vive en
+    memoria y lo del archivo no se toca
+    """
+    __slots__ = ('_datos', '_desp', '_base', '_cambios', '_extra')
+
+    def __init__(self, datos, desplazamientos):
+        self._datos = datos
+        self._desp = desplazamientos
+        self._base = len(desplazamientos) - 1
+        self._cambios = {}
+        self._extra = []
+
+    def __len__(self):
+        return self._base + len(self._extra)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if i >= self._base:
+            return self._extra[i - self._base]
+        valor = self._cambios.get(i)
+        if valor is None:
+            valor = str(self._datos[self._desp[i]:self._desp[i + 1]], 'utf-8')
+        return valor
+
+    def __setitem__(self, i, valor):
+        if i < 0:
+            i += len(self)
+        if i >= self._base:
+            self._extra[i - self._base] = valor
+        else:
+            self._cambios[i] = valor
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, valor):
+        self._extra.append(valor)
+
+    def pop(self):
+        if self._extra:
+            return self._extra.pop()
+        valor = self[self._base - 1]
+        self._base -= 1
+        self._cambios.pop(self._base, None)
+        return valor
+
+
+def _columna_texto(valores):
+    """
+    (bytes seguidos, desplazamientos) de una columna de textos
+    """
+    codificados = [valor.encode() for valor in valores]
+    desplazamientos = array('Q', [0])
+    total = 0
+    for valor in codificados:
+        total += len(valor)
+        desplazamientos.append(total)
+    return b''.join(codificados), desplazamientos.tobytes()
+
+
+def _tipo_columna(valores):
+    if all(type(valor) is int for valor in valores):
+        return ENTERO
+    if all(isinstance(valor, str) for valor in valores):
+        return TEXTO
+    raise TypeError("Una columna del snapshot debe ser toda de textos o toda de enteros")
+
+
+# ========== GUARDAR Y CARGAR ==========
+
+def guardar_snapshot(catalogo, ruta, generacion=0):
+    """
+    Escribe el catálogo completo de forma atómica (archivo temporal,
+    fsync y rename): si el proceso muere a la mitad, el snapshot anterior
+    sigue intacto
+    """
+    (codigos, nombres, precios, cantidades, categorias,
+     nombres_categoria, tabla_codigos, tabla_nombres) = catalogo.columnas()
+
+    tipo_codigos = _tipo_columna(codigos)
+    tipo_nombres = _tipo_columna(nombres)
+
+    secciones = [precios.tobytes(), cantidades.tobytes(), categorias.tobytes()]
+    for valores, tipo in ((codigos, tipo_codigos), (nombres, tipo_nombres)):
+        if tipo == ENTERO:
+            secciones.extend((array('q', valores).tobytes(), b''))
+        else:
+            secciones.extend(_columna_texto(valores))
+    secciones.extend(_columna_texto(nombres_categoria))
+    secciones.extend((tabla_codigos.tobytes(), tabla_nombres.tobytes()))
+
+    posiciones = []
+    cuerpo = bytearray()
+    for datos in secciones:
+        cuerpo.extend(bytes(-len(cuerpo) % 8))
+        posiciones.extend((CABECERA.size + len(cuerpo), len(datos)))
+        cuerpo.extend(datos)
+    cuerpo.extend(bytes(-(CABECERA.size + len(cuerpo)) % 8))
+
+    cabecera = CABECERA.pack(MAGICO, VERSION, tipo_codigos, tipo_nombres,
+                             zlib.crc32(cuerpo), generacion, len(codigos), *posiciones)
+
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'wb') as archivo:
+        archivo.write(cabecera)
+        archivo.write(cuerpo)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(temporal, ruta)
+
+
+def cargar_snapshot(ruta, verificar=True):
+    """
+    Abre un snapshot con mmap. Devuelve (catalogo, generacion)
+    El mapa queda abierto mientras el catálogo use sus textos
+    """
+    with open(ruta, 'rb') as archivo:
+        mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mapa) < CABECERA.size:
+        raise SnapshotInvalido(f"{ruta}: archivo truncado")
+    (magico, version, tipo_codigos, tipo_nombres, crc, generacion, filas,
+     *posiciones) = CABECERA.unpack_from(mapa)
+    if magico != MAGICO:
+        raise SnapshotInvalido(f"{ruta}: no es un snapshot de catálogo")
+    if version != VERSION:
+        raise SnapshotInvalido(f"{ruta}: versión {version} no soportada (se espera {VERSION})")
+
+    vista = memoryview(mapa)
+    if verificar and zlib.crc32(vista[CABECERA.size:]) != crc:
+        raise SnapshotInvalido(f"{ruta}: suma de verificación incorrecta")
+
+    secciones = {}
+    for i, nombre in enumerate(SECCIONES):
+        inicio, largo = posiciones[2 * i], posiciones[2 * i + 1]
+        if inicio + largo > len(mapa):
+            raise SnapshotInvalido(f"{ruta}: sección {nombre} fuera del archivo")
+        secciones[nombre] = vista[inicio:inicio + largo]
+    for nombre, ancho in (('precios', 8), ('cantidades', 8), ('categorias', 2)):
+        if len(secciones[nombre]) != filas * ancho:
+            raise SnapshotInvalido(f"{ruta}: la sección {nombre} no tiene {filas} filas")
+
+    def columna_numerica(tipo, nombre):
+        columna = array(tipo)
+        columna.frombytes(secciones[nombre])
+        return columna
+
+    def columna_claves(tipo, nombre):
+        if tipo == ENTERO:
+            return columna_numerica('q', nombre).tolist()
+        return TextosMapeados(secciones[nombre], secciones[f"{nombre}_desp"].cast('Q'))
+
+    categorias = TextosMapeados(secciones['categorias_nombres'],
+                                secciones['categorias_desp'].cast('Q'))
+    catalogo = Catalogo.desde_columnas(
+        columna_claves(tipo_codigos, 'codigos'),
+        columna_claves(tipo_nombres, 'nombres'),
+        columna_numerica('q', 'precios'),
+        columna_numerica('q', 'cantidades'),
+        columna_numerica('H', 'categorias'),
+        list(categorias),
+        columna_numerica('i', 'tabla_codigos'),
+        columna_numerica('i', 'tabla_nombres'))
+    if len(catalogo.columnas()[1]) != filas:
+        raise SnapshotInvalido(f"{ruta}: columnas de distinto largo")
+    return catalogo, generacion
+
+
+# ========== REGISTRO DE CAMBIOS ==========
+
+def _codificar(valor):
+    if isinstance(valor, Dinero):
+        return b'm' + struct.pack('<q', valor.centavos)
+    if isinstance(valor, bool) or not isinstance(valor, (int, float, str)):
+        raise TypeError(f"Valor no soportado en el registro: {valor!r}")
+    if isinstance(valor, int):
+        return b'i' + struct.pack('<q', valor)
+    if isinstance(valor, float):
+        return b'f' + struct.pack('<d', valor)
+    datos = valor.encode()
+    return b's' + struct.pack('<I', len(datos)) + datos
+
+
+def _decodificar(datos):
+    valores = []
+    i = 0
+    while i < len(datos):
+        tipo = datos[i:i + 1]
+        if tipo == b'i':
+            valores.append(struct.unpack_from('<q', datos, i + 1)[0])
+            i += 9
+        elif tipo == b'm':
+            valores.append(Dinero(struct.unpack_from('<q', datos, i + 1)[0]))
+            i += 9
+        elif tipo == b'f':
+            valores.append(struct.unpack_from('<d', datos, i + 1)[0])
+            i += 9
+        else:
+            largo = struct.unpack_from('<I', datos, i + 1)[0]
+            valores.append(datos[i + 5:i + 5 + largo].decode())
+            i += 5 + largo
+    return valores
+
+
+class RegistroCambios:
+    """
+    Archivo de solo anexado con un registro por cambio: largo, CRC32 y
+    operación con sus valores. Se escribe al sistema operativo en cada
+    cambio; con sincronizar=True además se hace fsync
+    """
+
+    def __init__(self, ruta, generacion, sincronizar=False):
+        self.ruta = ruta
+        self.generacion = generacion
+        self.sincronizar = sincronizar
+        self.registros = 0
+        self._archivo = None
+
+    def crear(self):
+        """
+        Registro vacío para la generación actual (reemplaza al anterior)
+        """
+        temporal = f"{self.ruta}.tmp"
+        with open(temporal, 'wb') as archivo:
+            archivo.write(CABECERA_DELTA.pack(MAGICO_DELTA, self.generacion))
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, self.ruta)
+        self.registros = 0
+
+    def leer(self):
+        """
+        Operaciones guardadas, en orden. Se detiene en el primer registro
+        incompleto o dañado (una escritura cortada) y lo recorta del archivo.
+        Un registro de otra generación se reemplaza por uno vacío de la
+        actual antes de anotar nada más
+        """
+        with open(self.ruta, 'rb') as archivo:
+            datos = archivo.read()
+        if len(datos) < CABECERA_DELTA.size:
+            # Cabecera cortada: el proceso murió creando el registro
+            self.crear()
+            return []
+        magico, generacion = CABECERA_DELTA.unpack_from(datos)
+        if magico != MAGICO_DELTA:
+            raise SnapshotInvalido(f"{self.ruta}: no es un registro de cambios")
+        if generacion != self.generacion:
+            # Es de un snapshot anterior (el proceso murió entre guardar el
+            # snapshot y crear el registro): sus cambios ya están incluidos.
+            # Si no se reemplaza, lo que se anote ahora quedaría bajo la
+            # generación vieja y se descartaría al abrir otra vez
+            self.crear()
+            return []
+
+        operaciones = []
+        posicion = CABECERA_DELTA.size
+        while posicion + REGISTRO.size <= len(datos):
+            largo, crc = REGISTRO.unpack_from(datos, posicion)
+            carga = datos[posicion + REGISTRO.size:posicion + REGISTRO.size + largo]
+            if len(carga) < largo or zlib.crc32(carga) != crc:
+                break
+            operaciones.append((NOMBRE_OPERACION[carga[:1]], _decodificar(carga[1:])))
+            posicion += REGISTRO.size + largo
+        if posicion != len(datos):
+            with open(self.ruta, 'r+b') as archivo:
+                archivo.truncate(posicion)
+        self.registros = len(operaciones)
+        return operaciones
+
+    def registrar(self, operacion, *valores):
+        if self._archivo is None:
+            self._archivo = open(self.ruta, 'ab', buffering=0)
+        carga = OPERACIONES[operacion] + b''.join(map(_codificar, valores))
+        self._archivo.write(REGISTRO.pack(len(carga), zlib.crc32(carga)) + carga)
+        if self.sincronizar:
+            os.fsync(self._archivo.fileno())
+        self.registros += 1
+
+    def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+
+def aplicar(catalogo, operaciones):
+    for operacion, valores in operaciones:
+        if operacion == 'agregar':
+            catalogo.agregar(*valores)
+        elif operacion == 'eliminar':
+            catalogo.eliminar(valores[0])
+        elif operacion == 'precio':
+            catalogo.establecer_precio(*valores)
+        else:
+            catalogo.establecer_cantidad(*valores)
+
+
+# ========== ALMACÉN ==========
+
+class AlmacenCatalogo:
+    """
+    Snapshot (<ruta>.snap) más registro de cambios (<ruta>.delta). Ambos
+    llevan la generación: un registro de otra generación es de antes del
+    último snapshot y se ignora, así que guardar es seguro aunque el
+    proceso muera entre escribir el snapshot y vaciar el registro
+    """
+
+    def __init__(self, ruta, sincronizar=False, compactar_cada=100_000):
+        self.ruta_snapshot = f"{ruta}.snap"
+        self.ruta_registro = f"{ruta}.delta"
+        self.sincronizar = sincronizar
+        self.compactar_cada = compactar_cada
+        self.catalogo = None
+        self.registro = None
+
+    def abrir(self, verificar=True):
+        """
+        Carga el último snapshot (o un catálogo vacío), aplica los cambios
+        pendientes y deja el registro anotando los nuevos
+        """
+        if os.path.exists(self.ruta_snapshot):
+            self.catalogo, generacion = cargar_snapshot(self.ruta_snapshot, verificar)
+        else:
+            self.catalogo, generacion = Catalogo(), 0
+
+        self.registro = RegistroCambios(self.ruta_registro, generacion, self.sincronizar)
+        if os.path.exists(self.ruta_registro):
+            aplicar(self.catalogo, self.registro.leer())
+        else:
+            self.registro.crear()
+
+        if self.registro.registros >= self.compactar_cada:
+            self.guardar()
+        self.catalogo.diario = self.registro
+        return self.catalogo
+
+    def guardar(self):
+        """
+        Escribe un snapshot nuevo y empieza un registro vacío
+        """
+        generacion = self.registro.generacion + 1
+        self.registro.cerrar()
+        guardar_snapshot(self.catalogo, self.ruta_snapshot, generacion)
+        self.registro.generacion = generacion
+        self.registro.crear()
+
+    def cerrar(self):
+        if self.registro is not None:
+            self.registro.cerrar()
+            self.catalogo.diario = None
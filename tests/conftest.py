@@ -0,0 +1,48 @@
+"""
+Fixtures comunes: una base SQLite en memoria con el esquema migrado, así
+las pruebas no necesitan un servidor MySQL
+"""
+
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import BackendSQLite  # noqa: E402
+from base_datos import GestionInventario  # noqa: E402
+from esquema import migrar  # noqa: E402
+
+
+def crear_gestor(ruta=':memory:', **opciones):
+    gestor = GestionInventario(backend=BackendSQLite(ruta), mostrar_mensajes=False, **opciones)
+    assert gestor.conectar()
+    with contextlib.redirect_stdout(io.StringIO()):
+        migrar(gestor)
+    return gestor
+
+
+@pytest.fixture
+def gestor():
+    gestor = crear_gestor()
+    yield gestor
+    gestor.desconectar()
+
+
+@pytest.fixture
+def catalogo(gestor):
+    """
+    Dos categorías y cinco productos; devuelve {nombre_categoria: id}
+    """
+    categorias = {nombre: gestor.crear_categoria(nombre) for nombre in ('Bebidas', 'Abarrotes')}
+    for codigo, nombre, categoria, precio, cantidad in [
+            ('001', 'Agua', 'Bebidas', '12.50', 10),
+            ('002', 'Arroz', 'Abarrotes', '30.10', 4),
+            ('003', 'Jugo', 'Bebidas', '19.99', 0),
+            ('004', 'Frijol', 'Abarrotes', '30.10', 7),
+            ('005', 'Café', 'Abarrotes', '89.00', 2)]:
+        gestor.crear_producto(codigo, nombre, categorias[categoria], precio, cantidad)
+    return categorias
@@ -0,0 +1,86 @@
+from cache_productos import CacheLRU
+
+
+# ========== VERSIONES ==========
+
+def test_lectura_anterior_a_la_invalidacion_no_se_guarda():
+    cache = CacheLRU()
+    version = cache.version()
+    cache.invalidar('001')
+    assert not cache.guardar('001', 'fila vieja', version)
+    assert cache.obtener('001') is None
+    # Otra clave leída con la misma versión sí se guarda
+    assert cache.guardar('002', 'fila', version)
+    assert cache.estadisticas()['descartados'] == 1
+
+
+def test_invalidacion_anterior_a_la_lectura_no_estorba():
+    cache = CacheLRU()
+    cache.invalidar('001')
+    assert cache.guardar('001', 'fila nueva', cache.version())
+    assert cache.obtener('001') == 'fila nueva'
+    assert cache.guardar('001', 'sin versión')
+    assert cache.obtener('001') == 'sin versión'
+
+
+def test_versiones_anteriores_al_piso_se_descartan():
+    cache = CacheLRU(capacidad=10)
+    version = cache.version()
+    # Solo se recuerdan las últimas 1000 invalidaciones; la más vieja sube el piso
+    for numero in range(1001):
+        cache.invalidar(f"otro{numero}")
+    assert not cache.guardar('001', 'fila', version)
+    assert cache.guardar('001', 'fila', cache.version())
+
+    version = cache.version()
+    cache.limpiar()
+    assert not cache.guardar('002', 'fila', version)
+    assert cache.obtener('001') is None
+
+
+def test_gestor_no_guarda_lo_leido_durante_un_cambio(gestor, catalogo):
+    cache = gestor.cache_productos
+    version = cache.version
+
+    def con_cambio_concurrente():
+        # Otro hilo actualiza el producto justo después de tomar la versión
+        marca = version()
+        cache.invalidar('001')
+        return marca
+
+    cache.version = con_cambio_concurrente
+    assert gestor.obtener_producto('001')['nombre_producto'] == 'Agua'
+    del cache.version
+    assert cache.obtener('001') is None
+    assert gestor.obtener_producto('001') is not None
+    assert cache.obtener('001') is not None
+
+
+# ========== LRU Y CADUCIDAD ==========
+
+def test_desaloja_la_usada_hace_mas_tiempo():
+    cache = CacheLRU(capacidad=2)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    cache.obtener('a')
+    cache.guardar('c', 3)
+    assert [cache.obtener(clave) for clave in 'abc'] == [1, None, 3]
+    assert cache.desalojos == 1
+
+
+def test_entradas_caducan(monkeypatch):
+    ahora = [1000.0]
+    monkeypatch.setattr('cache_productos.time.monotonic', lambda: ahora[0])
+    cache = CacheLRU(ttl=5)
+    cache.guardar('a', 1)
+    ahora[0] += 4.9
+    assert cache.obtener('a') == 1
+    ahora[0] += 0.2
+    assert cache.obtener('a', 'no') == 'no'
+    assert cache.expirados == 1 and len(cache) == 0
+
+
+def test_capacidad_cero_desactiva_la_cache():
+    cache = CacheLRU(capacidad=0)
+    assert not cache.guardar('a', 1)
+    assert cache.obtener('a') is None
@@ -0,0 +1,51 @@
+import pytest
+
+from backends import CursorSQLite
+
+
+@pytest.fixture
+def consultas(monkeypatch):
+    ejecutadas = []
+    ejecutar = CursorSQLite.execute
+
+    def registrar(self, consulta, params=None):
+        ejecutadas.append(' '.join(consulta.split()))
+        return ejecutar(self, consulta, params)
+
+    monkeypatch.setattr(CursorSQLite, 'execute', registrar)
+    return ejecutadas
+
+
+def lecturas_de_cantidad(consultas):
+    return [consulta for consulta in consultas
+            if consulta.startswith('SELECT codigo_barras, cantidad FROM productos')]
+
+
+def test_cambios_de_cantidad_no_vuelven_a_consultar(gestor, catalogo, consultas):
+    gestor.reporte_inventario_bajo(5)
+    assert gestor.cache_reportes
+
+    assert gestor.actualizar_inventario('001', 3, 'agregar')
+    assert gestor.actualizar_inventario('004', 1, 'restar')
+    assert gestor.actualizar_producto('002', 'cantidad', 1)
+    assert gestor.registrar_venta([('001', 1), ('005', 1)], 'C1')
+    assert lecturas_de_cantidad(consultas) == []
+
+    bajos = {producto['codigo_barras']: producto['cantidad']
+             for producto in gestor.reporte_inventario_bajo(5)}
+    assert bajos == {'003': 0, '002': 1, '005': 1}
+
+
+def test_observadores_reciben_la_cantidad_nueva(gestor, catalogo, consultas):
+    avisos = []
+
+    class Observador:
+        def cantidades_actualizadas(self, cantidades):
+            avisos.append(cantidades)
+
+    gestor.agregar_observador(Observador())
+    gestor.registrar_venta([('002', 3)], 'C1')
+    gestor.actualizar_inventario('001', 2, 'restar')
+    assert avisos == [{'002': 1}, {'001': 8}]
+    # Solo el cambio relativo necesita leer la cantidad
+    assert len(lecturas_de_cantidad(consultas)) == 1
@@ -0,0 +1,119 @@
+import random
+
+import pytest
+
+from catalogo import Catalogo, _IndiceHash
+from dinero import Dinero
+
+
+def indice_con(claves):
+    """
+    Índice de 8 casillas. Las claves enteras usan hash(clave) == clave, así
+    que la casilla ideal de cada una es clave % 8
+    """
+    columna = []
+    indice = _IndiceHash(columna)
+    for fila, clave in enumerate(claves):
+        columna.append(clave)
+        indice.agregar(clave, fila)
+    assert len(indice._tabla) == 8
+    return indice
+
+
+# ========== ÍNDICE HASH ==========
+
+def test_colisiones_dan_la_vuelta_a_la_tabla():
+    claves = [7, 15, 23]                # todas quieren la casilla 7
+    indice = indice_con(claves)
+    assert list(indice._tabla) == [2, 3, 0, 0, 0, 0, 0, 1]
+    assert [indice.buscar(clave) for clave in claves] == [0, 1, 2]
+    assert indice.buscar(31) == -1      # recorre la racha completa
+
+
+def test_quitar_la_primera_de_la_racha_recorre_las_demas():
+    claves = [7, 15, 23]
+    indice = indice_con(claves)
+    indice.quitar(7)
+    assert list(indice._tabla) == [3, 0, 0, 0, 0, 0, 0, 2]
+    assert indice.buscar(7) == -1
+    assert [indice.buscar(15), indice.buscar(23)] == [1, 2]
+
+
+def test_quitar_a_la_mitad_de_la_racha():
+    claves = [7, 15, 23]
+    indice = indice_con(claves)
+    indice.quitar(15)
+    assert list(indice._tabla) == [3, 0, 0, 0, 0, 0, 0, 1]
+    assert [indice.buscar(7), indice.buscar(15), indice.buscar(23)] == [0, -1, 2]
+
+
+def test_quitar_no_mueve_claves_que_ya_estan_en_su_casilla():
+    # 1 está en su casilla ideal, justo después de la racha de 7
+    claves = [7, 15, 1]
+    indice = indice_con(claves)
+    assert list(indice._tabla) == [2, 3, 0, 0, 0, 0, 0, 1]
+    indice.quitar(7)
+    assert list(indice._tabla) == [0, 3, 0, 0, 0, 0, 0, 2]
+    assert [indice.buscar(7), indice.buscar(15), indice.buscar(1)] == [-1, 1, 2]
+    assert indice._usadas == 2
+
+
+def test_agregar_crece_la_tabla_a_la_mitad_de_ocupacion():
+    # Todas con casilla ideal 0; la clave ya está en la columna al agregarla
+    columna = []
+    indice = _IndiceHash(columna)
+    for fila, clave in enumerate(range(0, 80, 8)):
+        columna.append(clave)
+        indice.agregar(clave, fila)
+        assert indice._usadas == fila + 1
+        assert indice._usadas * 2 <= len(indice._tabla)
+    assert len(indice._tabla) == 32
+    assert [indice.buscar(clave) for clave in columna] == list(range(len(columna)))
+
+
+# ========== CATÁLOGO ==========
+
+def test_agregar_buscar_y_eliminar():
+    catalogo = Catalogo()
+    catalogo.agregar('001', 'Agua', '12.50', 10, 'Bebidas')
+    catalogo.agregar('002', 'Arroz', 30.1, 4, 'Abarrotes')
+    catalogo.agregar('003', 'Jugo', '19.99', 0, 'Bebidas')
+    assert catalogo.obtener('Arroz').codigo == '002'
+    assert catalogo.precio('001') == Dinero(1250)
+    with pytest.raises(KeyError):
+        catalogo.agregar('001', 'Otra agua', 1)
+    with pytest.raises(KeyError):
+        catalogo.agregar('009', 'Agua', 1)
+
+    # El último pasa al lugar del eliminado
+    catalogo.eliminar('001')
+    assert '001' not in catalogo and 'Agua' not in catalogo
+    assert catalogo.fila('003') == 0 and catalogo.fila('Jugo') == 0
+    assert catalogo.cantidad('Arroz') == 4
+    assert catalogo.valor_total() == Dinero(4 * 3010)
+    assert catalogo.valor_por_categoria() == {'Bebidas': Dinero(0), 'Abarrotes': Dinero(12040)}
+
+
+def test_cambios_al_azar_coinciden_con_un_diccionario():
+    azar = random.Random(16)
+    catalogo = Catalogo()
+    esperado = {}
+    for paso in range(3000):
+        if esperado and azar.random() < 0.45:
+            codigo = azar.choice(list(esperado))
+            catalogo.eliminar(codigo)
+            del esperado[codigo]
+        else:
+            codigo = str(azar.randrange(600))
+            if codigo in esperado:
+                continue
+            catalogo.agregar(codigo, f"Producto {codigo}", azar.randrange(1, 500), paso % 7)
+            esperado[codigo] = paso % 7
+        if paso % 100 == 0:
+            assert len(catalogo) == len(esperado)
+            assert all(catalogo.cantidad(codigo) == cantidad for codigo, cantidad in esperado.items())
+            assert all(catalogo.fila(f"Producto {codigo}") == catalogo.fila(codigo)
+                       for codigo in esperado)
+    assert {producto.codigo: producto.cantidad for producto in catalogo} == esperado
+    assert all(catalogo.obtener(str(codigo)) is None
+               for codigo in range(600) if str(codigo) not in esperado)
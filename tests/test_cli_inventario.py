@@ -0,0 +1,139 @@
+import json
+
+import pytest
+
+from cli_inventario import FILAS_FALLIDAS, SALIDA_CORRECTA, SIN_CONEXION, main
+
+PRODUCTOS = [
+    {'codigo_barras': '001', 'nombre_producto': 'Agua', 'nombre_categoria': 'Bebidas',
+     'precio': '12.50', 'cantidad': 10},
+    {'codigo_barras': '002', 'nombre_producto': 'Arroz', 'nombre_categoria': 'Abarrotes',
+     'precio': '30.10', 'cantidad': 4},
+    {'codigo_barras': '003', 'nombre_producto': 'Jugo', 'nombre_categoria': 'Bebidas',
+     'precio': '19.99', 'cantidad': 0},
+]
+
+
+@pytest.fixture
+def base(tmp_path):
+    return str(tmp_path / 'tienda.db')
+
+
+def escribir(tmp_path, nombre, filas):
+    ruta = tmp_path / nombre
+    ruta.write_text(''.join(json.dumps(fila) + '\n' for fila in filas), encoding='utf-8')
+    return str(ruta)
+
+
+def ejecutar(capsys, base, *argumentos):
+    capsys.readouterr()
+    codigo = main(['--sqlite', base, *argumentos])
+    salida = capsys.readouterr().out
+    return codigo, [json.loads(linea) for linea in salida.splitlines() if linea.startswith('{')]
+
+
+@pytest.fixture
+def importada(tmp_path, base, capsys):
+    entrada = escribir(tmp_path, 'productos.jsonl', PRODUCTOS)
+    codigo, filas = ejecutar(capsys, base, 'importar', '--crear-categorias', '--entrada', entrada)
+    assert codigo == SALIDA_CORRECTA
+    assert filas == [{'procesados': 3, 'lotes': 1, 'fallidos': []}]
+    return base
+
+
+def test_importar_sin_categorias_falla_en_base_nueva(tmp_path, base, capsys):
+    entrada = escribir(tmp_path, 'productos.jsonl', PRODUCTOS)
+    codigo, filas = ejecutar(capsys, base, 'importar', '--entrada', entrada)
+    assert codigo == FILAS_FALLIDAS
+    assert filas[0]['procesados'] == 0
+    assert [fallido['fila'] for fallido in filas[0]['fallidos']] == [1, 2, 3]
+
+
+def test_importar_y_exportar_de_vuelta(importada, tmp_path, capsys):
+    codigo, filas = ejecutar(capsys, importada, 'exportar', '--orden', 'categoria')
+    assert codigo == SALIDA_CORRECTA
+    assert [fila['codigo_barras'] for fila in filas] == ['002', '001', '003']
+    assert filas[1] == {'codigo_barras': '001', 'nombre_producto': 'Agua',
+                        'nombre_categoria': 'Bebidas', 'precio': 12.5, 'cantidad': 10}
+
+    # Lo exportado se puede volver a importar
+    entrada = escribir(tmp_path, 'exportados.jsonl', filas)
+    codigo, resumen = ejecutar(capsys, importada, 'importar', '--actualizar', '--entrada', entrada)
+    assert codigo == SALIDA_CORRECTA
+    assert resumen[0]['procesados'] == 3
+
+
+def test_importar_fila_invalida(importada, tmp_path, capsys):
+    entrada = tmp_path / 'malas.jsonl'
+    entrada.write_text('{"codigo_barras": "009"\n[1, 2]\n', encoding='utf-8')
+    codigo, filas = ejecutar(capsys, importada, 'importar', '--entrada', str(entrada))
+    assert codigo == FILAS_FALLIDAS
+    motivos = [fallido['motivo'] for fallido in filas[0]['fallidos']]
+    assert motivos[0].startswith('JSON inválido')
+    assert motivos[1] == 'La línea no es un objeto JSON'
+
+
+def test_buscar(importada, capsys):
+    codigo, filas = ejecutar(capsys, importada, 'buscar', 'codigo', '003', '001')
+    assert codigo == SALIDA_CORRECTA
+    assert [fila['nombre_producto'] for fila in filas] == ['Jugo', 'Agua']
+
+    codigo, filas = ejecutar(capsys, importada, 'buscar', 'codigo', '001', '999')
+    assert codigo == FILAS_FALLIDAS
+    assert [fila['codigo_barras'] for fila in filas] == ['001']
+
+    codigo, filas = ejecutar(capsys, importada, 'buscar', 'categoria', 'Abarrotes')
+    assert codigo == SALIDA_CORRECTA
+    assert [fila['codigo_barras'] for fila in filas] == ['002']
+
+
+def test_ajustar(importada, tmp_path, capsys):
+    codigo, filas = ejecutar(capsys, importada, 'ajustar', '001', '5')
+    assert codigo == SALIDA_CORRECTA
+    assert filas[0]['ok']
+
+    entrada = escribir(tmp_path, 'ajustes.jsonl', [
+        {'codigo_barras': '002', 'cantidad': 4},
+        {'codigo_barras': '003', 'cantidad': 1},
+        {'codigo_barras': '001', 'cantidad': 2, 'operacion': 'establecer'}])
+    codigo, filas = ejecutar(capsys, importada, 'ajustar', '--operacion', 'restar',
+                             '--entrada', entrada)
+    assert codigo == FILAS_FALLIDAS
+    assert [fila['ok'] for fila in filas] == [True, False, True]
+
+    _, filas = ejecutar(capsys, importada, 'buscar', 'codigo', '001', '002')
+    assert [fila['cantidad'] for fila in filas] == [2, 0]
+
+
+def test_reportes(importada, capsys):
+    codigo, filas = ejecutar(capsys, importada, 'reporte', 'valor')
+    assert codigo == SALIDA_CORRECTA
+    assert filas == [{'valor': 245.4}]
+
+    codigo, filas = ejecutar(capsys, importada, 'reporte', 'conteos')
+    assert filas == [{'productos': 3, 'categorias': 2}]
+
+    codigo, filas = ejecutar(capsys, importada, 'reporte', 'bajo', '--limite', '5')
+    assert [fila['codigo_barras'] for fila in filas] == ['003', '002']
+
+    codigo, filas = ejecutar(capsys, importada, 'reporte', 'categorias')
+    assert codigo == SALIDA_CORRECTA
+    assert len(filas) == 2
+
+    codigo, filas = ejecutar(capsys, importada, 'reporte', 'conciliar')
+    assert (codigo, filas) == (SALIDA_CORRECTA, [])
+
+
+def test_argumentos_invalidos(base, capsys):
+    with pytest.raises(SystemExit) as salida:
+        main(['--sqlite', base, 'ajustar', '001'])
+    assert salida.value.code == 2
+    with pytest.raises(SystemExit) as salida:
+        main(['--sqlite', base, 'reporte', 'inexistente'])
+    assert salida.value.code == 2
+
+
+def test_sin_conexion(tmp_path, capsys):
+    codigo = main(['--sqlite', str(tmp_path / 'no' / 'existe' / 'tienda.db'), 'reporte', 'valor'])
+    assert codigo == SIN_CONEXION
+    assert 'No se pudo conectar' in capsys.readouterr().err
@@ -0,0 +1,44 @@
+import http.client
+import socketserver
+import threading
+
+import pytest
+
+from cliente_pos import ClientePOS
+
+
+class SinRespuesta(socketserver.StreamRequestHandler):
+    """
+    Lee la petición y cierra sin responder, como un servidor que aplicó la
+    venta y se cayó antes de contestar
+    """
+    def handle(self):
+        self.server.peticiones.append(self.rfile.readline().split()[0].decode())
+
+
+@pytest.fixture
+def cliente():
+    servidor = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SinRespuesta)
+    servidor.daemon_threads = True
+    servidor.peticiones = []
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    cliente = ClientePOS(f"http://127.0.0.1:{servidor.server_address[1]}", espera=5)
+    yield cliente, servidor.peticiones
+    cliente.cerrar()
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def test_get_se_repite_una_vez(cliente):
+    cliente, peticiones = cliente
+    with pytest.raises((http.client.HTTPException, ConnectionError)):
+        cliente.escanear('001')
+    assert peticiones == ['GET', 'GET']
+
+
+def test_venta_no_se_repite(cliente):
+    cliente, peticiones = cliente
+    with pytest.raises((http.client.HTTPException, ConnectionError)):
+        cliente.vender([('001', 1)], 'C1')
+    assert peticiones == ['POST']
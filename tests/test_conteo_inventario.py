@@ -0,0 +1,106 @@
+import pytest
+
+import conteo_inventario
+from catalogo import Catalogo
+from conteo_inventario import ConteoInventario
+from dinero import Dinero
+
+
+@pytest.fixture(params=['python', 'numpy'])
+def tienda(request, monkeypatch, gestor, catalogo):
+    """
+    Catálogo de las cajas con los productos de la base. La conciliación se
+    prueba con enteros de Python y, si está instalado, con NumPy
+    """
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(conteo_inventario, 'np', None)
+    tienda = Catalogo()
+    for producto in gestor.listar_productos():
+        tienda.agregar(producto['codigo_barras'], producto['nombre_producto'], producto['precio'],
+                       producto['cantidad'], producto['nombre_categoria'])
+    return tienda
+
+
+def contar(tienda):
+    """
+    Agua 5 de 10, Arroz 4 de 4, Jugo 1 de 0, Frijol 7 de 7; Café sin contar
+    """
+    conteo = ConteoInventario(tienda)
+    conteo.registrar('001', 3)
+    conteo.registrar('Agua', 2)
+    conteo.leer(['002,4', '003', '004;6', '004 1'])
+    return conteo
+
+
+# ========== CAPTURA ==========
+
+def test_registrar_acumula_por_producto(tienda):
+    conteo = ConteoInventario(tienda)
+    assert conteo.registrar('001', 3) == 3
+    assert conteo.registrar('Agua', 2) == 5
+    assert conteo.registrar('999') is None
+    assert conteo.contado('001') == 5 and conteo.contado('002') == 0
+    assert conteo.desconocidos == {'999': 1}
+    assert conteo.lecturas == 3
+
+
+def test_leer_archivo_del_lector(tienda):
+    conteo = ConteoInventario(tienda)
+    lineas = ['# pasillo 3\n', '\n', '002,4\n', '004;6\n', '004 1\n', '003\n', '777\t2\n']
+    assert conteo.leer(lineas) == 5
+    assert [conteo.contado(codigo) for codigo in ('002', '003', '004')] == [4, 1, 7]
+    assert conteo.desconocidos == {'777': 2}
+    with pytest.raises(ValueError, match='Línea 2'):
+        conteo.leer(['001', '001,muchos'])
+
+
+# ========== CONCILIACIÓN ==========
+
+def test_reporte_completo(tienda):
+    reporte = contar(tienda).reporte()
+    assert [(d.codigo, d.esperado, d.contado, d.diferencia, d.valor) for d in reporte.diferencias] == [
+        ('005', 2, 0, -2, Dinero(-17800)),
+        ('001', 10, 5, -5, Dinero(-6250)),
+        ('003', 0, 1, 1, Dinero(1999)),
+    ]
+    assert (reporte.productos, reporte.contados) == (5, 4)
+    assert (reporte.unidades_esperadas, reporte.unidades_contadas) == (23, 17)
+    assert reporte.valor_esperado == Dinero(12500 + 12040 + 21070 + 17800)
+    assert reporte.valor_contado == Dinero(6250 + 12040 + 1999 + 21070)
+    assert (reporte.faltante, reporte.sobrante) == (Dinero(24050), Dinero(1999))
+
+
+def test_reporte_parcial_y_con_limite(tienda):
+    conteo = contar(tienda)
+    parcial = conteo.reporte(solo_contados=True)
+    assert [d.codigo for d in parcial.diferencias] == ['001', '003']
+    assert parcial.productos == 4 and parcial.faltante == Dinero(6250)
+    assert [d.codigo for d in conteo.reporte(limite=1).diferencias] == ['005']
+
+
+def test_producto_eliminado_durante_el_conteo(tienda):
+    conteo = ConteoInventario(tienda)
+    conteo.registrar('005', 2)
+    conteo.registrar('002', 9)
+    # Café pasa a la fila de Arroz
+    tienda.eliminar('002')
+    reporte = conteo.reporte(solo_contados=True)
+    assert reporte.diferencias == [] and reporte.productos == 1
+
+
+def test_aplicar_deja_el_inventario_como_lo_contado(tienda, gestor):
+    conteo = contar(tienda)
+    reporte = conteo.reporte()
+    assert conteo.aplicar(reporte) == 3
+    assert {producto.codigo: producto.cantidad for producto in tienda} == \
+        {'001': 5, '002': 4, '003': 1, '004': 7, '005': 0}
+    assert tienda.valor_total() == reporte.valor_contado
+    assert conteo.reporte().diferencias == []
+
+    # Las diferencias se pasan a la base
+    for diferencia in reporte.diferencias:
+        assert gestor.actualizar_inventario(diferencia.codigo, diferencia.contado, 'establecer')
+    assert gestor.valor_total_inventario() == reporte.valor_contado
+    assert gestor.conciliar_valor_inventario(corregir=False) == []
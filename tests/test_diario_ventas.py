@@ -0,0 +1,116 @@
+import os
+import time
+
+import pytest
+
+from conftest import crear_gestor
+from diario_ventas import DiarioVentas
+from monitor_inventario import MonitorInventario
+
+
+@pytest.fixture
+def diario(tmp_path, gestor, catalogo):
+    diario = DiarioVentas(str(tmp_path / 'caja.diario'), gestor, esperar_disco=False)
+    yield diario
+    if not diario._archivo.closed:
+        diario.detener(aplicar_pendientes=False)
+
+
+def test_aplicar_es_idempotente(diario, gestor):
+    diario.registrar_venta([('001', 2)], caja='C1')
+    diario.actualizar_inventario('002', 5, 'agregar')
+    assert diario.sincronizar_pendientes() == 2
+    # Se pierde la posición guardada: el diario se vuelve a leer completo
+    diario._guardar_posicion(0)
+    assert diario.sincronizar_pendientes() == 2
+    assert gestor.obtener_producto('001')['cantidad'] == 8
+    assert gestor.obtener_producto('002')['cantidad'] == 9
+
+
+def test_corte_al_rotar_despues_de_guardar_posicion(diario, gestor):
+    diario.tamano_rotacion = 1
+    diario.registrar_venta([('001', 1)])
+    diario.sincronizar_pendientes()
+    # Corte entre guardar la posición 0 y vaciar el archivo
+    diario._guardar_posicion(0)
+    diario.registrar_venta([('001', 1)])
+    assert diario.sincronizar_pendientes() == 2
+    assert gestor.obtener_producto('001')['cantidad'] == 8
+
+
+def test_posicion_mas_alla_del_final(diario, gestor):
+    diario.registrar_venta([('001', 1)])
+    diario.sincronizar_pendientes()
+    # Corte con el orden anterior: archivo vacío y posición vieja
+    diario._archivo.truncate(0)
+    diario.registrar_venta([('001', 3)])
+    diario._guardar_posicion(10_000)
+    assert diario.pendientes() == os.path.getsize(diario.ruta)
+    assert diario.sincronizar_pendientes() == 1
+    assert gestor.obtener_producto('001')['cantidad'] == 6
+
+
+def test_posicion_a_media_linea(diario, gestor):
+    diario.registrar_venta([('001', 1)])
+    diario.registrar_venta([('002', 1)])
+    diario._guardar_posicion(5)
+    assert diario.sincronizar_pendientes() == 2
+    assert gestor.obtener_producto('001')['cantidad'] == 9
+    assert gestor.obtener_producto('002')['cantidad'] == 3
+
+
+def test_rotacion_vacia_el_diario(diario):
+    diario.tamano_rotacion = 1
+    diario.registrar_venta([('001', 1)])
+    diario.sincronizar_pendientes()
+    assert diario.sincronizar_pendientes() == 0
+    assert os.path.getsize(diario.ruta) == 0
+    assert diario._leer_posicion() == 0
+
+
+def test_el_hilo_sobrevive_a_errores_inesperados(diario, gestor, monkeypatch):
+    fallas = []
+    original = diario._aplicar_inventario
+
+    def falla_una_vez(cursor, datos):
+        if not fallas:
+            fallas.append(datos)
+            raise KeyError('operacion')
+        return original(cursor, datos)
+
+    monkeypatch.setattr(diario, '_aplicar_inventario', falla_una_vez)
+    diario.intervalo = 0.01
+    diario.iniciar()
+    diario.actualizar_inventario('001', 5, 'agregar')
+    limite = time.monotonic() + 5
+    while diario.pendientes() and time.monotonic() < limite:
+        time.sleep(0.01)
+    assert fallas and 'KeyError' in diario.ultimo_error
+    assert diario._hilos[1].is_alive()
+    diario.detener()
+    assert gestor.obtener_producto('001')['cantidad'] == 15
+
+
+def test_venta_del_diario_dispara_la_alerta_del_monitor(tmp_path):
+    gestor = crear_gestor(str(tmp_path / 'tienda.db'))
+    id_categoria = gestor.crear_categoria('Bebidas')
+    gestor.crear_producto('001', 'Agua', id_categoria, '12.50', 10)
+    monitor = MonitorInventario(gestor, umbral_predeterminado=5)
+    gestor.agregar_observador(monitor)
+    monitor.cargar(avisar=False)
+    alertas = []
+    monitor.suscribir(alertas.append)
+
+    # Como en main(): el diario aplica con su propia conexión
+    central = gestor.conexion_aparte()
+    assert central.conectar()
+    diario = DiarioVentas(str(tmp_path / 'caja.diario'), central, esperar_disco=False)
+    try:
+        diario.registrar_venta([('001', 6)], caja='C1')
+        assert diario.sincronizar_pendientes() == 1
+    finally:
+        diario.detener(aplicar_pendientes=False)
+        central.desconectar()
+        gestor.desconectar()
+    assert [(alerta.tipo, alerta.codigo_barras, alerta.cantidad) for alerta in alertas] == \
+        [('bajo', '001', 4)]
@@ -0,0 +1,119 @@
+from array import array
+from decimal import Decimal
+
+import pytest
+
+import dinero
+from dinero import (Dinero, a_centavos, aplicar_tasa, multiplicar, redondear, sumar,
+                    sumar_por_grupo, valorar)
+
+
+@pytest.fixture(params=['python', 'numpy'])
+def motor(request, monkeypatch):
+    """
+    Corre la prueba con enteros de Python y, si está instalado, con NumPy
+    """
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(dinero, 'np', None)
+    return request.param
+
+
+# ========== CREACIÓN Y REDONDEO ==========
+
+@pytest.mark.parametrize('valor, centavos', [
+    (12, 1200), ('23.50', 2350), (0.1, 10), (Decimal('19.99'), 1999),
+    ('$1,234.50', 123450), ('0.005', 1), ('-0.005', -1), ('2.675', 268), (2.675, 268),
+])
+def test_de_redondea_a_medio_centavo_lejos_de_cero(valor, centavos):
+    assert Dinero.de(valor) == Dinero(centavos)
+
+
+@pytest.mark.parametrize('valor', ['abc', '', 'NaN', 'Infinity', None])
+def test_de_rechaza_importes_invalidos(valor):
+    with pytest.raises(ValueError):
+        Dinero.de(valor)
+
+
+def test_se_crea_solo_con_centavos_enteros():
+    with pytest.raises(TypeError):
+        Dinero(12.5)
+    with pytest.raises(TypeError):
+        Dinero(True)
+
+
+def test_pesos_y_formato_son_exactos():
+    precio = Dinero.de('1234.5')
+    assert precio.pesos == Decimal('1234.50')
+    assert str(precio) == '1234.50'
+    assert f"${precio:,.2f}" == '$1,234.50'
+    assert repr(Dinero(-5)) == "Dinero('-0.05')"
+
+
+# ========== ARITMÉTICA ==========
+
+def test_suma_de_decimos_no_acumula_error():
+    assert sum(Dinero.de(0.1) for _ in range(1000)) == Dinero.de(100)
+    assert Dinero.de(0.1) + Dinero.de(0.2) == Dinero.de('0.3')
+
+
+def test_multiplicar_por_cantidad_y_por_tasa():
+    precio = Dinero.de('19.99')
+    assert precio * 3 == 3 * precio == Dinero(5997)
+    assert precio.impuesto('0.16') == Dinero(320)       # 319.84
+    assert precio.con_impuesto(0.16) == Dinero(2319)
+    assert Dinero(-1999) * Decimal('0.16') == Dinero(-320)
+    assert Dinero(5) * '0.5' == Dinero(3)               # 2.5 sube a 3
+
+
+def test_no_mezcla_dinero_con_numeros():
+    with pytest.raises(TypeError):
+        Dinero(100) + 1
+    with pytest.raises(TypeError):
+        Dinero(100) * Dinero(2)
+
+
+def test_redondear_y_repartir():
+    assert Dinero(1224).redondear(50) == Dinero(1200)
+    assert Dinero(1225).redondear(50) == Dinero(1250)
+    assert Dinero(-1225).redondear(50) == Dinero(-1250)
+    partes = Dinero(1000).repartir(3)
+    assert partes == [Dinero(334), Dinero(333), Dinero(333)]
+    assert sum(partes) == Dinero(1000)
+
+
+# ========== OPERACIONES POR LOTE ==========
+
+def test_a_centavos():
+    assert a_centavos([23.5, 10, '0.99', Dinero(7)]) == array('q', [2350, 1000, 99, 7])
+
+
+@pytest.mark.parametrize('renglones', [3, 200])
+def test_lotes_coinciden_con_dinero(motor, renglones):
+    precios = array('q', [(i * 7919) % 100000 - 20000 for i in range(renglones)])
+    cantidades = array('q', [i % 13 for i in range(renglones)])
+    grupos = [i % 4 for i in range(renglones)]
+
+    assert sumar(precios) == sum(Dinero(p) for p in precios)
+    assert list(multiplicar(precios, cantidades)) == [p * c for p, c in zip(precios, cantidades)]
+    assert valorar(precios, cantidades) == sum(Dinero(p) * c for p, c in zip(precios, cantidades))
+    assert list(aplicar_tasa(precios, '0.16')) == [(Dinero(p) * '0.16').centavos for p in precios]
+    assert list(redondear(precios, 50)) == [Dinero(p).redondear(50).centavos for p in precios]
+    esperado = [0] * 4
+    for grupo, precio, cantidad in zip(grupos, precios, cantidades):
+        esperado[grupo] += precio * cantidad
+    assert sumar_por_grupo(grupos, precios, 4, cantidades) == esperado
+    assert sumar_por_grupo(grupos, precios, 4) == \
+        [sum(p for g, p in zip(grupos, precios) if g == grupo) for grupo in range(4)]
+
+
+def test_lotes_que_no_caben_en_int64(motor):
+    # 100 renglones de 2**40 centavos por 2**30 piezas: cada importe cabe en
+    # int64, la suma no
+    precios = array('q', [2 ** 40] * 100)
+    cantidades = array('q', [2 ** 30] * 100)
+    assert valorar(precios, cantidades) == Dinero(100 * 2 ** 70)
+    assert sumar_por_grupo([0] * 100, precios, 1, cantidades) == [100 * 2 ** 70]
+    assert sumar(array('q', [2 ** 62] * 100)) == Dinero(100 * 2 ** 62)
+    assert list(aplicar_tasa(array('q', [2 ** 62] * 100), '0.5')) == [2 ** 61] * 100
@@ -0,0 +1,70 @@
+import contextlib
+import io
+
+import pytest
+
+from backends import BackendSQLite
+from base_datos import GestionInventario
+from conftest import crear_gestor
+from esquema import migrar
+from federacion import Federacion
+
+
+class BackendSinMayusculas(BackendSQLite):
+    """
+    SQLite con los nombres en NOCASE, como la collation por omisión de MySQL
+    """
+    def binario(self, expresion):
+        return f"{expresion} COLLATE BINARY"
+
+
+def tienda_sin_mayusculas():
+    gestor = GestionInventario(backend=BackendSinMayusculas(':memory:'), mostrar_mensajes=False)
+    assert gestor.conectar()
+    with contextlib.redirect_stdout(io.StringIO()):
+        migrar(gestor)
+    with gestor.sesion() as cursor:
+        cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'productos'")
+        tabla = cursor.fetchone()['sql'].replace('nombre_producto TEXT NOT NULL',
+                                                 'nombre_producto TEXT NOT NULL COLLATE NOCASE')
+        cursor.execute("SELECT sql FROM sqlite_master WHERE tbl_name = 'productos' "
+                       "AND type = 'index' AND sql IS NOT NULL")
+        indices = [fila['sql'] for fila in cursor.fetchall()]
+        cursor.execute("DROP TABLE productos")
+        cursor.execute(tabla)
+        for indice in indices:
+            cursor.execute(indice)
+    return gestor
+
+
+def agregar(gestor, productos):
+    id_categoria = gestor.crear_categoria('General')
+    for codigo, nombre in productos:
+        gestor.crear_producto(codigo, nombre, id_categoria, '10.00', 1)
+
+
+@pytest.fixture
+def federacion():
+    centro, norte = tienda_sin_mayusculas(), crear_gestor()
+    agregar(centro, [('c1', 'apple'), ('c2', 'Banana'), ('c3', 'cherry'), ('c4', 'Durazno')])
+    agregar(norte, [('n1', 'Avena'), ('n2', 'banana'), ('n3', 'Cacao')])
+    federacion = Federacion({'centro': centro, 'norte': norte})
+    yield federacion
+    federacion.cerrar()
+
+
+@pytest.mark.parametrize('tamano', [1, 2, 10])
+def test_productos_por_nombre_salen_en_orden(federacion, tamano):
+    fallidas = {}
+    filas = list(federacion.iterar_productos('nombre', tamano, fallidas))
+    claves = [(fila['nombre_producto'], fila['codigo_barras']) for fila in filas]
+    assert fallidas == {}
+    assert len(claves) == 7
+    assert claves == sorted(claves)
+
+
+def test_productos_por_categoria_salen_en_orden(federacion):
+    filas = list(federacion.iterar_productos('categoria', 2))
+    claves = [(fila['nombre_categoria'], fila['codigo_barras']) for fila in filas]
+    assert len(claves) == 7
+    assert claves == sorted(claves)
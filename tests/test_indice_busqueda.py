@@ -0,0 +1,98 @@
+import pytest
+
+from indice_busqueda import IndiceNombres, normalizar, trigramas
+
+PRODUCTOS = [('1', 'Coca-Cola 600 ml'), ('2', 'Coca Light'), ('3', 'Café de olla'),
+             ('4', 'Cacahuates japoneses'), ('5', 'Agua natural')]
+
+
+@pytest.fixture
+def indice():
+    indice = IndiceNombres()
+    for codigo, nombre in PRODUCTOS:
+        indice.agregar(codigo, nombre)
+    return indice
+
+
+def codigos(resultados):
+    return [codigo for codigo, _, _ in resultados]
+
+
+# ========== TRIGRAMAS ==========
+
+def test_normalizar_quita_acentos_y_signos():
+    assert normalizar('Café-Olla, ÑANDÚ') == 'cafe olla  nandu'
+
+
+def test_trigramas_con_relleno_y_prefijo_abierto():
+    assert trigramas('Café') == {'  c', ' ca', 'caf', 'afe', 'fe '}
+    # La palabra que se sigue escribiendo no se cierra
+    assert trigramas('agua ca', prefijo_final=True) == \
+        {'  a', ' ag', 'agu', 'gua', 'ua ', '  c', ' ca'}
+    assert trigramas(' -- ') == set()
+
+
+# ========== BÚSQUEDA ==========
+
+def test_buscar_ordena_por_parecido(indice):
+    resultados = indice.buscar('cafe')
+    assert codigos(resultados) == ['3', '4']
+    assert resultados[0][1] == 'Café de olla'
+    assert resultados[0][2] > resultados[1][2]
+    assert codigos(indice.buscar('cacahuate')) == ['4']
+
+
+def test_tolera_errores_de_dedo_y_signos(indice):
+    assert codigos(indice.buscar('cocacola'))[0] == '1'
+    assert codigos(indice.buscar('agau natural')) == ['5']
+
+
+def test_mientras_se_escribe(indice):
+    assert codigos(indice.buscar('coca l'))[0] == '2'
+    assert codigos(indice.buscar('agua nat')) == ['5']
+
+
+def test_sin_coincidencias_y_limite(indice):
+    assert indice.buscar('') == []
+    assert indice.buscar('xyz') == []
+    assert len(indice.buscar('coca', limite=1)) == 1
+
+
+def test_puntaje_minimo():
+    estricto = IndiceNombres(puntaje_minimo=0.9)
+    for codigo, nombre in PRODUCTOS:
+        estricto.agregar(codigo, nombre)
+    assert codigos(estricto.buscar('cafe')) == ['3']
+
+
+# ========== CAMBIOS ==========
+
+def test_reemplazar_y_quitar(indice):
+    indice.agregar('5', 'Agua mineral')
+    assert codigos(indice.buscar('natural')) == []
+    assert codigos(indice.buscar('mineral')) == ['5']
+    indice.quitar('3')
+    indice.quitar('no existe')
+    assert '3' not in indice and len(indice) == 4
+    assert codigos(indice.buscar('cafe de olla')) == []
+
+
+def test_compacta_los_borrados():
+    indice = IndiceNombres()
+    for numero in range(2000):
+        indice.agregar(str(numero), f"Producto {numero}")
+    for numero in range(1200):
+        indice.quitar(str(numero))
+    assert len(indice) == 800
+    # Al pasar de una cuarta parte de borrados se reconstruye sin ellos
+    assert len(indice._codigos) < 2000
+    assert codigos(indice.buscar('producto 1999', limite=1)) == ['1999']
+
+
+def test_gestor_mantiene_el_indice(gestor, catalogo):
+    assert codigos(gestor.sugerir_productos('frijol')) == ['004']
+    gestor.actualizar_producto('004', 'nombre_producto', 'Frijol negro')
+    gestor.crear_producto('010', 'Frijol bayo', gestor._id_categoria('Abarrotes'), '35', 1)
+    assert set(codigos(gestor.sugerir_productos('frijol'))) == {'004', '010'}
+    assert gestor.eliminar_producto('010', confirmar=False)
+    assert codigos(gestor.sugerir_productos('frijol bayo')) == ['004']
@@ -0,0 +1,85 @@
+import json
+import re
+
+import pytest
+
+from backends import Error
+from instrumentacion import Instrumentacion
+
+
+@pytest.fixture
+def medido(gestor, catalogo):
+    # El registro de categorías se carga una vez, con el primer producto leído
+    gestor.obtener_producto('002')
+    gestor.cache_productos.limpiar()
+    instrumentacion = Instrumentacion(umbral_lento=0)
+    instrumentacion.instalar(gestor)
+    return instrumentacion
+
+
+# ========== CONTADORES ==========
+
+def test_cuenta_llamadas_consultas_y_filas(medido, gestor):
+    gestor.obtener_producto('001')
+    gestor.obtener_producto('001')          # de la caché: sin consulta
+    assert len(gestor.listar_productos()) == 5
+    metodos = medido.estadisticas()['metodos']
+    assert metodos['obtener_producto']['llamadas'] == 2
+    assert metodos['obtener_producto']['consultas'] == 1
+    assert metodos['obtener_producto']['filas'] == 1
+    assert metodos['listar_productos']['filas'] == 5
+    datos = metodos['listar_productos']
+    assert datos['segundos'] >= datos['segundos_bd'] > 0
+    assert datos['segundos_python'] == pytest.approx(datos['segundos'] - datos['segundos_bd'])
+
+
+def test_metodos_anidados_y_generadores(medido, gestor):
+    gestor.buscar_producto('codigo', '002')
+    assert len(list(gestor.iterar_paginas('nombre', 2))) == 3
+    metodos = medido.estadisticas()['metodos']
+    # La consulta de obtener_producto también cuenta para quien lo llamó
+    assert metodos['buscar_producto']['consultas'] >= metodos['obtener_producto']['consultas'] == 1
+    # Un generador cuenta una llamada aunque consulte en cada página
+    assert metodos['iterar_paginas']['llamadas'] == 1
+    assert metodos['iterar_paginas']['consultas'] >= 3
+    assert metodos['iterar_paginas']['filas'] == 5
+
+
+def test_errores_y_consultas_lentas(medido, gestor):
+    with pytest.raises(Error):
+        gestor.cursor.execute("SELECT * FROM   no_existe")
+    estadisticas = medido.estadisticas()
+    assert estadisticas['metodos']['(fuera de un método)']['errores'] == 1
+    lenta = estadisticas['lentas'][-1]
+    assert lenta['sql'] == "SELECT * FROM no_existe" and lenta['error']
+    assert lenta['metodo'] is None
+
+    medido.reiniciar()
+    assert medido.estadisticas()['metodos'] == {} and medido.estadisticas()['lentas'] == []
+
+
+# ========== PROMETHEUS Y VOLCADO ==========
+
+def test_formato_prometheus(medido, gestor):
+    gestor.obtener_producto('001')
+    texto = medido.prometheus()
+    assert texto.endswith('\n')
+    lineas = texto.splitlines()
+    assert '# TYPE inventario_llamadas_total counter' in lineas
+    assert '# TYPE inventario_segundos_max gauge' in lineas
+    assert 'inventario_llamadas_total{metodo="obtener_producto"} 1' in lineas
+    assert 'inventario_consultas_total{metodo="obtener_producto"} 1' in lineas
+    assert any(re.fullmatch(r'inventario_segundos_total\{metodo="obtener_producto",lugar="bd"\} '
+                            r'\d+\.\d{6}', linea) for linea in lineas)
+    muestra = re.compile(r'[a-z_]+\{metodo="[^"]+"(,lugar="(bd|python)")?\} [0-9.e-]+')
+    assert all(linea.startswith('# ') or muestra.fullmatch(linea) for linea in lineas)
+
+
+def test_volcar_prometheus_y_json(medido, gestor, tmp_path):
+    gestor.valor_total_inventario()
+    medido.volcar(str(tmp_path / 'metricas.prom'))
+    medido.volcar(str(tmp_path / 'metricas.json'))
+    assert (tmp_path / 'metricas.prom').read_text(encoding='utf-8') == medido.prometheus()
+    datos = json.loads((tmp_path / 'metricas.json').read_text(encoding='utf-8'))
+    assert datos['metodos']['valor_total_inventario']['llamadas'] == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['metricas.json', 'metricas.prom']
@@ -0,0 +1,101 @@
+import asyncio
+import contextlib
+import io
+import threading
+
+from backends import BackendSQLite
+from dinero import Dinero
+from esquema import migrar
+from inventario_async import InventarioAsync
+
+
+async def abrir(ruta, hilos=4):
+    inventario = InventarioAsync(hilos=hilos, backend=BackendSQLite(ruta))
+    assert await inventario.conectar(indice_nombres=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        migrar(inventario.gestor)
+    id_categoria = await inventario.crear_categoria('Bebidas')
+    await inventario.crear_producto('001', 'Agua', id_categoria, '12.50', 500)
+    await inventario.crear_producto('002', 'Jugo', id_categoria, '19.99', 500)
+    return inventario
+
+
+async def vender_a_la_vez(ruta, ventas):
+    inventario = await abrir(ruta)
+    try:
+        resultados = await asyncio.gather(*[
+            inventario.registrar_venta([('001', 1), ('002', 1)], caja=f"C{numero % 8}")
+            for numero in range(ventas)])
+        productos = [await inventario.obtener_producto(codigo) for codigo in ('001', '002')]
+    finally:
+        await inventario.cerrar()
+    return resultados, productos
+
+
+def test_ventas_concurrentes_en_memoria():
+    resultados, productos = asyncio.run(vender_a_la_vez(':memory:', 200))
+    assert None not in resultados
+    assert len(set(resultados)) == 200
+    assert [producto['cantidad'] for producto in productos] == [300, 300]
+
+
+def test_ventas_concurrentes_en_archivo(tmp_path):
+    resultados, productos = asyncio.run(vender_a_la_vez(str(tmp_path / 'tienda.db'), 200))
+    assert None not in resultados
+    assert [producto['cantidad'] for producto in productos] == [300, 300]
+
+
+def test_cerrar_no_detiene_el_ciclo_de_eventos():
+    async def probar():
+        inventario = await abrir(':memory:')
+        liberar = threading.Event()
+        valor_total = inventario.gestor.valor_total_inventario
+
+        def lento():
+            assert liberar.wait(5)
+            return valor_total()
+
+        inventario.gestor.valor_total_inventario = lento
+        pendiente = asyncio.ensure_future(inventario.valor_total_inventario())
+        await asyncio.sleep(0)
+        cierre = asyncio.ensure_future(inventario.cerrar())
+        await asyncio.sleep(0.05)
+        # cerrar espera a la operación en curso sin bloquear el ciclo
+        assert not cierre.done()
+        liberar.set()
+        await cierre
+        return await pendiente
+
+    assert asyncio.run(probar()) == Dinero.de(500 * 12.50 + 500 * 19.99)
+
+
+def test_acierto_de_cache_no_usa_hilos():
+    async def probar():
+        inventario = await abrir(':memory:')
+        try:
+            primero = await inventario.obtener_producto('001')
+
+            async def sin_hilos(*args, **kwargs):
+                raise AssertionError("no debía ir a la base")
+
+            inventario._en_hilo = sin_hilos
+            return primero, await inventario.obtener_producto('001')
+        finally:
+            del inventario._en_hilo
+            await inventario.cerrar()
+
+    primero, segundo = asyncio.run(probar())
+    assert segundo == primero and segundo['nombre_producto'] == 'Agua'
+
+
+def test_iterar_paginas():
+    async def probar():
+        inventario = await abrir(':memory:')
+        try:
+            return [[producto['codigo_barras'] for producto in pagina]
+                    async for pagina in inventario.iterar_paginas('precio', 1)]
+        finally:
+            await inventario.cerrar()
+
+    assert asyncio.run(probar()) == [['002'], ['001']]
+
@@ -0,0 +1,65 @@
+import os
+
+from libro_cajero import REGISTRO, LibroCajero
+
+
+def quitar_registros(ruta, cantidad):
+    with open(f"{ruta}.libro", 'r+b') as archivo:
+        archivo.truncate(os.path.getsize(f"{ruta}.libro") - cantidad * REGISTRO.size)
+
+
+def test_transferencia_sin_entrada_se_descarta(tmp_path):
+    ruta = str(tmp_path / 'cajero')
+    libro = LibroCajero(ruta)
+    libro.abrir_cuenta('0001', 10000)
+    libro.abrir_cuenta('0002', 500)
+    assert libro.transferir('0001', '0002', 2500) == 7500
+    libro.cerrar()
+    # Solo la salida llegó a disco
+    quitar_registros(ruta, 1)
+
+    libro = LibroCajero(ruta)
+    assert libro.saldo('0001') == 10000
+    assert libro.saldo('0002') == 500
+    assert libro.total_movimientos() == 2
+    assert libro.verificar() == []
+    libro.cerrar()
+
+
+def test_cuenta_sin_apertura_se_descarta(tmp_path):
+    ruta = str(tmp_path / 'cajero')
+    libro = LibroCajero(ruta)
+    libro.abrir_cuenta('0001', 10000)
+    libro.abrir_cuenta('0002', 500)
+    libro.cerrar()
+    # El nombre de la cuenta quedó en disco pero su apertura no
+    quitar_registros(ruta, 1)
+
+    libro = LibroCajero(ruta)
+    assert '0002' not in libro
+    assert libro.abrir_cuenta('0002', 800)
+    libro.cerrar()
+
+    libro = LibroCajero(ruta)
+    assert libro.saldo('0001') == 10000
+    assert libro.saldo('0002') == 800
+    assert libro.verificar() == []
+    libro.cerrar()
+
+
+def test_registro_de_cuenta_desconocida_corta_el_libro(tmp_path):
+    ruta = str(tmp_path / 'cajero')
+    libro = LibroCajero(ruta)
+    libro.abrir_cuenta('0001', 10000)
+    libro.abrir_cuenta('0002', 500)
+    libro.depositar('0001', 100)
+    libro.cerrar()
+    # Se perdió el nombre de la segunda cuenta
+    with open(f"{ruta}.cuentas", 'w', encoding='utf-8') as archivo:
+        archivo.write('0001\n')
+
+    libro = LibroCajero(ruta)
+    assert len(libro) == 1
+    assert libro.saldo('0001') == 10000
+    assert libro.verificar() == []
+    libro.cerrar()
@@ -0,0 +1,68 @@
+import os
+from array import array
+
+import pytest
+
+from libro_ventas import COLUMNAS, LibroVentas
+
+
+@pytest.fixture
+def libro(tmp_path):
+    libro = LibroVentas(str(tmp_path / 'libro'))
+    yield libro
+    libro.cerrar()
+
+
+def reabrir(libro):
+    libro.cerrar()
+    return LibroVentas(libro.directorio)
+
+
+def test_venta_confirmada_tarde_se_copia(libro, gestor, catalogo):
+    for codigo in ('001', '002', '004'):
+        assert gestor.registrar_venta([(codigo, 1)], 'C1')
+    # La venta 2 todavía no se ve cuando pasa la sincronización
+    with gestor.sesion() as cursor:
+        cursor.execute("SELECT * FROM detalle_ventas WHERE id_venta = 2")
+        detalle = cursor.fetchall()
+        cursor.execute("DELETE FROM detalle_ventas WHERE id_venta = 2")
+    assert libro.sincronizar(gestor) == 2
+
+    with gestor.sesion() as cursor:
+        for fila in detalle:
+            cursor.execute(
+                "INSERT INTO detalle_ventas (id_venta, linea, codigo_barras, cantidad, precio_unitario) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                (fila['id_venta'], fila['linea'], fila['codigo_barras'],
+                 fila['cantidad'], fila['precio_unitario']))
+    assert libro.sincronizar(gestor) == 1
+    assert libro.sincronizar(gestor) == 0
+    assert libro.resumen()['lineas'] == 3
+
+
+def test_corte_antes_de_guardar_el_piso_no_duplica(libro, gestor, catalogo):
+    gestor.registrar_venta([('001', 1), ('002', 2)], 'C1')
+    assert libro.sincronizar(gestor, ventana=0) == 2
+    # El proceso murió después de escribir las líneas y antes del piso
+    os.remove(os.path.join(libro.directorio, 'piso_ventas'))
+    libro = reabrir(libro)
+    assert libro.sincronizar(gestor, ventana=0) == 0
+    assert libro.resumen()['lineas'] == 2
+    libro.cerrar()
+
+
+def test_venta_a_medias_se_quita_y_se_vuelve_a_copiar(libro, gestor, catalogo):
+    gestor.registrar_venta([('001', 1), ('002', 2), ('004', 1)], 'C1')
+    libro.sincronizar(gestor)
+    # Solo llegó al disco la primera línea de cada columna
+    particion = next(iter(libro.particiones.values()))
+    libro.cerrar()
+    for nombre, tipo in COLUMNAS:
+        with open(os.path.join(particion.directorio, nombre), 'r+b') as archivo:
+            archivo.truncate(array(tipo).itemsize)
+    libro = LibroVentas(libro.directorio)
+    assert libro.resumen()['lineas'] == 0
+    assert libro.sincronizar(gestor) == 3
+    assert libro.resumen()['unidades'] == 4
+    libro.cerrar()
+
@@ -0,0 +1,93 @@
+import pytest
+
+from monitor_inventario import MonitorInventario
+
+
+@pytest.fixture
+def monitor(gestor, catalogo):
+    """
+    Monitor con punto de reorden 5: Arroz (4), Jugo (0) y Café (2) empiezan bajo
+    """
+    monitor = MonitorInventario(gestor, umbral_predeterminado=5)
+    gestor.agregar_observador(monitor)
+    assert monitor.cargar(avisar=False)
+    return monitor
+
+
+def alertas(monitor):
+    return [(alerta.tipo, alerta.codigo_barras, alerta.cantidad)
+            for alerta in monitor.escuchar(espera=0)]
+
+
+# ========== ESTADO Y PRIORIDAD ==========
+
+def test_cargar_y_urgentes(monitor):
+    assert monitor.bajos() == {'002': 4, '003': 0, '005': 2}
+    # Primero los que más lejos están de su punto
+    assert monitor.urgentes() == [('003', 0, 5), ('005', 2, 5), ('002', 4, 5)]
+    assert monitor.urgentes(1) == [('003', 0, 5)]
+    assert alertas(monitor) == []
+
+
+def test_punto_de_reorden_propio(monitor, gestor):
+    assert monitor.establecer_punto_reorden('001', 12)
+    assert alertas(monitor) == [('bajo', '001', 10)]
+    assert monitor.urgentes() == [('003', 0, 5), ('005', 2, 5), ('001', 10, 12), ('002', 4, 5)]
+    # Se guarda en la base: otro monitor lo lee al cargar
+    otro = MonitorInventario(gestor, umbral_predeterminado=5)
+    otro.cargar()
+    assert otro.punto_reorden('001') == 12 and '001' in otro.bajos()
+
+    assert monitor.establecer_punto_reorden('001', None)
+    assert alertas(monitor) == [('repuesto', '001', 10)]
+
+
+def test_cambios_actualizan_el_heap(monitor, gestor):
+    assert gestor.registrar_venta([('004', 3)], 'C1')             # 7 -> 4
+    assert gestor.actualizar_inventario('002', 10, 'agregar')      # 4 -> 14
+    assert gestor.registrar_venta([('005', 1)], 'C1')              # 2 -> 1, ya estaba bajo
+    assert alertas(monitor) == [('bajo', '004', 4), ('repuesto', '002', 14)]
+    assert monitor.urgentes() == [('003', 0, 5), ('005', 1, 5), ('004', 4, 5)]
+
+    assert gestor.eliminar_producto('003', confirmar=False)
+    assert alertas(monitor) == []
+    assert [codigo for codigo, _, _ in monitor.urgentes()] == ['005', '004']
+
+
+def test_heap_se_compacta(monitor):
+    for cantidad in range(500):
+        monitor.cantidades_actualizadas({'005': cantidad % 5})
+    assert len(monitor._heap) <= 2 * len(monitor.bajos()) + 65
+    assert monitor.urgentes()[0] == ('003', 0, 5)
+    assert ('005', 4, 5) in monitor.urgentes()
+
+
+def test_cargar_recupera_cambios_de_otro_proceso(monitor, gestor):
+    # Escrituras que no pasan por este GestionInventario
+    with gestor.sesion() as cursor:
+        cursor.execute("UPDATE productos SET cantidad = 2 WHERE codigo_barras = '001'")
+        cursor.execute("UPDATE productos SET cantidad = 22 WHERE codigo_barras = '005'")
+        gestor.connection.commit()
+    assert alertas(monitor) == []
+    monitor.cargar()
+    assert sorted(alertas(monitor)) == [('bajo', '001', 2), ('repuesto', '005', None)]
+
+
+# ========== ENTREGA DE ALERTAS ==========
+
+def test_cola_llena_descarta_las_mas_viejas(gestor, catalogo):
+    monitor = MonitorInventario(gestor, umbral_predeterminado=5, tamano_cola=2)
+    monitor.cargar()
+    assert monitor.emitidas == 3 and monitor.descartadas == 1
+    # Salen en orden de cantidad; la de Jugo (0) se descartó
+    assert [codigo for _, codigo, _ in alertas(monitor)] == ['005', '002']
+
+
+def test_suscriptor_con_error_no_detiene_la_venta(monitor, gestor):
+    recibidas = []
+    monitor.suscribir(recibidas.append)
+    monitor.suscribir(lambda alerta: 1 / 0)
+    assert gestor.registrar_venta([('001', 6)], 'C1') is not None
+    assert gestor.obtener_producto('001')['cantidad'] == 4
+    assert [alerta.codigo_barras for alerta in recibidas] == ['001']
+    assert 'ZeroDivisionError' in monitor.ultimo_error
@@ -0,0 +1,22 @@
+from registro_categorias import RegistroCategorias
+
+
+def test_nombres_sin_distinguir_mayusculas():
+    registro = RegistroCategorias()
+    registro.cargar([{'id_categoria': 1, 'nombre_categoria': 'Bebidas'},
+                     {'id_categoria': 2, 'nombre_categoria': 'Lácteos'}])
+    registro.agregar(3, 'Abarrotes')
+    assert registro.id('bebidas') == registro.id('BEBIDAS') == 1
+    assert registro.id('LÁCTEOS') == 2
+    assert registro.id('abarrotes') == 3
+    assert registro.id('Limpieza') is None
+    assert registro.nombres() == [('Abarrotes', 3), ('Bebidas', 1), ('Lácteos', 2)]
+
+
+def test_gestor_resuelve_categoria_sin_distinguir_mayusculas(gestor, catalogo):
+    assert gestor.obtener_categoria_id('bebidas') == catalogo['Bebidas']
+    resumen = gestor.importar_productos(
+        [{'codigo_barras': '010', 'nombre_producto': 'Leche', 'nombre_categoria': 'BEBIDAS',
+          'precio': '25', 'cantidad': 3}])
+    assert resumen['procesados'] == 1
+    assert gestor.obtener_producto('010')['nombre_categoria'] == 'Bebidas'
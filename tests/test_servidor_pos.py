@@ -0,0 +1,64 @@
+import sys
+import threading
+
+import pytest
+
+from servidor_pos import AgrupadorConsultas, crear_servidor, main
+
+
+def _escanear(agrupador, codigos):
+    """
+    Un hilo por código; devuelve {codigo: producto o excepción}
+    """
+    resultados = {}
+
+    def escanear(codigo):
+        try:
+            resultados[codigo] = agrupador.obtener(codigo)
+        except Exception as e:
+            resultados[codigo] = e
+
+    hilos = [threading.Thread(target=escanear, args=(codigo,), daemon=True) for codigo in codigos]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join(5)
+    assert not any(hilo.is_alive() for hilo in hilos), "un escaneo quedó esperando"
+    return resultados
+
+
+def test_agrupa_escaneos(gestor, catalogo):
+    agrupador = AgrupadorConsultas(gestor, espera=0.05)
+    resultados = _escanear(agrupador, ['001', '002', '003', '999'])
+    assert resultados['001']['nombre_producto'] == 'Agua'
+    assert resultados['999'] is None
+    assert agrupador.agrupados == 4
+    assert agrupador.consultas <= 4
+
+
+@pytest.mark.parametrize('error', [TypeError("fila inválida"), KeyError('precio')])
+def test_error_inesperado_despierta_a_todos(gestor, catalogo, monkeypatch, error):
+    def falla(codigos):
+        raise error
+
+    monkeypatch.setattr(gestor, 'obtener_productos', falla)
+    agrupador = AgrupadorConsultas(gestor, espera=0.05)
+    resultados = _escanear(agrupador, ['001', '002', '003'])
+    assert all(resultado is error for resultado in resultados.values())
+    assert agrupador.agrupados == 3
+
+
+def test_servidor_atiende_solo_en_local_por_omision(gestor):
+    servidor = crear_servidor(gestor, puerto=0)
+    try:
+        assert servidor.server_address[0] == '127.0.0.1'
+    finally:
+        servidor.server_close()
+
+
+@pytest.mark.parametrize('argumentos', [['--escuchar', '0.0.0.0'], ['--escuchar', '192.168.1.5']])
+def test_exponer_exige_bandera(monkeypatch, argumentos):
+    monkeypatch.setattr(sys, 'argv', ['servidor_pos.py', '--sqlite', ':memory:', *argumentos])
+    with pytest.raises(SystemExit) as salida:
+        main()
+    assert salida.value.code == 2
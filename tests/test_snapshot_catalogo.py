@@ -0,0 +1,78 @@
+import struct
+
+import pytest
+
+from dinero import Dinero
+from snapshot_catalogo import (MAGICO, VERSION, AlmacenCatalogo, SnapshotInvalido,
+                               cargar_snapshot, guardar_snapshot)
+
+
+def _abrir(tmp_path):
+    almacen = AlmacenCatalogo(str(tmp_path / 'productos'))
+    return almacen, almacen.abrir()
+
+
+def test_cambios_sobreviven_al_reabrir(tmp_path):
+    almacen, catalogo = _abrir(tmp_path)
+    catalogo.agregar('001', 'Agua', '12.50', 10, 'Bebidas')
+    almacen.guardar()
+    catalogo.vender('001', 3)
+    almacen.cerrar()
+
+    almacen, catalogo = _abrir(tmp_path)
+    assert catalogo.cantidad('001') == 7
+    almacen.cerrar()
+
+
+def test_corte_entre_snapshot_y_registro(tmp_path):
+    almacen, catalogo = _abrir(tmp_path)
+    catalogo.agregar('001', 'Agua', '12.50', 10, 'Bebidas')
+    # Lo que hace guardar() hasta antes de crear el registro nuevo
+    generacion = almacen.registro.generacion + 1
+    almacen.registro.cerrar()
+    guardar_snapshot(catalogo, almacen.ruta_snapshot, generacion)
+    almacen.cerrar()
+
+    # Primera apertura después del corte: el registro viejo no se aplica
+    almacen, catalogo = _abrir(tmp_path)
+    assert catalogo.cantidad('001') == 10
+    catalogo.agregar('002', 'Jugo', '19.99', 4, 'Bebidas')
+    catalogo.vender('001', 1)
+    almacen.cerrar()
+
+    # Lo anotado después de recuperarse sigue ahí al abrir otra vez
+    almacen, catalogo = _abrir(tmp_path)
+    assert '002' in catalogo
+    assert catalogo.cantidad('002') == 4
+    assert catalogo.cantidad('001') == 9
+    almacen.cerrar()
+
+
+def test_registro_con_cabecera_cortada(tmp_path):
+    almacen, catalogo = _abrir(tmp_path)
+    almacen.cerrar()
+    with open(almacen.ruta_registro, 'r+b') as archivo:
+        archivo.truncate(3)
+
+    almacen, catalogo = _abrir(tmp_path)
+    catalogo.agregar('001', 'Agua', '12.50', 10, 'Bebidas')
+    almacen.cerrar()
+    almacen, catalogo = _abrir(tmp_path)
+    assert catalogo.cantidad('001') == 10
+    almacen.cerrar()
+
+
+def test_precios_en_centavos_y_version_anterior_rechazada(tmp_path):
+    almacen, catalogo = _abrir(tmp_path)
+    catalogo.agregar('001', 'Agua', '12.50', 10, 'Bebidas')
+    almacen.guardar()
+    almacen.cerrar()
+    cargado, _ = cargar_snapshot(almacen.ruta_snapshot)
+    assert cargado.precio('001') == Dinero(1250)
+
+    # Cabecera: MAGICO (8 bytes) y después la versión
+    with open(almacen.ruta_snapshot, 'r+b') as archivo:
+        archivo.seek(len(MAGICO))
+        archivo.write(struct.pack('<H', VERSION - 1))
+    with pytest.raises(SnapshotInvalido, match='no soportada'):
+        cargar_snapshot(almacen.ruta_snapshot)